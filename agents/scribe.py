@@ -1,5 +1,6 @@
 """Scribe Agent - Content drafting and sanitization."""
 
+import re
 from typing import Optional, Dict, Any
 from loguru import logger
 
@@ -9,6 +10,16 @@ from data.schemas import ConversationSession, SocialDraft
 from services.gemini_service import gemini_service
 from tools.social_draft import draft_social_content
 
+# Phrases that mark a conversation as a moment worth sharing
+SHAREABLE_KEYWORDS = (
+    "learned", "realized", "understood", "breakthrough",
+    "finally worked", "figured out", "resolved", "overcame"
+)
+
+# One case-insensitive scan of the text instead of lowercasing it and
+# searching for each keyword in turn
+SHAREABLE_PATTERN = re.compile("|".join(map(re.escape, SHAREABLE_KEYWORDS)), re.IGNORECASE)
+
 
 class ScribeAgent(BaseAgent):
     """Agent 3: The Scribe - Public Bridge."""
@@ -20,13 +31,7 @@ class ScribeAgent(BaseAgent):
         )
     
     def detect_shareable_moment(self, conversation_text: str) -> bool:
-        keywords = [
-            "learned", "realized", "understood", "breakthrough",
-            "finally worked", "figured out", "resolved", "overcame"
-        ]
-        
-        text_lower = conversation_text.lower()
-        return any(keyword in text_lower for keyword in keywords)
+        return SHAREABLE_PATTERN.search(conversation_text) is not None
     
     def extract_insight(self, conversation_text: str) -> Dict[str, str]:
         prompt = f"""Extract the key insight and emotional tone from this research conversation:
@@ -54,9 +59,9 @@ Mood: [mood]"""
             
             for line in response.split("\n"):
                 if line.startswith("Topic:"):
-                    topic = line.replace("Topic:", "").strip()
+                    topic = line[len("Topic:"):].strip()
                 elif line.startswith("Mood:"):
-                    mood = line.replace("Mood:", "").strip()
+                    mood = line[len("Mood:"):].strip()
             
             return {
                 "topic": topic or "Research resilience and learning",
@@ -113,7 +118,8 @@ Mood: [mood]"""
                 draft = draft_social_content(
                     raw_text=conversation_text,
                     platform="linkedin",
-                    guardian_findings=guardian_report
+                    guardian_findings=guardian_report,
+                    session_id=session.session_id
                 )
             else:
                 insight = self.extract_insight(conversation_text)
@@ -121,7 +127,8 @@ Mood: [mood]"""
                 draft = draft_social_content(
                     topic=insight["topic"],
                     mood=insight["mood"],
-                    platform="linkedin"
+                    platform="linkedin",
+                    session_id=session.session_id
                 )
             
             if not draft or not draft.get('content'):
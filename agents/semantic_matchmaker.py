@@ -7,12 +7,17 @@ from agents.base_agent import BaseAgent
 from config.prompts import MATCHMAKER_PROMPT
 from data.schemas import ConversationSession, MatchResult
 from services.vector_search_local import LocalVectorSearch
-from services.embedding_service import embedding_service
 
 
 class SemanticMatchmakerAgent(BaseAgent):
     """Agent 2: Semantic Matchmaker - Connection Engine."""
     
+    EMOTIONAL_KEYWORDS = (
+        "struggling", "failed", "frustrated", "anxious", "worried",
+        "stressed", "difficult", "hard", "imposter", "alone", "isolated",
+        "rejected", "disappointed", "overwhelmed", "burnout", "toxic"
+    )
+    
     def __init__(self, vector_store: LocalVectorSearch):
         super().__init__(
             name="Semantic Matchmaker",
@@ -85,24 +90,24 @@ class SemanticMatchmakerAgent(BaseAgent):
                 })
         return enriched_matches
 
-    def is_emotional_struggle(self, message: str) -> bool:
+    def is_emotional_struggle(self, message: str, message_lower: Optional[str] = None) -> bool:
         """
         Check if message contains emotional struggle indicators.
-        """
-        emotional_keywords = [
-            "struggling", "failed", "frustrated", "anxious", "worried", 
-            "stressed", "difficult", "hard", "imposter", "alone", "isolated",
-            "rejected", "disappointed", "overwhelmed", "burnout", "toxic"
-        ]
         
-        message_lower = message.lower()
-        return any(kw in message_lower for kw in emotional_keywords)
+        Args:
+            message: User message
+            message_lower: Precomputed message.lower(), if the caller has it
+        """
+        if message_lower is None:
+            message_lower = message.lower()
+        return any(kw in message_lower for kw in self.EMOTIONAL_KEYWORDS)
     
     def process(
         self,
         message: str,
         session: ConversationSession,
         force: bool = False,
+        message_lower: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -115,7 +120,7 @@ class SemanticMatchmakerAgent(BaseAgent):
         
         try:
             # Only match peers for emotional struggles, unless forced
-            if not force and not self.is_emotional_struggle(message):
+            if not force and not self.is_emotional_struggle(message, message_lower):
                 logger.info("Message is not an emotional struggle, skipping peer matching")
                 return result
             
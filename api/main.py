@@ -92,6 +92,11 @@ async def lifespan(app: FastAPI):
                 logger.info("✅ Pre-loaded persisted vector store data")
             except Exception as e:
                 logger.warning(f"Failed to pre-load persisted data (non-critical): {e}")
+            
+            # Prime Gemini's prompt cache for the Scribe before the first draft
+            if settings.draft_warmup:
+                from tools.social_draft import warm_up_drafts
+                await loop.run_in_executor(None, warm_up_drafts)
         except Exception as e:
             logger.error(f"❌ Failed to initialize orchestrator: {e}", exc_info=True)
             # Don't raise - allow server to start even if initialization fails
@@ -180,6 +185,7 @@ class GuardianReportResponse(BaseModel):
 
 class DraftPostRequest(BaseModel):
     memory_context: Optional[str] = None
+    regenerate: bool = False  # Sample a new draft instead of returning the cached one
 
 
 class SocialDraftResponse(BaseModel):
@@ -483,7 +489,7 @@ async def process_message(
     session = sessions[session_id]
     
     # Add user message to session
-    session.messages.append(ConversationMessage(
+    session.add_message(ConversationMessage(
         role="user",
         content=message.content,
         agent=None
@@ -512,7 +518,7 @@ async def process_message(
         
         # Add assistant message to session
         if responses.get("main_response"):
-            session.messages.append(ConversationMessage(
+            session.add_message(ConversationMessage(
                 role="assistant",
                 content=responses["main_response"],
                 agent=responses.get("agent_used")
@@ -602,7 +608,9 @@ async def draft_social_post(
             draft_dict = draft_social_content(
                 raw_text=conversation_text,
                 platform="linkedin",
-                guardian_findings=initial_guardian_report
+                guardian_findings=initial_guardian_report,
+                session_id=session_id,
+                regenerate=request.regenerate
             )
             logger.info(f"[Scribe Draft] Scribe returned content (length: {len(draft_dict.get('content', ''))})")
         else:
@@ -611,7 +619,9 @@ async def draft_social_post(
             draft_dict = draft_social_content(
                 topic=insight["topic"],
                 mood=insight["mood"],
-                platform="linkedin"
+                platform="linkedin",
+                session_id=session_id,
+                regenerate=bool(request and request.regenerate)
             )
         
         # Clean up the content - remove any "Here is..." type prefixes
@@ -777,7 +787,7 @@ async def get_struggle_map(user_id: str):
         profiles = []
         for match in matches:
             profile = vector_store.profiles.get(match.profile_id)
-            if profile and profile.embedding:
+            if profile and profile.embedding.size:
                 embeddings.append(profile.embedding)
                 profiles.append((match, profile))
         
@@ -19,6 +19,22 @@ class Settings(BaseSettings):
     gemini_api_key: Optional[str] = os.getenv("GEMINI_API_KEY", "").strip() if os.getenv("GEMINI_API_KEY") else None
     gemini_model_flash: str = "gemini-2.5-flash"  # Stable, free tier compatible
     gemini_model_pro: str = "gemini-2.5-pro"  # Stable, free tier compatible
+    llm_cache_size: int = int(os.getenv("LLM_CACHE_SIZE", "10000"))  # Cached temperature-0 responses
+    llm_cache_ttl: float = float(os.getenv("LLM_CACHE_TTL", "3600"))  # Seconds a cached response stays valid
+    gemini_max_connections: int = int(os.getenv("GEMINI_MAX_CONNECTIONS", "200"))  # Pooled HTTP connections to the Gemini API
+    gemini_read_timeout: float = float(os.getenv("GEMINI_READ_TIMEOUT", "60"))  # Seconds to wait for a response
+    gemini_rpm: int = int(os.getenv("GEMINI_RPM", "0"))  # Requests per minute before callers wait; unlimited by default, set to the project's quota
+    gemini_tpm: int = int(os.getenv("GEMINI_TPM", "0"))  # Estimated tokens per minute before callers wait; unlimited by default, set to the project's quota
+    gemini_init_timeout: float = float(os.getenv("GEMINI_INIT_TIMEOUT", "5"))  # Seconds allowed for Vertex AI / client setup
+    redis_url: str = os.getenv("REDIS_URL", "")  # Shares cached responses across workers; empty disables it
+    semantic_cache_enabled: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() == "true"  # Reuse temperature-0 Gemini responses for paraphrased prompts
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # Prompt similarity needed to reuse a response
+    semantic_cache_size: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "50000"))  # Oldest entries evicted first
+    draft_cache_size: int = int(os.getenv("DRAFT_CACHE_SIZE", "512"))  # Social drafts reused for identical inputs
+    draft_cache_ttl: float = float(os.getenv("DRAFT_CACHE_TTL", "3600"))  # Seconds a cached draft stays valid
+    draft_cache_path: str = os.getenv("DRAFT_CACHE_PATH", "")  # SQLite draft cache file; empty disables it
+    draft_semantic_cache_enabled: bool = os.getenv("DRAFT_SEMANTIC_CACHE_ENABLED", "False").lower() == "true"  # Reuse a session's draft for its reworded raw text
+    draft_warmup: bool = os.getenv("DRAFT_WARMUP", "False").lower() == "true"  # Send one throwaway Scribe request per drafting model at startup
     
     # Google Cloud Configuration
     google_cloud_project_id: Optional[str] = os.getenv("GOOGLE_CLOUD_PROJECT_ID")
@@ -33,6 +49,12 @@ class Settings(BaseSettings):
     
     # Embedding Model
     embedding_model: str = "text-embedding-004"
+    embedding_quantize: str = os.getenv("EMBEDDING_QUANTIZE", "fp32")  # "int8" keeps int8 copies for brute-force search
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))  # In-process LRU entries
+    query_embedding_cache_size: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1000"))  # Cached normalized search queries
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "")  # SQLite cache file; empty disables it
+    embed_batch_size: int = int(os.getenv("EMBED_BATCH_SIZE", "100"))  # Texts per batch embedding request (API max 100)
+    embed_concurrency: int = int(os.getenv("EMBED_CONCURRENCY", "8"))  # Max in-flight embedding requests per batch
     
     # Application Settings
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
@@ -41,6 +63,11 @@ class Settings(BaseSettings):
     # Vector Search Settings
     vector_search_top_k: int = 5
     similarity_threshold: float = 0.7
+    vector_index_type: str = os.getenv("VECTOR_INDEX_TYPE", "hnsw")  # FAISS index for large stores: "hnsw", "sq8" (int8 codes) or "flat"
+    hnsw_min_vectors: int = int(os.getenv("HNSW_MIN_VECTORS", "1000"))  # Below this, FAISS search is exact
+    hnsw_m: int = int(os.getenv("HNSW_M", "32"))  # Graph neighbours per node
+    hnsw_ef_construction: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))  # Candidate list size while inserting
+    hnsw_ef_search: int = int(os.getenv("HNSW_EF_SEARCH", "64"))  # Candidate list size per query
     
     # Vector Store Persistence Settings
     enable_real_user_data: bool = os.getenv("ENABLE_REAL_USER_DATA", "True").lower() == "true"
@@ -48,6 +75,12 @@ class Settings(BaseSettings):
     auto_save_interval: int = int(os.getenv("AUTO_SAVE_INTERVAL", "10"))  # Save after N additions
     min_struggle_length: int = int(os.getenv("MIN_STRUGGLE_LENGTH", "20"))  # Minimum characters
     deduplication_threshold: float = float(os.getenv("DEDUPLICATION_THRESHOLD", "0.95"))  # Similarity threshold for duplicates
+    
+    # Intent Classification Cache Settings
+    intent_cache_size: int = int(os.getenv("INTENT_CACHE_SIZE", "1000"))  # Max cached message embeddings
+    intent_cache_threshold: float = float(os.getenv("INTENT_CACHE_THRESHOLD", "0.92"))  # Similarity needed to reuse a label
+    academic_context_cache_size: int = int(os.getenv("ACADEMIC_CONTEXT_CACHE_SIZE", "1024"))  # Cached grounding results per query
+    academic_context_cache_ttl: float = float(os.getenv("ACADEMIC_CONTEXT_CACHE_TTL", "86400"))  # Seconds a grounding result stays cached
 
     # Frontend origins (CORS)
     frontend_cors_origins: List[str] = Field(
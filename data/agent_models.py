@@ -1,5 +1,6 @@
+from functools import cached_property
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 
 class EmotionalAnalysis(BaseModel):
     """Analysis of user's emotional state."""
@@ -20,6 +21,11 @@ class VentResponse(BaseModel):
         description="The empathetic, warm response to the user, in the voice of Mr. Rogers. Succinct (2-3 sentences)."
     )
 
+    @cached_property
+    def analysis_dict(self) -> Dict[str, Any]:
+        """The analysis as a plain dict, dumped once per response."""
+        return self.analysis.model_dump()
+
 class ClarityAnalysis(BaseModel):
     """Analysis of research clarity and logic."""
     clarity_score: int = Field(description="Clarity score 0-100.")
@@ -1,9 +1,10 @@
 """Data schemas and models."""
 
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
+from typing import Optional, List, Dict, Any, Set
 from datetime import datetime
 from enum import Enum
+import numpy as np
 
 
 class RiskLevel(str, Enum):
@@ -24,12 +25,23 @@ class UserEntry(BaseModel):
 
 class PeerProfile(BaseModel):
     """Anonymized peer profile for matching."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
     profile_id: str
-    embedding: List[float]
+    embedding: np.ndarray  # 1-D float32; lists are converted on validation
     struggle_text: str
     academic_stage: Optional[str] = None  # e.g., "3rd year PhD", "Postdoc"
     research_area: Optional[str] = None  # Generic area, not specific
     anonymized_metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @field_validator("embedding", mode="before")
+    @classmethod
+    def _embedding_as_float32(cls, value: Any) -> np.ndarray:
+        return np.asarray(value, dtype=np.float32)
+    
+    @field_serializer("embedding")
+    def _embedding_as_list(self, value: np.ndarray) -> List[float]:
+        return value.tolist()
 
 
 class MatchResult(BaseModel):
@@ -88,4 +100,11 @@ class ConversationSession(BaseModel):
     messages: List[ConversationMessage] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.now)
     context: Dict[str, Any] = Field(default_factory=dict)  # Long-term memory
+    agents_used: Set[str] = Field(default_factory=set)  # Agents that have replied so far
+    
+    def add_message(self, message: ConversationMessage):
+        """Append a message and record which agent produced it."""
+        self.messages.append(message)
+        if message.agent:
+            self.agents_used.add(message.agent)
 
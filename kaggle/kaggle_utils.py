@@ -1,36 +1,40 @@
 """Kaggle-specific utilities."""
 
 import os
+from functools import lru_cache
 from typing import Optional
 
+# Kaggle's secrets client is only importable inside a Kaggle kernel; build it
+# once at import time instead of on every lookup.
+try:
+    from kaggle_secrets import UserSecretsClient
+    _CLIENT = UserSecretsClient()
+except ImportError:
+    _CLIENT = None
 
+
+@lru_cache(maxsize=None)
 def get_kaggle_secret(secret_name: str) -> Optional[str]:
     """
     Get a secret from Kaggle User Secrets.
     
+    Falls back to an environment variable of the same name when the Kaggle
+    secrets API is unavailable or does not hold the secret. Values are
+    memoized since secrets do not change within a session.
+    
     Args:
         secret_name: Name of the secret
         
     Returns:
         Secret value or None
     """
-    try:
-        # Kaggle secrets are accessed via environment variables
-        # Format: KAGGLE_USER_SECRETS_TOKEN or direct env var
-        secret_value = os.getenv(secret_name)
-        
-        # Alternative: Try to read from Kaggle's secrets API if available
+    if _CLIENT is not None:
         try:
-            from kaggle_secrets import UserSecretsClient
-            client = UserSecretsClient()
-            secret_value = client.get_secret(secret_name)
-        except ImportError:
-            pass
-        
-        return secret_value
-    except Exception as e:
-        print(f"Error getting Kaggle secret {secret_name}: {e}")
-        return None
+            return _CLIENT.get_secret(secret_name)
+        except Exception as e:
+            print(f"Error getting Kaggle secret {secret_name}: {e}")
+    
+    return os.getenv(secret_name)
 
 
 def setup_kaggle_environment():
@@ -46,4 +50,3 @@ def setup_kaggle_environment():
     # Force local vector store
     os.environ["USE_LOCAL_VECTOR_STORE"] = "True"
     print("✅ Using local vector store (FAISS)")
-
@@ -51,13 +51,25 @@ VENT_VALIDATOR_PROMPT = """You are an empathetic academic peer specializing in s
 Use active listening, validate emotions, and differentiate between technical and emotional blocks.
 Only offer advice when asked."""
 
-model_flash = genai.GenerativeModel('gemini-2.5-flash')
+def print_stream(response) -> str:
+    """Print a streamed response as chunks arrive and return the full text."""
+    chunks = []
+    for chunk in response:
+        print(chunk.text, end='', flush=True)
+        chunks.append(chunk.text)
+    print()
+    return ''.join(chunks)
+
+# System prompt is attached to the model once, not re-sent with every turn
+vent_model = genai.GenerativeModel('gemini-2.5-flash', system_instruction=VENT_VALIDATOR_PROMPT)
 
-def vent_validator_chat(user_message: str, history: List[Dict] = None):
+def vent_validator_chat(user_message: str, history: List[Dict] = None, stream: bool = False):
     if history is None:
         history = []
-    chat = model_flash.start_chat(history=history)
-    response = chat.send_message(f"{VENT_VALIDATOR_PROMPT}\n\nUser: {user_message}")
+    chat = vent_model.start_chat(history=history)
+    if stream:
+        return print_stream(chat.send_message(user_message, stream=True))
+    response = chat.send_message(user_message)
     return response.text
 
 # Test
@@ -142,13 +154,34 @@ def scribe_agent(conversation: str):
     keywords = ["learned", "realized", "understood", "breakthrough", "finally worked"]
     if any(kw in conversation.lower() for kw in keywords):
         model_pro = genai.GenerativeModel('gemini-2.5-pro')
-        prompt = f"Extract the key insight from: {conversation}\n\nProvide topic and mood."
-        insight = model_pro.generate_content(prompt).text
-        return draft_social_post(
-            topic=insight.split('\n')[0] if '\n' in insight else insight[:100],
-            mood="reflective",
-            platform="linkedin"
+        # Extract the insight and draft the post in a single round trip
+        prompt = f"""Extract the key insight from this conversation and draft a professional LinkedIn post about it.
+
+Requirements for the post:
+- Professional but authentic
+- Remove specific data/names
+- Include 3-5 academic hashtags
+- Length: 500-1000 chars
+
+Return JSON: {{"topic": "...", "mood": "...", "post": "..."}}
+
+Conversation: {conversation}"""
+        response = model_pro.generate_content(
+            prompt,
+            generation_config=genai.GenerationConfig(response_mime_type='application/json')
         )
+        try:
+            return json.loads(response.text)['post']
+        except (ValueError, KeyError, TypeError):
+            # Fall back to the two-step extract-then-draft path
+            insight = model_pro.generate_content(
+                f"Extract the key insight from: {conversation}\n\nProvide topic and mood."
+            ).text
+            return draft_social_post(
+                topic=insight.split('\n')[0] if '\n' in insight else insight[:100],
+                mood="reflective",
+                platform="linkedin"
+            )
     return None
 
 conversation = "I finally figured out why my experiments kept failing. It was a temperature issue. I learned so much about patience and troubleshooting."
@@ -187,9 +220,11 @@ GUARDIAN_PROMPT = """You are an IP safety agent.
 Scan content for: chemical structures, genomic sequences, PI names, institutions.
 Return risk level: LOW, MEDIUM, or HIGH."""
 
-def guardian_scan(content: str):
+def guardian_scan(content: str, stream: bool = False):
     model_pro = genai.GenerativeModel('gemini-2.5-pro')
     prompt = f"{GUARDIAN_PROMPT}\n\nContent:\n{content}\n\nRisk assessment:"
+    if stream:
+        return print_stream(model_pro.generate_content(prompt, stream=True))
     response = model_pro.generate_content(prompt)
     return response.text
 
@@ -205,7 +240,7 @@ for i, test in enumerate(test_cases, 1):
     print(f"Guardian: {result}\n")
 
 # Cell 12: Empathy Scoring
-def score_empathy(user_message: str, agent_response: str):
+def score_empathy(user_message: str, agent_response: str, stream: bool = False):
     prompt = f"""Evaluate this agent response for empathy (1-5 scale).
 
 User: {user_message}
@@ -213,6 +248,8 @@ Agent: {agent_response}
 
 Score (1-5) and reasoning:"""
     model_flash = genai.GenerativeModel('gemini-2.5-flash')
+    if stream:
+        return print_stream(model_flash.generate_content(prompt, stream=True))
     response = model_flash.generate_content(prompt)
     return response.text
 
@@ -228,9 +265,9 @@ def full_agent_demo(user_message: str):
     print(f"User: {user_message}")
     print(f"{'='*60}\n")
     
+    # Stream responses so output starts as soon as the first tokens arrive
     print("1️⃣ Vent Validator:")
-    vent_response = vent_validator_chat(user_message)
-    print(vent_response)
+    vent_response = vent_validator_chat(user_message, stream=True)
     print()
     
     print("2️⃣ Semantic Matchmaker:")
@@ -250,13 +287,11 @@ def full_agent_demo(user_message: str):
     
     print("4️⃣ The Guardian:")
     if draft:
-        guardian_result = guardian_scan(draft)
-        print(guardian_result)
+        guardian_scan(draft, stream=True)
     print()
     
     print("5️⃣ Empathy Evaluation:")
-    empathy_score = score_empathy(user_message, vent_response)
-    print(empathy_score)
+    score_empathy(user_message, vent_response, stream=True)
 
 demo_message = "I finally figured out why my Western Blot kept failing. It was a blocking buffer issue. I learned so much about troubleshooting and patience."
 full_agent_demo(demo_message)
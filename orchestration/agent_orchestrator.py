@@ -2,12 +2,17 @@
 
 from typing import List, Dict, Any, Optional
 from loguru import logger
+import atexit
+import queue
+import threading
 import uuid
 import json
 import re
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from data.schemas import ConversationSession, ConversationMessage
+from data.schemas import ConversationSession, ConversationMessage, GuardianReport
+from data.agent_models import VentResponse
 from agents.vent_validator import VentValidatorAgent
 from agents.semantic_matchmaker import SemanticMatchmakerAgent
 from agents.scribe import ScribeAgent
@@ -16,12 +21,128 @@ from agents.pi_simulator import PISimulatorAgent
 from services.vector_search_local import LocalVectorSearch
 from services.gemini_service import gemini_service
 from orchestration.intent_classifier import IntentClassifier
+from orchestration.keyword_matcher import KeywordMatcher
 from config.settings import settings
 
 
+# Matches every [[EMOTIONAL_ANALYSIS]] and [[CLARITY_SCORE]] block in one scan
+METADATA_BLOCK_PATTERN = re.compile(
+    r"\[\[\s*(?P<kind>EMOTIONAL_ANALYSIS|CLARITY_SCORE)\s*\]\]\s*(?P<body>.*?)\s*\[\[\s*END_(?P=kind)\s*\]\]",
+    re.DOTALL | re.IGNORECASE
+)
+
+
+# (keyword, value) pairs, in priority order
+EMOTIONAL_TAG_KEYWORDS = (
+    ("frustrated", "frustration"),
+    ("anxious", "anxiety"),
+    ("worried", "anxiety"),
+    ("stressed", "stress"),
+    ("imposter", "imposter_syndrome"),
+    ("alone", "isolation"),
+    ("isolated", "isolation"),
+    ("rejected", "rejection"),
+    ("disappointed", "disappointment"),
+    ("overwhelmed", "overwhelm"),
+    ("burnout", "burnout"),
+    ("toxic", "toxic_environment"),
+    ("failed", "failure"),
+    ("struggling", "struggle"),
+)
+
+ACADEMIC_STAGE_KEYWORDS = (
+    ("1st year", "1st year PhD"),
+    ("first year", "1st year PhD"),
+    ("2nd year", "2nd year PhD"),
+    ("second year", "2nd year PhD"),
+    ("3rd year", "3rd year PhD"),
+    ("third year", "3rd year PhD"),
+    ("4th year", "4th year PhD"),
+    ("fourth year", "4th year PhD"),
+    ("5th year", "5th year PhD"),
+    ("fifth year", "5th year PhD"),
+    ("postdoc", "Postdoc"),
+    ("post-doc", "Postdoc"),
+    ("post doc", "Postdoc"),
+)
+
+# Shape of the dict returned by process_message
+RESPONSE_TEMPLATE = {
+    "main_response": "",
+    "peer_matches": "",
+    "social_draft": "",
+    "guardian_report": None,
+    "agent_metadata": {},
+    "agent_used": ""
+}
+
+API_ERROR_PATTERN = re.compile(r"api key|authentication|gemini", re.IGNORECASE)
+
+GUARDIAN_ALERT_TEMPLATE = "\n\n⚠️ **Guardian Alert:** {level} risk detected. Concerns: {concerns}"
+
+STRUGGLE_KEYWORD_MATCHER = KeywordMatcher(
+    [(kw, "emotional_tag", tag) for kw, tag in EMOTIONAL_TAG_KEYWORDS]
+    + [(kw, "academic_stage", stage) for kw, stage in ACADEMIC_STAGE_KEYWORDS]
+)
+
+
+def _extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the first balanced JSON object in text.
+    
+    Scans once from the first '{', tracking brace depth and string state, so
+    surrounding markdown fences or prose need no separate stripping.
+    
+    Returns:
+        Parsed object, or None if text holds no complete object
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return json.loads(text[start:i + 1])
+    return None
+
+
+def _format_guardian_alert(report: GuardianReport) -> str:
+    """Build the alert appended to Scribe drafts that the Guardian blocked."""
+    return GUARDIAN_ALERT_TEMPLATE.format(
+        level=report.risk_level,
+        concerns=", ".join(report.concerns)
+    )
+
+
 class AgentOrchestrator:
     """Orchestrates multiple agents to handle user interactions."""
     
+    # Struggle captures are embedded and indexed off the request path in
+    # batches of up to CAPTURE_BATCH_SIZE, waiting CAPTURE_BATCH_WAIT seconds
+    # for more captures before flushing a partial batch.
+    CAPTURE_BATCH_SIZE = 16
+    CAPTURE_BATCH_WAIT = 0.5
+    
+    # Intent results for the most recent distinct messages of each session
+    SESSION_INTENT_CACHE_SIZE = 8
+    
     def __init__(self, vector_store: Optional[LocalVectorSearch] = None):
         self.vent_validator = VentValidatorAgent()
         self.matchmaker = SemanticMatchmakerAgent(vector_store) if vector_store else None
@@ -31,82 +152,165 @@ class AgentOrchestrator:
         self.intent_classifier = IntentClassifier()
         self.vector_store = vector_store
         
+        # Runs auto-mode follow-up agents alongside the primary agent
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="orchestrator")
+        
+        self._capture_queue = queue.Queue()
+        self._capture_thread = None
+        if vector_store:
+            self._capture_thread = threading.Thread(
+                target=self._capture_worker, name="struggle-capture", daemon=True
+            )
+            self._capture_thread.start()
+        atexit.register(self.shutdown)
+        
+        # Agent mode -> handler; auto mode resolves a mode from the classified intent
+        self._mode_handlers = {
+            "vent": self._run_vent,
+            "matchmaker": self._run_matchmaker,
+            "pi": self._run_pi,
+            "scribe": self._run_scribe,
+        }
+        
         logger.info("Agent orchestrator initialized")
     
     def create_session(self, user_id: str) -> ConversationSession:
-        return ConversationSession(
-            session_id=str(uuid.uuid4()),
-            user_id=user_id,
-            messages=[],
-            created_at=datetime.now(),
-            context={}
-        )
+        return ConversationSession(session_id=str(uuid.uuid4()), user_id=user_id)
     
     def _parse_agent_response(self, response: str) -> Dict[str, Any]:
         """Parse metadata from agent response and return clean text."""
         metadata = {}
-        clean_response = response
+        kept = []
+        last_end = 0
         
-        emotional_pattern = r"\[\[\s*EMOTIONAL_ANALYSIS\s*\]\]\s*(.*?)\s*\[\[\s*END_EMOTIONAL_ANALYSIS\s*\]\]"
-        match = re.search(emotional_pattern, response, re.DOTALL | re.IGNORECASE)
-        if match:
+        for match in METADATA_BLOCK_PATTERN.finditer(response):
+            kind = match.group("kind").upper()
+            label = "emotional analysis" if kind == "EMOTIONAL_ANALYSIS" else "clarity score"
+            kept.append(response[last_end:match.start()])
+            last_end = match.end()
             try:
-                content = match.group(1).strip()
-                if content.startswith("```json"):
-                    content = content[7:]
-                elif content.startswith("```"):
-                    content = content[3:]
-                if content.endswith("```"):
-                    content = content[:-3]
-                content = content.strip()
-                
-                start_idx = content.find('{')
-                end_idx = content.rfind('}')
-                if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                    json_str = content[start_idx:end_idx+1]
-                    data = json.loads(json_str)
+                content = match.group("body")
+                data = _extract_json_object(content)
+                if data is None:
+                    logger.warning(f"Could not find JSON object in {label} block: {content[:100]}")
+                elif kind == "EMOTIONAL_ANALYSIS":
                     metadata.update(data)
-                    logger.info(f"Successfully parsed emotional analysis: {metadata}")
+                    logger.info("Successfully parsed emotional analysis: {}", metadata)
                 else:
-                    logger.warning(f"Could not find JSON object in emotional analysis block: {content[:100]}")
-                
-                clean_response = clean_response.replace(match.group(0), "").strip()
-            except Exception as e:
-                logger.warning(f"Failed to parse emotional analysis JSON: {e}")
-                logger.debug(f"Raw content was: {match.group(1)[:200] if match else 'No match'}")
-
-        clarity_pattern = r"\[\[\s*CLARITY_SCORE\s*\]\]\s*(.*?)\s*\[\[\s*END_CLARITY_SCORE\s*\]\]"
-        match_pi = re.search(clarity_pattern, clean_response, re.DOTALL | re.IGNORECASE)
-        if match_pi:
-            try:
-                content = match_pi.group(1).strip()
-                if content.startswith("```json"):
-                    content = content[7:]
-                elif content.startswith("```"):
-                    content = content[3:]
-                if content.endswith("```"):
-                    content = content[:-3]
-                content = content.strip()
-
-                start_idx = content.find('{')
-                end_idx = content.rfind('}')
-                if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                    json_str = content[start_idx:end_idx+1]
-                    data = json.loads(json_str)
                     if "clarity" in data: metadata["clarity_score"] = data["clarity"]
                     if "logic" in data: metadata["logic_score"] = data["logic"]
                     if "focus" in data: metadata["critique_focus"] = data["focus"]
-                    logger.info(f"Successfully parsed clarity score: {metadata}")
-                else:
-                    logger.warning(f"Could not find JSON object in clarity score block: {content[:100]}")
-                
-                clean_response = clean_response.replace(match_pi.group(0), "").strip()
+                    logger.info("Successfully parsed clarity score: {}", metadata)
             except Exception as e:
-                logger.warning(f"Failed to parse clarity score JSON: {e}")
-                logger.debug(f"Raw content was: {match_pi.group(1)[:200] if match_pi else 'No match'}")
-                
+                # Leave an unparseable block in the text, as before
+                kept.append(match.group(0))
+                logger.warning(f"Failed to parse {label} JSON: {e}")
+                logger.opt(lazy=True).debug("Raw content was: {}", lambda: content[:200])
+        
+        kept.append(response[last_end:])
+        clean_response = "".join(kept).strip()
+        
         return {"metadata": metadata, "clean_response": clean_response}
 
+    def _run_vent(
+        self,
+        message: str,
+        session: ConversationSession,
+        responses: Dict[str, Any]
+    ):
+        agent_output = self.vent_validator.process(message, session)
+        responses["agent_used"] = "Vent Validator"
+        
+        if isinstance(agent_output, VentResponse):
+            responses["main_response"] = agent_output.response_text
+            # Copied because auto mode adds peer matches to agent_metadata in place
+            responses["agent_metadata"] = dict(agent_output.analysis_dict)
+        else:
+            responses["main_response"] = str(agent_output)
+    
+    def _run_matchmaker(
+        self,
+        message: str,
+        session: ConversationSession,
+        responses: Dict[str, Any]
+    ):
+        responses["agent_used"] = "Semantic Matchmaker"
+        if not self.matchmaker:
+            responses["main_response"] = "Matchmaker service is not available."
+            return
+        
+        logger.info("Matchmaker mode: Running Semantic Matchmaker")
+        match_result = self.matchmaker.process(message, session, force=True)
+        
+        if isinstance(match_result, dict):
+            peer_matches = match_result.get("text", "")
+            matches_data = match_result.get("matches", [])
+        else:
+            peer_matches = match_result
+            matches_data = []
+            
+        if peer_matches:
+            responses["main_response"] = peer_matches
+            if matches_data:
+                responses["agent_metadata"]["matches"] = matches_data
+        else:
+            responses["main_response"] = "I couldn't find any matching peers for your message. Try rephrasing or sharing more details about your research journey."
+        
+        self._capture_user_struggle(message, session, "emotional")
+    
+    def _run_pi(
+        self,
+        message: str,
+        session: ConversationSession,
+        responses: Dict[str, Any]
+    ):
+        raw_response = self.pi_simulator.process(message, session)
+        parsed = self._parse_agent_response(raw_response)
+        responses["main_response"] = parsed["clean_response"]
+        responses["agent_metadata"] = parsed["metadata"]
+        responses["agent_used"] = "PI Simulator"
+    
+    def _run_scribe(
+        self,
+        message: str,
+        session: ConversationSession,
+        responses: Dict[str, Any],
+        as_social_draft: bool = False
+    ):
+        """Run the Scribe and Guardian; store the draft as the main response or as a side draft."""
+        target = "social_draft" if as_social_draft else "main_response"
+        scribe_response = self.scribe.process(message, session)
+        
+        if scribe_response:
+            if not as_social_draft:
+                responses["agent_used"] = "The Scribe"
+            
+            guardian_report = self.guardian.scan_content(scribe_response)
+            responses["guardian_report"] = guardian_report
+            
+            if guardian_report.blocked:
+                scribe_response += _format_guardian_alert(guardian_report)
+            responses[target] = scribe_response
+        elif not as_social_draft:
+            responses["main_response"] = "I'm here to help you craft professional content. Share your thoughts and I'll transform them into shareable stories."
+            responses["agent_used"] = "The Scribe"
+    
+    def _find_peer_matches(
+        self,
+        message: str,
+        session: ConversationSession,
+        intent: Optional[str],
+        message_lower: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Find peer matches to show alongside the main response in auto mode."""
+        logger.info("Auto mode: Running Semantic Matchmaker for emotional struggle")
+        match_result = self.matchmaker.process(message, session, force=False, message_lower=message_lower)
+        if not isinstance(match_result, dict):
+            match_result = {"text": match_result, "matches": []}
+        
+        self._capture_user_struggle(message, session, intent, message_lower)
+        return match_result
+    
     def process_message(
         self,
         message: str,
@@ -114,259 +318,134 @@ class AgentOrchestrator:
         agent_mode: str = "auto",
         force_matchmaker: bool = False
     ) -> Dict[str, Any]:
-        responses = {
-            "main_response": "",
-            "peer_matches": "",
-            "social_draft": "",
-            "guardian_report": None,
-            "agent_metadata": {},
-            "agent_used": ""
-        }
+        # agent_metadata is mutated in place by the handlers, so give each call its own
+        responses = dict(RESPONSE_TEMPLATE, agent_metadata={})
         
-        try:
-            intent = None
-            if agent_mode == "auto":
-                intent_result = self.intent_classifier.classify(message)
-                intent = intent_result["intent"]
-                agent_mode = self.intent_classifier.get_agent_mode(intent)
-                logger.info(f"Detected intent: {intent}, routing to: {agent_mode}")
-            
+        # Lowercased once and shared by every keyword check below
+        message_lower = message.lower()
+        
+        if agent_mode != "auto":
+            handler = self._mode_handlers.get(agent_mode)
+            if handler:
+                try:
+                    handler(message, session, responses)
+                except Exception as e:
+                    self._report_agent_error(e, responses)
+                    return responses
             if agent_mode == "vent":
-                agent_output = self.vent_validator.process(message, session)
-                
-                if hasattr(agent_output, 'analysis') and hasattr(agent_output, 'response_text'):
-                    responses["main_response"] = agent_output.response_text
-                    responses["agent_metadata"] = agent_output.analysis.model_dump() if hasattr(agent_output.analysis, 'model_dump') else agent_output.analysis.dict()
-                    responses["agent_used"] = "Vent Validator"
-                else:
-                    responses["main_response"] = str(agent_output)
-                    responses["agent_used"] = "Vent Validator"
-                
-                self._capture_user_struggle(message, session, "emotional")
-            elif agent_mode == "matchmaker":
-                if self.matchmaker:
-                    logger.info("Matchmaker mode: Running Semantic Matchmaker")
-                    match_result = self.matchmaker.process(message, session, force=True)
-                    
-                    if isinstance(match_result, dict):
-                        peer_matches = match_result.get("text", "")
-                        matches_data = match_result.get("matches", [])
-                    else:
-                        peer_matches = match_result
-                        matches_data = []
-                        
-                    if peer_matches:
-                        responses["main_response"] = peer_matches
-                        responses["agent_used"] = "Semantic Matchmaker"
-                        if matches_data:
-                            responses["agent_metadata"]["matches"] = matches_data
-                    else:
-                        responses["main_response"] = "I couldn't find any matching peers for your message. Try rephrasing or sharing more details about your research journey."
-                        responses["agent_used"] = "Semantic Matchmaker"
-                    
-                    self._capture_user_struggle(message, session, "emotional")
-                else:
-                    responses["main_response"] = "Matchmaker service is not available."
-                    responses["agent_used"] = "Semantic Matchmaker"
-            elif agent_mode == "pi":
-                raw_response = self.pi_simulator.process(message, session)
-                parsed = self._parse_agent_response(raw_response)
-                responses["main_response"] = parsed["clean_response"]
-                responses["agent_metadata"] = parsed["metadata"]
-                responses["agent_used"] = "PI Simulator"
-            elif agent_mode == "scribe":
-                scribe_response = self.scribe.process(message, session)
-                if scribe_response:
-                    responses["main_response"] = scribe_response
-                    responses["agent_used"] = "The Scribe"
-                    
-                    guardian_report = self.guardian.scan_content(scribe_response)
-                    responses["guardian_report"] = guardian_report
-                    
-                    if guardian_report.blocked:
-                        responses["main_response"] = (
-                            scribe_response +
-                            f"\n\n⚠️ **Guardian Alert:** {guardian_report.risk_level} risk detected. "
-                            f"Concerns: {', '.join(guardian_report.concerns)}"
-                        )
-                else:
-                    responses["main_response"] = "I'm here to help you craft professional content. Share your thoughts and I'll transform them into shareable stories."
-                    responses["agent_used"] = "The Scribe"
-            else:
-                if agent_mode == "auto":
-                    if intent:
-                        if intent == "emotional":
-                            agent_output = self.vent_validator.process(message, session)
-                            if hasattr(agent_output, 'analysis'):
-                                responses["main_response"] = agent_output.response_text
-                                responses["agent_metadata"] = agent_output.analysis.model_dump()
-                                responses["agent_used"] = "Vent Validator"
-                            else:
-                                responses["main_response"] = str(agent_output)
-                                responses["agent_used"] = "Vent Validator"
-                        elif intent in ["technical", "grant"]:
-                            raw_response = self.pi_simulator.process(message, session)
-                            parsed = self._parse_agent_response(raw_response)
-                            responses["main_response"] = parsed["clean_response"]
-                            responses["agent_metadata"] = parsed["metadata"]
-                            responses["agent_used"] = "PI Simulator"
-                        elif intent == "shareable":
-                            scribe_response = self.scribe.process(message, session)
-                            if scribe_response:
-                                responses["main_response"] = scribe_response
-                                responses["agent_used"] = "The Scribe"
-                                
-                                guardian_report = self.guardian.scan_content(scribe_response)
-                                responses["guardian_report"] = guardian_report
-                                
-                                if guardian_report.blocked:
-                                    responses["main_response"] = (
-                                        scribe_response +
-                                        f"\n\n⚠️ **Guardian Alert:** {guardian_report.risk_level} risk detected. "
-                                        f"Concerns: {', '.join(guardian_report.concerns)}"
-                                    )
-                            else:
-                                responses["main_response"] = "I'm here to help you craft professional content. Share your thoughts and I'll transform them into shareable stories."
-                                responses["agent_used"] = "The Scribe"
-                        else:
-                            agent_output = self.vent_validator.process(message, session)
-                            if hasattr(agent_output, 'analysis'):
-                                responses["main_response"] = agent_output.response_text
-                                responses["agent_metadata"] = agent_output.analysis.model_dump()
-                                responses["agent_used"] = "Vent Validator"
-                            else:
-                                responses["main_response"] = str(agent_output)
-                                responses["agent_used"] = "Vent Validator"
-                    else:
-                        agent_output = self.vent_validator.process(message, session)
-                        if hasattr(agent_output, 'analysis'):
-                            responses["main_response"] = agent_output.response_text
-                            responses["agent_metadata"] = agent_output.analysis.model_dump()
-                            responses["agent_used"] = "Vent Validator"
-                        else:
-                            responses["main_response"] = str(agent_output)
-                            responses["agent_used"] = "Vent Validator"
-                
-                if self.matchmaker and agent_mode == "auto":
-                    is_emotional = False
-                    if intent:
-                        is_emotional = (intent == "emotional")
-                    if not is_emotional:
-                        is_emotional = self.matchmaker.is_emotional_struggle(message)
-                    
-                    if is_emotional:
-                        logger.info("Auto mode: Running Semantic Matchmaker for emotional struggle")
-                        match_result = self.matchmaker.process(message, session, force=False)
-                        
-                        # Handle dictionary return format
-                        if isinstance(match_result, dict):
-                            peer_matches_text = match_result.get("text", "")
-                            matches_data = match_result.get("matches", [])
-                        else:
-                            peer_matches_text = match_result
-                            matches_data = []
-                        
-                        if peer_matches_text:
-                            responses["peer_matches"] = peer_matches_text
-                            if matches_data:
-                                if "matches" not in responses["agent_metadata"]:
-                                    responses["agent_metadata"]["matches"] = []
-                                responses["agent_metadata"]["matches"].extend(matches_data)
-                            logger.info("Semantic Matchmaker found peer matches")
-                        
-                        self._capture_user_struggle(message, session, intent)
-                
-                if agent_mode == "auto" and intent != "shareable":
-                    scribe_response = self.scribe.process(message, session)
-                    if scribe_response:
-                        responses["social_draft"] = scribe_response
-                        
-                        guardian_report = self.guardian.scan_content(scribe_response)
-                        responses["guardian_report"] = guardian_report
-                        
-                        if guardian_report.blocked:
-                            responses["social_draft"] = (
-                                scribe_response +
-                                f"\n\n⚠️ **Guardian Alert:** {guardian_report.risk_level} risk detected. "
-                                f"Concerns: {', '.join(guardian_report.concerns)}"
-                            )
-            
+                self._capture_user_struggle(message, session, "emotional", message_lower)
             return responses
-            
+        
+        intent_result = self._classify_for_session(message, session, message_lower)
+        intent = intent_result["intent"]
+        routed_mode = self.intent_classifier.get_agent_mode(intent)
+        logger.info("Detected intent: {}, routing to: {}", intent, routed_mode)
+        
+        # Follow-up agents are independent of the primary one, so start
+        # them first and collect their results once it has responded
+        match_future = None
+        if self.matchmaker:
+            # A grant or technical message can still be a struggle
+            # ("so stressed about my proposal"), so check the keywords too
+            is_emotional = (
+                intent_result.get("is_emotional")
+                or self.matchmaker.is_emotional_struggle(message, message_lower)
+            )
+            if is_emotional:
+                match_future = self._executor.submit(
+                    self._find_peer_matches, message, session, intent, message_lower
+                )
+        
+        # Offer a social draft unless the Scribe already writes the main response
+        draft_future = None
+        draft_responses = {}
+        if routed_mode != "scribe":
+            draft_future = self._executor.submit(
+                self._run_scribe, message, session, draft_responses, True
+            )
+        
+        try:
+            self._mode_handlers[routed_mode](message, session, responses)
+            match_result = match_future.result() if match_future else None
+            if draft_future:
+                draft_future.result()
         except Exception as e:
-            logger.error(f"Error in orchestrator: {str(e)}")
-            import traceback
-            error_trace = traceback.format_exc()
-            logger.error(f"Full traceback:\n{error_trace}")
-            
-            # Check if it's a Gemini API key issue
-            error_str = str(e).lower()
-            if "api key" in error_str or "authentication" in error_str or "gemini" in error_str:
-                logger.error("⚠️ GEMINI API KEY ISSUE DETECTED - Check Cloud Run secret configuration")
-                responses["main_response"] = "I'm experiencing a configuration issue. Please check the backend logs for details."
-            else:
-                responses["main_response"] = f"I encountered an error: {str(e)[:200]}. Please check the backend logs."
+            self._report_agent_error(e, responses)
             return responses
+        
+        if match_result and match_result.get("text"):
+            responses["peer_matches"] = match_result["text"]
+            if match_result.get("matches"):
+                responses["agent_metadata"].setdefault("matches", []).extend(match_result["matches"])
+            logger.info("Semantic Matchmaker found peer matches")
+        responses.update(draft_responses)
+        
+        return responses
+    
+    def _classify_for_session(
+        self,
+        message: str,
+        session: ConversationSession,
+        message_lower: str
+    ) -> Dict[str, Any]:
+        """Classify a message, reusing the result for a repeat within the same session."""
+        cache = session.context.get("_intent_cache")
+        if cache is None:
+            cache = session.context["_intent_cache"] = OrderedDict()
+        
+        intent_result = cache.get(message_lower)
+        if intent_result is not None:
+            cache.move_to_end(message_lower)
+            return intent_result
+        
+        intent_result = self.intent_classifier.classify(message, message_lower)
+        # Low confidence means classification failed; try again next time
+        if intent_result["confidence"] != "low":
+            cache[message_lower] = intent_result
+            if len(cache) > self.SESSION_INTENT_CACHE_SIZE:
+                cache.popitem(last=False)
+        return intent_result
+    
+    def _report_agent_error(self, error: Exception, responses: Dict[str, Any]):
+        """Log a failed agent call and replace the main response with an error message."""
+        logger.exception(f"Error in orchestrator: {str(error)}")
+        
+        # Check if it's a Gemini API key issue
+        if API_ERROR_PATTERN.search(str(error)):
+            logger.error("⚠️ GEMINI API KEY ISSUE DETECTED - Check Cloud Run secret configuration")
+            responses["main_response"] = "I'm experiencing a configuration issue. Please check the backend logs for details."
+        else:
+            responses["main_response"] = f"I encountered an error: {str(error)[:200]}. Please check the backend logs."
     
     def get_session_summary(self, session: ConversationSession) -> Dict[str, Any]:
         return {
             "session_id": session.session_id,
             "message_count": len(session.messages),
             "created_at": session.created_at.isoformat(),
-            "agents_used": list(set([
-                msg.agent for msg in session.messages if msg.agent
-            ]))
+            "agents_used": list(session.agents_used)
         }
     
-    def _extract_struggle_metadata(self, message: str, session: ConversationSession) -> Dict[str, Any]:
+    def _extract_struggle_metadata(
+        self,
+        message: str,
+        session: ConversationSession,
+        message_lower: Optional[str] = None
+    ) -> Dict[str, Any]:
         metadata = {
             "academic_stage": None,
             "research_area": None,
             "emotional_tags": []
         }
         
-        emotional_keywords = {
-            "frustrated": "frustration",
-            "anxious": "anxiety",
-            "worried": "anxiety",
-            "stressed": "stress",
-            "imposter": "imposter_syndrome",
-            "alone": "isolation",
-            "isolated": "isolation",
-            "rejected": "rejection",
-            "disappointed": "disappointment",
-            "overwhelmed": "overwhelm",
-            "burnout": "burnout",
-            "toxic": "toxic_environment",
-            "failed": "failure",
-            "struggling": "struggle"
-        }
-        
-        message_lower = message.lower()
-        for keyword, tag in emotional_keywords.items():
-            if keyword in message_lower and tag not in metadata["emotional_tags"]:
-                metadata["emotional_tags"].append(tag)
+        if message_lower is None:
+            message_lower = message.lower()
         
-        stage_keywords = {
-            "1st year": "1st year PhD",
-            "first year": "1st year PhD",
-            "2nd year": "2nd year PhD",
-            "second year": "2nd year PhD",
-            "3rd year": "3rd year PhD",
-            "third year": "3rd year PhD",
-            "4th year": "4th year PhD",
-            "fourth year": "4th year PhD",
-            "5th year": "5th year PhD",
-            "fifth year": "5th year PhD",
-            "postdoc": "Postdoc",
-            "post-doc": "Postdoc",
-            "post doc": "Postdoc"
-        }
-        
-        for keyword, stage in stage_keywords.items():
-            if keyword in message_lower:
-                metadata["academic_stage"] = stage
-                break
+        for category, value in STRUGGLE_KEYWORD_MATCHER.find(message_lower):
+            if category == "emotional_tag":
+                if value not in metadata["emotional_tags"]:
+                    metadata["emotional_tags"].append(value)
+            elif metadata["academic_stage"] is None:
+                metadata["academic_stage"] = value
         
         if session.context and "research_area" in session.context:
             metadata["research_area"] = session.context.get("research_area")
@@ -377,26 +456,61 @@ class AgentOrchestrator:
         self,
         message: str,
         session: ConversationSession,
-        intent: Optional[str] = None
+        intent: Optional[str] = None,
+        message_lower: Optional[str] = None
     ):
         if not settings.enable_real_user_data or not self.vector_store:
             return
         
-        if intent != "emotional" and not self.matchmaker.is_emotional_struggle(message):
+        if message_lower is None:
+            message_lower = message.lower()
+        if intent != "emotional" and not self.matchmaker.is_emotional_struggle(message, message_lower):
             return
         
         try:
-            metadata = self._extract_struggle_metadata(message, session)
-            
-            profile_id = self.vector_store.add_peer_profile_from_session(
-                struggle_text=message,
-                user_id=session.user_id,
-                academic_stage=metadata["academic_stage"],
-                research_area=metadata["research_area"],
-                emotional_tags=metadata["emotional_tags"]
-            )
+            metadata = self._extract_struggle_metadata(message, session, message_lower)
             
-            if profile_id:
-                logger.info(f"Captured user struggle: {profile_id}")
+            self._capture_queue.put({
+                "struggle_text": message,
+                "user_id": session.user_id,
+                "academic_stage": metadata["academic_stage"],
+                "research_area": metadata["research_area"],
+                "emotional_tags": metadata["emotional_tags"]
+            })
         except Exception as e:
             logger.error(f"Error capturing user struggle: {str(e)}")
+    
+    def _capture_worker(self):
+        """Drain queued struggle captures into the vector store in batches."""
+        while True:
+            item = self._capture_queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stopping = False
+            while len(batch) < self.CAPTURE_BATCH_SIZE:
+                try:
+                    item = self._capture_queue.get(timeout=self.CAPTURE_BATCH_WAIT)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            try:
+                for profile_id in self.vector_store.add_peer_profiles_from_sessions(batch):
+                    logger.info("Captured user struggle: {}", profile_id)
+            except Exception as e:
+                logger.error(f"Error capturing user struggles: {str(e)}")
+            
+            if stopping:
+                return
+    
+    def shutdown(self, timeout: float = 10.0):
+        """Flush pending struggle captures and stop background workers."""
+        if self._capture_thread and self._capture_thread.is_alive():
+            self._capture_queue.put(None)
+            self._capture_thread.join(timeout=timeout)
+        self._executor.shutdown(wait=False)
@@ -1,23 +1,24 @@
 """Intent classifier to determine message type and appropriate agent."""
 
-from typing import Dict, Literal
+import threading
+from typing import Dict, List, Literal, Optional
+import numpy as np
 from loguru import logger
 
 from services.gemini_service import gemini_service
+from services.embedding_service import get_embedding_service
+from orchestration.keyword_matcher import KeywordMatcher
+from config.settings import settings
 
 
 class IntentClassifier:
     """Classifies user messages to determine appropriate agent routing."""
     
-    INTENT_PROMPT = """Analyze this message and classify its intent. Consider:
-1. Is this an emotional struggle or venting?
-2. Is this a technical/academic discussion?
-3. Is this a positive achievement or something to share?
-4. Is this asking for grant/research feedback?
+    INTENT_PROMPT = """Classify the intent of this message.
 
 Message: "{message}"
 
-Respond with ONLY one of these labels:
+Labels:
 - "emotional": User is venting, struggling, or needs emotional support
 - "technical": Technical discussion, asking questions, sharing knowledge
 - "positive": Positive achievements, acceptance news, milestones (route to Scribe)
@@ -26,71 +27,184 @@ Respond with ONLY one of these labels:
 
 Label:"""
 
-    def classify(self, message: str) -> Dict[str, any]:
+    # The model is constrained to answer with exactly one of these
+    INTENT_LABELS = ("emotional", "technical", "positive", "grant", "shareable")
+    LABEL_SCHEMA = {"type": "STRING", "enum": list(INTENT_LABELS)}
+
+    # Keyword rules, checked in priority order before any model call
+    GRANT_KEYWORDS = ("grant proposal", "grant", "proposal", "research plan", "feedback on", "review my", "critique", "mentorship", "mentor")
+    SCRIBE_KEYWORDS = ("post", "draft", "help me draft", "create a post", "write a post", "shareable", "public", "linkedin", "social media", "announce", "acceptance", "published", "share my", "share the", "news")
+    TECHNICAL_KEYWORDS = ("semantic", "search", "debug", "agentic", "system", "code", "implementation", "algorithm", "method", "technique")
+    POSITIVE_KEYWORDS = ("swim", "talked", "discussed", "learned", "excited", "happy", "great", "good")
+    EMOTIONAL_KEYWORDS = ("struggling", "failed", "frustrated", "anxious", "worried", "stressed", "difficult", "hard")
+    KEYWORD_MATCHER = KeywordMatcher(
+        [(kw, "grant", "grant") for kw in GRANT_KEYWORDS]
+        + [(kw, "shareable", "shareable") for kw in SCRIBE_KEYWORDS]
+        + [(kw, "technical", "technical") for kw in TECHNICAL_KEYWORDS]
+        + [(kw, "positive", "positive") for kw in POSITIVE_KEYWORDS]
+        + [(kw, "emotional", "emotional") for kw in EMOTIONAL_KEYWORDS]
+    )
+
+    AGENT_MODES = {
+        "emotional": "vent",
+        "technical": "pi",        # Route technical to PI Simulator
+        "positive": "scribe",     # Route positive achievements to Scribe
+        "grant": "pi",
+        "shareable": "scribe"
+    }
+
+    def __init__(self):
+        # Semantic cache of LLM labels: L2-normalized message embeddings stored
+        # as rows of a float32 matrix that grows geometrically up to
+        # settings.intent_cache_size, then overwrites the oldest row.
+        self._cache_matrix: Optional[np.ndarray] = None
+        self._cache_labels: List[str] = []
+        self._cache_next = 0
+        # One classifier serves every request thread
+        self._cache_lock = threading.Lock()
+    
+    def _embed_for_cache(self, message: str) -> Optional[np.ndarray]:
+        """Embed a message for cache lookup; None if the cache is off or embedding fails."""
+        if settings.intent_cache_size <= 0:
+            return None
+        try:
+            vector = np.asarray(get_embedding_service().generate_embedding(message), dtype=np.float32)
+        except Exception as e:
+            logger.debug(f"Skipping intent cache, embedding failed: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+    
+    def _lookup_cached_label(self, embedding: Optional[np.ndarray]) -> Optional[str]:
+        """Return the label of the most similar cached message above the threshold."""
+        if embedding is None:
+            return None
+        with self._cache_lock:
+            if not self._cache_labels:
+                return None
+            similarities = self._cache_matrix[:len(self._cache_labels)] @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= settings.intent_cache_threshold:
+                return self._cache_labels[best]
+            return None
+    
+    def _cache_label(self, embedding: Optional[np.ndarray], label: str):
+        """Store a classified label, evicting the oldest entry once full."""
+        if embedding is None:
+            return
+        capacity = settings.intent_cache_size
+        with self._cache_lock:
+            if self._cache_matrix is None:
+                self._cache_matrix = np.empty((min(64, capacity), embedding.shape[0]), dtype=np.float32)
+            
+            count = len(self._cache_labels)
+            if count < capacity:
+                if count == self._cache_matrix.shape[0]:
+                    grown = np.empty((min(count * 2, capacity), embedding.shape[0]), dtype=np.float32)
+                    grown[:count] = self._cache_matrix
+                    self._cache_matrix = grown
+                self._cache_matrix[count] = embedding
+                self._cache_labels.append(label)
+            else:
+                self._cache_matrix[self._cache_next] = embedding
+                self._cache_labels[self._cache_next] = label
+                self._cache_next = (self._cache_next + 1) % capacity
+    
+    def _classify_by_keywords(self, message_lower: str) -> Optional[str]:
+        """Return the label of the first keyword rule that fires, or None if the message is ambiguous."""
+        matched = {category for category, _ in self.KEYWORD_MATCHER.find(message_lower)}
+        
+        if "grant" in matched:
+            return "grant"
+        if "shareable" in matched:
+            return "shareable"
+        if "emotional" not in matched:
+            if "technical" in matched:
+                return "technical"
+            if "positive" in matched:
+                return "positive"
+        return None
+
+    def _parse_label(self, response_lower: str) -> str:
+        """Pick a label out of a free-form model response."""
+        if "technical" in response_lower:
+            return "technical"
+        if "positive" in response_lower or "neutral" in response_lower:
+            return "positive"
+        if "grant" in response_lower or "proposal" in response_lower:
+            return "grant"
+        if "shareable" in response_lower:
+            return "shareable"
+        return "emotional"  # Default fallback
+
+    def classify(self, message: str, message_lower: Optional[str] = None) -> Dict[str, any]:
         """
         Classify message intent.
         
         Args:
             message: User message
+            message_lower: Precomputed message.lower(), if the caller has it
             
         Returns:
-            Dictionary with intent label and confidence
+            Dictionary with intent label, confidence and is_emotional flag
         """
-        try:
-            prompt = self.INTENT_PROMPT.format(message=message)
-            
-            response = gemini_service.generate_text(
-                prompt=prompt,
-                model_type="flash",
-                temperature=0.3  # Lower temperature for more consistent classification
-            )
-            
-            # Extract label (simple parsing)
-            label = "emotional"  # Default fallback
-            response_lower = response.lower().strip()
-            
-            if "technical" in response_lower:
-                label = "technical"
-            elif "positive" in response_lower or "neutral" in response_lower:
-                label = "positive"
-            elif "grant" in response_lower or "proposal" in response_lower:
-                label = "grant"
-            elif "shareable" in response_lower:
-                label = "shareable"
-            elif "emotional" in response_lower or "struggle" in response_lower or "vent" in response_lower:
-                label = "emotional"
-            
-            # Also check keywords as fallback (prioritize in order)
+        # Explicit keyword rules take priority over the model, so skip it when one fires
+        if message_lower is None:
             message_lower = message.lower()
-            grant_keywords = ["grant proposal", "grant", "proposal", "research plan", "feedback on", "review my", "critique", "mentorship", "mentor"]
-            scribe_keywords = ["post", "draft", "help me draft", "create a post", "write a post", "shareable", "public", "linkedin", "social media", "announce", "acceptance", "published", "share my", "share the", "news"]
-            technical_keywords = ["semantic", "search", "debug", "agentic", "system", "code", "implementation", "algorithm", "method", "technique"]
-            positive_keywords = ["swim", "talked", "discussed", "learned", "excited", "happy", "great", "good"]
-            emotional_keywords = ["struggling", "failed", "frustrated", "anxious", "worried", "stressed", "difficult", "hard"]
+        keyword_label = self._classify_by_keywords(message_lower)
+        if keyword_label:
+            return {
+                "intent": keyword_label,
+                "confidence": "keyword",
+                "raw_response": "",
+                "is_emotional": keyword_label == "emotional"
+            }
+        
+        try:
+            # Reuse the LLM label of a semantically similar earlier message
+            embedding = self._embed_for_cache(message)
+            cached_label = self._lookup_cached_label(embedding)
             
-            # Check for explicit requests in priority order (highest to lowest)
-            if any(kw in message_lower for kw in grant_keywords):
-                label = "grant"
-            elif any(kw in message_lower for kw in scribe_keywords):
-                label = "shareable"
-            elif any(kw in message_lower for kw in technical_keywords) and not any(kw in message_lower for kw in emotional_keywords):
-                label = "technical"
-            elif any(kw in message_lower for kw in positive_keywords) and not any(kw in message_lower for kw in emotional_keywords):
-                label = "positive"
+            if cached_label:
+                label = cached_label
+                confidence = "cached"
+                response = ""
+            else:
+                prompt = self.INTENT_PROMPT.format(message=message)
+                
+                response = gemini_service.generate_text(
+                    prompt=prompt,
+                    model_type="flash",
+                    temperature=0.3,  # Lower temperature for more consistent classification
+                    # The enum already limits the answer to one label. No
+                    # max_output_tokens: on a thinking model the cap also
+                    # counts thought tokens and can leave the answer empty
+                    thinking_budget=0,
+                    response_mime_type="text/x.enum",
+                    response_schema=self.LABEL_SCHEMA
+                )
+                
+                confidence = "high"
+                label = response.strip().strip('"').lower()
+                if label not in self.INTENT_LABELS:
+                    # Not every backend honours the enum constraint
+                    label = self._parse_label(label)
+                
+                self._cache_label(embedding, label)
             
             return {
                 "intent": label,
-                "confidence": "high",
-                "raw_response": response
+                "confidence": confidence,
+                "raw_response": response,
+                "is_emotional": label == "emotional"
             }
             
         except Exception as e:
             logger.error(f"Error classifying intent: {str(e)}")
             # Fallback: check for obvious emotional keywords
-            message_lower = message.lower()
             if any(kw in message_lower for kw in ["struggling", "failed", "frustrated", "anxious", "worried"]):
-                return {"intent": "emotional", "confidence": "low", "raw_response": ""}
-            return {"intent": "technical", "confidence": "low", "raw_response": ""}
+                return {"intent": "emotional", "confidence": "low", "raw_response": "", "is_emotional": True}
+            return {"intent": "technical", "confidence": "low", "raw_response": "", "is_emotional": False}
     
     def should_match_peers(self, intent: str) -> bool:
         """
@@ -115,12 +229,5 @@ Label:"""
         Returns:
             Agent mode string
         """
-        mapping = {
-            "emotional": "vent",
-            "technical": "pi",        # Route technical to PI Simulator
-            "positive": "scribe",     # Route positive achievements to Scribe
-            "grant": "pi",
-            "shareable": "scribe"
-        }
-        return mapping.get(intent, "vent")  # Default to vent if unknown
+        return self.AGENT_MODES.get(intent, "vent")  # Default to vent if unknown
 
@@ -0,0 +1,61 @@
+"""Multi-pattern keyword matching for message routing."""
+
+from typing import Iterable, List, Tuple
+from loguru import logger
+
+# Aho-Corasick finds every keyword in one pass over the text
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+    logger.debug("pyahocorasick not installed; using per-keyword substring scans")
+
+
+class KeywordMatcher:
+    """Finds which of a fixed set of keywords occur in a text."""
+
+    def __init__(self, keywords: Iterable[Tuple[str, str, str]]):
+        """
+        Build the matcher.
+
+        Args:
+            keywords: (keyword, category, value) triples; keywords must be lowercase
+        """
+        self.keywords = tuple(keywords)
+        self._automaton = None
+
+        if HAS_AHOCORASICK:
+            # A keyword may appear in several categories, so each entry holds
+            # every (index, category, value) registered for it.
+            entries = {}
+            for index, (keyword, category, value) in enumerate(self.keywords):
+                entries.setdefault(keyword, []).append((index, category, value))
+
+            self._automaton = ahocorasick.Automaton()
+            for keyword, keyword_entries in entries.items():
+                self._automaton.add_word(keyword, tuple(keyword_entries))
+            self._automaton.make_automaton()
+
+    def find(self, text_lower: str) -> List[Tuple[str, str]]:
+        """
+        Find keyword hits in a lowercased text.
+
+        Args:
+            text_lower: Lowercased text to scan
+
+        Returns:
+            (category, value) for each keyword present, in keyword declaration order
+        """
+        if self._automaton is None:
+            return [
+                (category, value)
+                for keyword, category, value in self.keywords
+                if keyword in text_lower
+            ]
+
+        hits = {}
+        for _, keyword_entries in self._automaton.iter(text_lower):
+            for index, category, value in keyword_entries:
+                hits[index] = (category, value)
+        return [hits[index] for index in sorted(hits)]
@@ -3,13 +3,15 @@
 Generate TypeScript/Python types from OpenAPI contract.
 
 Usage:
-    python scripts/generate-types.py [--lang typescript|python]
+    python scripts/generate-types.py [--lang typescript|python|all] [--force]
 """
 
 import argparse
+import hashlib
 import json
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # OpenAPI Generator configuration
@@ -26,6 +28,24 @@ OPENAPI_GENERATOR_CONFIG = {
     }
 }
 
+# Written to the output directory after a successful run
+HASH_FILE = ".codegen-hash"
+
+
+def spec_hash(lang: str, openapi_spec: Path) -> str:
+    """Hash the spec together with the generator settings that shape the output."""
+    config = OPENAPI_GENERATOR_CONFIG[lang]
+    digest = hashlib.sha256(openapi_spec.read_bytes())
+    digest.update(config["generator"].encode())
+    digest.update(config["additional_properties"].encode())
+    return digest.hexdigest()
+
+
+def is_up_to_date(output_dir: Path, current_hash: str) -> bool:
+    """Check whether the output was generated from the current spec and config."""
+    hash_path = output_dir / HASH_FILE
+    return hash_path.exists() and hash_path.read_text().strip() == current_hash
+
 
 def check_openapi_generator():
     """Check if openapi-generator is installed."""
@@ -79,15 +99,38 @@ def generate_types(lang: str, openapi_spec: Path, output_dir: Path):
         return False
 
 
+def build_language(lang: str, openapi_spec: Path) -> bool:
+    """Generate one language's types and record the spec hash on success."""
+    output_dir = Path(f"src/gen/types/{lang}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if not generate_types(lang, openapi_spec, output_dir):
+        return False
+    (output_dir / HASH_FILE).write_text(spec_hash(lang, openapi_spec))
+    return True
+
+
+def print_next_steps(lang: str):
+    output_dir = Path(f"src/gen/types/{lang}")
+    print(f"\n✓ Success! Types generated in {output_dir}")
+    print(f"\nNext steps:")
+    print(f"  1. Review generated types in {output_dir}")
+    print(f"  2. Import types in your code:")
+    if lang == "typescript":
+        print(f"     import {{ SessionResponse }} from '@/gen/types/typescript'")
+    else:
+        print(f"     from research_in_public_api import SessionResponse")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate types from OpenAPI contract"
     )
     parser.add_argument(
         "--lang",
-        choices=["typescript", "python"],
+        choices=["typescript", "python", "all"],
         default="typescript",
-        help="Language for generated types (default: typescript)"
+        help="Language for generated types, or all of them (default: typescript)"
     )
     parser.add_argument(
         "--openapi",
@@ -95,6 +138,11 @@ def main():
         default=Path("contract/openapi.yaml"),
         help="Path to OpenAPI spec (default: contract/openapi.yaml)"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate even if the spec is unchanged since the last run"
+    )
     
     args = parser.parse_args()
     
@@ -103,6 +151,18 @@ def main():
         print(f"Error: OpenAPI spec not found: {args.openapi}")
         sys.exit(1)
     
+    # Skip the generator (and its JVM startup) for languages whose spec hasn't changed
+    langs = list(OPENAPI_GENERATOR_CONFIG) if args.lang == "all" else [args.lang]
+    pending = []
+    for lang in langs:
+        output_dir = Path(f"src/gen/types/{lang}")
+        if not args.force and is_up_to_date(output_dir, spec_hash(lang, args.openapi)):
+            print(f"✓ {lang} types are up to date (spec unchanged), skipping")
+        else:
+            pending.append(lang)
+    if not pending:
+        sys.exit(0)
+    
     # Check if openapi-generator is installed
     if not check_openapi_generator():
         print("openapi-generator not found. Attempting to install...")
@@ -111,23 +171,17 @@ def main():
             print("  npm install -g @openapitools/openapi-generator-cli")
             sys.exit(1)
     
-    # Create output directory
-    output_dir = Path(f"src/gen/types/{args.lang}")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Generate types
-    if generate_types(args.lang, args.openapi, output_dir):
-        print(f"\n✓ Success! Types generated in {output_dir}")
-        print(f"\nNext steps:")
-        print(f"  1. Review generated types in {output_dir}")
-        print(f"  2. Import types in your code:")
-        if args.lang == "typescript":
-            print(f"     import {{ SessionResponse }} from '@/gen/types/typescript'")
-        else:
-            print(f"     from research_in_public_api import SessionResponse")
-        sys.exit(0)
+    # Generate types, running each language's generator (and JVM) in parallel
+    if len(pending) == 1:
+        results = [build_language(pending[0], args.openapi)]
     else:
-        sys.exit(1)
+        with ProcessPoolExecutor(max_workers=len(pending)) as executor:
+            results = list(executor.map(build_language, pending, [args.openapi] * len(pending)))
+    
+    for lang, ok in zip(pending, results):
+        if ok:
+            print_next_steps(lang)
+    sys.exit(0 if all(results) else 1)
 
 
 if __name__ == "__main__":
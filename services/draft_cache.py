@@ -0,0 +1,65 @@
+"""SQLite-backed cache of social media drafts."""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+class DraftDiskCache:
+    """
+    Draft cache that survives restarts and is shared by worker processes on one host.
+
+    WAL mode lets readers proceed while another process writes. SQLite
+    errors are logged and treated as misses, so a broken cache file never
+    fails a draft.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds a draft stays valid
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Autocommit: every put is a single statement
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS drafts (key TEXT PRIMARY KEY, content TEXT, hashtags TEXT, ts INTEGER)"
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"content", "hashtags"} for key, or None on a miss or expired entry."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT content, hashtags FROM drafts WHERE key = ? AND ts > ?",
+                    (key, int(time.time() - self.ttl))
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Draft disk cache get failed: {e}")
+            return None
+        if row is None:
+            return None
+        return {"content": row[0], "hashtags": json.loads(row[1])}
+
+    def put(self, key: str, content: str, hashtags: List[str]):
+        """Store a draft, replacing any earlier one for key."""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO drafts (key, content, hashtags, ts) VALUES (?, ?, ?, ?)",
+                    (key, content, json.dumps(hashtags), int(time.time()))
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"Draft disk cache put failed: {e}")
@@ -1,69 +1,379 @@
 """Embedding service using text-embedding-004."""
 
+import asyncio
+import hashlib
+import importlib.util
+import math
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 import google.generativeai as genai
-from typing import List, Union
+from google.api_core import exceptions as google_exceptions
+from typing import List, Optional, Tuple, Union
 import numpy as np
 from loguru import logger
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+# SimSIMD provides hand-tuned SIMD kernels for vector distances
+try:
+    import simsimd
+    HAS_SIMSIMD = True
+except ImportError:
+    HAS_SIMSIMD = False
+    logger.debug("simsimd not installed; using NumPy for cosine similarity")
+
+# Numba compiles a fixed-size normalization loop for freshly embedded vectors.
+# Importing and compiling it takes a while, so both happen on first use.
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+if not HAS_NUMBA:
+    logger.debug("numba not installed; using NumPy for L2 normalization")
 
 from config.settings import settings
 
+# Output dimension of text-embedding-004
+EMBEDDING_DIM = 768
+
+# Stored texts and search queries are embedded with matching task types
+DOCUMENT_TASK = "RETRIEVAL_DOCUMENT"
+QUERY_TASK = "RETRIEVAL_QUERY"
+
+
+def _l2_normalize_loop(v):
+    """Scale a 768-d vector to unit length in place (compiled with Numba)."""
+    s = 0.0
+    for i in range(EMBEDDING_DIM):
+        s += v[i] * v[i]
+    inv = 1.0 / (math.sqrt(s) + 1e-12)
+    for i in range(EMBEDDING_DIM):
+        v[i] *= inv
+    return v
+
+
+_l2_normalize_768 = None
+_numba_lock = threading.Lock()
+
+
+def _compile_l2_normalize(cache: bool):
+    from numba import njit
+    kernel = njit(cache=cache, fastmath=True)(_l2_normalize_loop)
+    # Compile now, so a failure falls back here instead of failing a request
+    kernel(np.ones(EMBEDDING_DIM, dtype=np.float32))
+    return kernel
+
+
+def _get_l2_normalize():
+    """The compiled normalization kernel, built on first call; None if Numba can't be used."""
+    global _l2_normalize_768, HAS_NUMBA
+    if _l2_normalize_768 is not None or not HAS_NUMBA:
+        return _l2_normalize_768
+    with _numba_lock:
+        if _l2_normalize_768 is None and HAS_NUMBA:
+            try:
+                _l2_normalize_768 = _compile_l2_normalize(cache=True)
+            except Exception as e:
+                # e.g. no writable cache directory beside a read-only install
+                logger.debug(f"Numba cache unavailable, compiling without it: {e}")
+                try:
+                    _l2_normalize_768 = _compile_l2_normalize(cache=False)
+                except Exception as e:
+                    logger.warning(f"Numba normalization unavailable, using NumPy: {e}")
+                    HAS_NUMBA = False
+    return _l2_normalize_768
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """True for 429 responses from the Gemini API."""
+    return isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests))
+
+
+_backoff = wait_exponential(multiplier=1, min=1, max=10)
+
+
+def _rate_limit_wait(retry_state) -> float:
+    """Wait as long as the server's Retry-After asks, else back off exponentially."""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return _backoff(retry_state)
+
+
+class EmbeddingDiskCache:
+    """SQLite-backed embedding cache that survives restarts and is shared across processes."""
+    
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, model TEXT, vector BLOB)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def key(text: str, model: str, task_type: str) -> bytes:
+        return hashlib.blake2b(f"{model}\0{task_type}\0{text}".encode(), digest_size=16).digest()
+    
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+    
+    def put(self, key: bytes, model: str, vector: np.ndarray):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                (key, model, np.asarray(vector, dtype=np.float32).tobytes())
+            )
+            self._conn.commit()
+
 
 class EmbeddingService:
     """Service for generating embeddings using Google's text-embedding-004."""
     
     def __init__(self):
         """Initialize embedding service."""
-        # Ensure API key is stripped of whitespace (Cloud Run secrets may have trailing newlines)
-        api_key = settings.gemini_api_key.strip() if settings.gemini_api_key else None
+        # Remove all whitespace in one pass (Cloud Run secrets may have trailing or embedded newlines)
+        api_key = ''.join(settings.gemini_api_key.split()) if settings.gemini_api_key else None
         
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        # Check for common API key issues
-        if '\n' in api_key or '\r' in api_key:
-            logger.warning("⚠️ API key contains newline characters - stripping them")
-            api_key = api_key.replace('\n', '').replace('\r', '').strip()
-        
         genai.configure(api_key=api_key)
+        self._model = settings.embedding_model
+        
+        # Embeddings are a pure function of (text, model, task type), so repeated texts
+        # are served from an in-process LRU, backed by an optional SQLite cache
+        self._disk_cache = None
+        if settings.embedding_cache_path:
+            try:
+                self._disk_cache = EmbeddingDiskCache(settings.embedding_cache_path)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache unavailable: {e}")
+        self._cached_embedding = lru_cache(maxsize=settings.embedding_cache_size)(self._embed_through_disk_cache)
+        # Search queries repeat often; their unit-norm vectors are cached under a
+        # canonical form of the text so case and spacing variants share an entry.
+        # The first variant seen is what gets embedded, since case can matter
+        # (gene names, acronyms).
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        
         logger.info("Embedding service initialized")
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str, task_type: str = DOCUMENT_TASK) -> np.ndarray:
         """
         Generate embedding for a single text.
         
         Args:
             text: Input text to embed
+            task_type: DOCUMENT_TASK for stored texts, QUERY_TASK for search queries
             
         Returns:
-            Embedding vector as list of floats
+            Read-only 1-D float32 embedding vector (shared with the cache; copy to modify)
         """
+        return self._cached_embedding(text, task_type)
+    
+    def embed_document(self, text: str) -> np.ndarray:
+        """Embed a text that will be stored and searched against."""
+        return self.generate_embedding(text, DOCUMENT_TASK)
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a search query to compare against stored documents."""
+        return self.generate_embedding(text, QUERY_TASK)
+    
+    def embed_query_normalized(self, text: str) -> np.ndarray:
+        """
+        Embed a search query as a unit-norm vector, cached by canonical text.
+        
+        Args:
+            text: Query text, embedded as given; cache lookups are case-insensitive
+                with whitespace collapsed
+            
+        Returns:
+            Read-only unit-norm float32 query embedding
+        """
+        key = " ".join(text.split()).lower()
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(key)
+            if embedding is not None:
+                self._query_cache.move_to_end(key)
+                return embedding
+        
+        embedding = self.normalize(self.generate_embedding(text, QUERY_TASK))
+        embedding.flags.writeable = False
+        with self._query_cache_lock:
+            self._query_cache[key] = embedding
+            while len(self._query_cache) > settings.query_embedding_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
+    
+    def clear_caches(self):
+        """Drop in-process cached embeddings, e.g. after switching embedding models."""
+        self._cached_embedding.cache_clear()
+        with self._query_cache_lock:
+            self._query_cache.clear()
+    
+    def _embed_through_disk_cache(self, text: str, task_type: str) -> np.ndarray:
+        """Embed a text via the disk cache, if configured; wrapped by the in-process LRU."""
+        if self._disk_cache is None:
+            embedding = self._embed_uncached(text, task_type)
+        else:
+            key = EmbeddingDiskCache.key(text, self._model, task_type)
+            embedding = self._disk_cache.get(key)
+            if embedding is None:
+                embedding = self._embed_uncached(text, task_type)
+                self._disk_cache.put(key, self._model, embedding)
+        embedding.flags.writeable = False
+        return embedding
+    
+    def _embed_uncached(self, text: str, task_type: str) -> np.ndarray:
+        """Call the embedding API for a single text."""
         try:
             result = genai.embed_content(
-                model=settings.embedding_model,
+                model=self._model,
                 content=text,
-                task_type="RETRIEVAL_DOCUMENT"  # or "RETRIEVAL_QUERY"
+                task_type=task_type
             )
-            return result['embedding']
+            return np.asarray(result['embedding'], dtype=np.float32)
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             raise
     
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def _embed_chunk_sync(self, chunk: List[str], task_type: str) -> np.ndarray:
+        """Embed up to embed_batch_size texts with one batch request."""
+        try:
+            result = genai.embed_content(
+                model=self._model,
+                content=chunk,
+                task_type=task_type
+            )
+            return np.asarray(result['embedding'], dtype=np.float32)
+        except google_exceptions.InvalidArgument as e:
+            if len(chunk) == 1:
+                raise
+            # Usually one oversized text; embed individually so the rest still succeed
+            logger.warning(f"Batch embedding of {len(chunk)} texts rejected ({e}), embedding one at a time")
+            return np.stack([self.generate_embedding(text, task_type) for text in chunk])
+    
+    @retry(
+        retry=retry_if_exception(_is_rate_limited),
+        stop=stop_after_attempt(4),
+        wait=_rate_limit_wait,
+        reraise=True
+    )
+    async def _embed_chunk(
+        self,
+        chunk: List[str],
+        task_type: str,
+        semaphore: asyncio.Semaphore
+    ) -> np.ndarray:
+        """Embed one chunk on a worker thread, holding a concurrency slot."""
+        async with semaphore:
+            # Stagger request starts so a batch doesn't hit the rate limiter at once
+            await asyncio.sleep(random.uniform(0, 0.05))
+            return await asyncio.to_thread(self._embed_chunk_sync, chunk, task_type)
+    
+    def _chunk(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into batch-request-sized chunks."""
+        size = settings.embed_batch_size
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+    
+    def _stack_chunks(self, chunks: List[np.ndarray]) -> np.ndarray:
+        """Pack per-chunk embedding arrays into one contiguous (N, d) float32 array."""
+        if not chunks:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(chunks)
+    
+    @staticmethod
+    def _dedupe(texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Return the distinct texts and, per input text, its row in that list."""
+        unique = {}
+        order = [unique.setdefault(text, len(unique)) for text in texts]
+        return list(unique), np.asarray(order, dtype=np.intp)
+    
+    async def generate_embeddings_batch_async(
+        self,
+        texts: List[str],
+        task_type: str = DOCUMENT_TASK
+    ) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts using concurrent batch requests.
+        
+        Args:
+            texts: List of texts to embed
+            task_type: DOCUMENT_TASK for stored texts, QUERY_TASK for search queries
+            
+        Returns:
+            float32 array with one embedding row per text, in the same order as texts
+        """
+        # Repeated texts (boilerplate, shared headers) are only sent once
+        unique_texts, order = self._dedupe(texts)
+        try:
+            semaphore = asyncio.Semaphore(settings.embed_concurrency)
+            chunks = await asyncio.gather(
+                *(self._embed_chunk(chunk, task_type, semaphore) for chunk in self._chunk(unique_texts))
+            )
+            return self._stack_chunks(chunks)[order]
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {str(e)}")
+            raise
+    
+    def normalize(self, vector: List[float]) -> np.ndarray:
+        """Return a vector scaled to unit length as float32."""
+        # A fresh copy, since the Numba path normalizes in place
+        array = np.array(vector, dtype=np.float32)
+        if HAS_NUMBA and array.shape == (EMBEDDING_DIM,):
+            kernel = _get_l2_normalize()
+            if kernel is not None:
+                return kernel(array)
+        return array / (np.linalg.norm(array) + 1e-12)
+    
+    def normalize_rows(self, matrix: np.ndarray) -> np.ndarray:
+        """Return a copy of a 2-D array with every row scaled to unit length, as float32."""
+        rows = np.array(matrix, dtype=np.float32)
+        rows /= np.linalg.norm(rows, axis=1, keepdims=True) + 1e-12
+        return rows
+    
+    def generate_embedding_normalized(self, text: str, task_type: str = DOCUMENT_TASK) -> np.ndarray:
+        """
+        Generate a unit-length embedding for a single text.
+        
+        Args:
+            text: Input text to embed
+            task_type: DOCUMENT_TASK for stored texts, QUERY_TASK for search queries
+            
+        Returns:
+            Unit-norm float32 embedding, comparable to other unit vectors with dot_similarity
+        """
+        return self.normalize(self.generate_embedding(text, task_type))
+    
+    def generate_embeddings_batch(self, texts: List[str], task_type: str = DOCUMENT_TASK) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
         
         Args:
             texts: List of texts to embed
+            task_type: DOCUMENT_TASK for stored texts, QUERY_TASK for search queries
             
         Returns:
-            List of embedding vectors
+            float32 array with one embedding row per text
         """
         try:
-            embeddings = []
-            for text in texts:
-                embedding = self.generate_embedding(text)
-                embeddings.append(embedding)
-            return embeddings
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.generate_embeddings_batch_async(texts, task_type))
+        
+        # asyncio.run can't be nested inside a running event loop, so use threads instead
+        unique_texts, order = self._dedupe(texts)
+        try:
+            with ThreadPoolExecutor(max_workers=settings.embed_concurrency) as pool:
+                chunks = pool.map(lambda chunk: self._embed_chunk_sync(chunk, task_type), self._chunk(unique_texts))
+                return self._stack_chunks(list(chunks))[order]
         except Exception as e:
             logger.error(f"Error generating batch embeddings: {str(e)}")
             raise
@@ -72,31 +382,150 @@ class EmbeddingService:
         """
         Calculate cosine similarity between two vectors.
         
+        Float32 contiguous arrays are used as-is; anything else is copied
+        into one first.
+        
         Args:
             vec1: First embedding vector
             vec2: Second embedding vector
             
         Returns:
             Cosine similarity score (0-1)
+            
+        Raises:
+            ValueError: If the vectors have different lengths
         """
-        try:
-            vec1_np = np.array(vec1)
-            vec2_np = np.array(vec2)
+        vec1_np = np.ascontiguousarray(vec1, dtype=np.float32)
+        vec2_np = np.ascontiguousarray(vec2, dtype=np.float32)
+        if vec1_np.shape != vec2_np.shape:
+            raise ValueError(f"Vector shapes differ: {vec1_np.shape} vs {vec2_np.shape}")
+        
+        if HAS_SIMSIMD:
+            if not vec1_np.any() or not vec2_np.any():
+                return 0.0
+            # simsimd returns cosine distance
+            return 1.0 - float(simsimd.cosine(vec1_np, vec2_np))
+        
+        # One sqrt of the squared-norm product instead of two norm calls
+        denom_sq = np.vdot(vec1_np, vec1_np) * np.vdot(vec2_np, vec2_np)
+        if denom_sq == 0:
+            return 0.0
+        
+        return float((vec1_np @ vec2_np) / np.sqrt(denom_sq))
+    
+    def dot_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
+        """Cosine similarity of two vectors that are already unit-norm."""
+        return float(np.dot(vec1, vec2))
+    
+    def quantize_i8(self, vector: List[float]) -> Tuple[np.ndarray, float]:
+        """
+        Quantize a vector to int8 with a per-vector linear scale.
+        
+        Args:
+            vector: Embedding vector
+            
+        Returns:
+            (int8 vector, scale) where vector ~= int8 vector / scale
+        """
+        array = np.asarray(vector, dtype=np.float32)
+        scale = 127.0 / max(float(np.abs(array).max()), 1e-9)
+        return np.round(array * scale).astype(np.int8), scale
+    
+    def batch_cosine_i8(self, query_i8: np.ndarray, matrix_i8: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of an int8 query against each row of an int8 matrix.
+        
+        The per-vector scales cancel out in cosine similarity, so they aren't needed.
+        
+        Args:
+            query_i8: Quantized query vector
+            matrix_i8: 2-D int8 array with one quantized embedding per row
             
-            dot_product = np.dot(vec1_np, vec2_np)
-            norm1 = np.linalg.norm(vec1_np)
-            norm2 = np.linalg.norm(vec2_np)
+        Returns:
+            float32 array of similarities, one per row
+        """
+        if matrix_i8.shape[0] == 0:
+            return np.empty(0, dtype=np.float32)
+        
+        if HAS_SIMSIMD:
+            distances = np.asarray(simsimd.cdist(query_i8[None, :], matrix_i8, metric="cosine"))
+            return (1.0 - distances.reshape(-1)).astype(np.float32)
+        
+        matrix = matrix_i8.astype(np.float32)
+        query = query_i8.astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        dots = matrix @ query
+        return np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+    
+    def top_k_similar(self, query: List[float], matrix: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """
+        Find the rows of a matrix most similar to a query vector.
+        
+        Args:
+            query: Query embedding vector
+            matrix: 2-D array with one embedding per row
+            k: Number of results to return
             
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
+        Returns:
+            List of (row index, cosine similarity) tuples, most similar first
+        """
+        query_np = np.asarray(query, dtype=np.float32)
+        matrix_np = np.asarray(matrix, dtype=np.float32)
+        if matrix_np.shape[0] == 0 or k <= 0:
+            return []
+        
+        if HAS_SIMSIMD:
+            distances = np.asarray(simsimd.cdist(query_np[None, :], matrix_np, metric="cosine"))
+            similarities = 1.0 - distances.reshape(-1)
+        else:
+            norms = np.linalg.norm(matrix_np, axis=1) * np.linalg.norm(query_np)
+            dots = matrix_np @ query_np
+            similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+        
+        return [(int(i), float(similarities[i])) for i in self.top_k_indices(similarities, k)]
+    
+    def batch_similarity(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a query against every row of a matrix in one BLAS call.
+        
+        Args:
+            query: Unit-norm float32 query vector
+            matrix: C-contiguous float32 2-D array of unit-norm rows
             
-            similarity = dot_product / (norm1 * norm2)
-            return float(similarity)
-        except Exception as e:
-            logger.error(f"Error calculating cosine similarity: {str(e)}")
-            return 0.0
+        Returns:
+            float32 array of similarities, one per row
+        """
+        return matrix @ query
+    
+    def top_k_indices(self, similarities: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k largest similarities, largest first."""
+        k = min(k, similarities.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        return top[np.argsort(-similarities[top])]
+
 
+_embedding_service_instance: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get or create the global embedding service instance (lazy initialization)."""
+    global _embedding_service_instance
+    if _embedding_service_instance is not None:
+        return _embedding_service_instance
+    
+    # Concurrent first requests must not each build a service
+    with _embedding_service_lock:
+        if _embedding_service_instance is None:
+            _embedding_service_instance = EmbeddingService()
+    return _embedding_service_instance
 
-# Global instance
-embedding_service = EmbeddingService()
 
+def __getattr__(name: str):
+    # Keeps `services.embedding_service.embedding_service` working without
+    # configuring the API client at import time
+    if name == "embedding_service":
+        return get_embedding_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
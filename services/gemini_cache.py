@@ -0,0 +1,332 @@
+"""Response caches for Gemini completions."""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Redis lets every worker process share cached responses
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+    logger.debug("redis not installed; response cache is per-process")
+
+# Prefix for exact-match response entries in Redis
+REDIS_KEY_PREFIX = "gc:"
+
+
+def _schema_fingerprint(response_schema: Any) -> Optional[str]:
+    """Identify a response schema by name and a hash of its JSON schema."""
+    if response_schema is None:
+        return None
+    if hasattr(response_schema, "model_json_schema"):
+        schema_json = json.dumps(response_schema.model_json_schema(), sort_keys=True)
+        digest = hashlib.sha256(schema_json.encode("utf-8")).hexdigest()
+        return f"{response_schema.__name__}:{digest}"
+    return json.dumps(response_schema, sort_keys=True, default=str)
+
+
+def cache_key(
+    model: Optional[str],
+    messages: Any,
+    system_instruction: Optional[str],
+    temperature: float,
+    max_tokens: Optional[int] = None,
+    response_schema: Any = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
+    """
+    Build the cache key for a completion request.
+
+    Args:
+        model: Model name the request will be sent to
+        messages: Prompt string or list of message dicts
+        system_instruction: System prompt
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        response_schema: Pydantic model or schema dict for structured output
+        options: Any other generation parameters
+
+    Returns:
+        SHA-256 hex key, or None when temperature > 0 (sampled output must not be reused)
+    """
+    if temperature > 0:
+        return None
+
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "system_instruction": system_instruction,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "schema": _schema_fingerprint(response_schema),
+            "options": options or {},
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Thread-safe LRU cache of response texts with a per-entry TTL.
+
+    With a Redis URL, entries are also written to Redis and local misses
+    are looked up there, so worker processes reuse each other's responses.
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600, redis_url: str = ""):
+        """
+        Create the cache.
+
+        Args:
+            maxsize: Maximum number of cached responses
+            ttl: Seconds a response stays valid
+            redis_url: Shared Redis to back the cache; empty keeps it in-process
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._redis = None
+        if redis_url and HAS_REDIS:
+            self._redis = redis.Redis.from_url(
+                redis_url,
+                max_connections=50,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+                decode_responses=True
+            )
+        elif redis_url:
+            logger.warning("REDIS_URL is set but redis is not installed; response cache is per-process")
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            return None
+
+    def _put_local(self, key: str, response: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss or expired entry."""
+        response = self._get_local(key)
+        if response is None and self._redis is not None:
+            try:
+                response = self._redis.get(REDIS_KEY_PREFIX + key)
+            except redis.RedisError as e:
+                logger.debug(f"Redis response cache get failed: {e}")
+            if response is not None:
+                self._put_local(key, response)
+
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def put(self, key: str, response: str):
+        """Store a response, evicting the least recently used entry when full."""
+        self._put_local(key, response)
+        if self._redis is not None:
+            try:
+                self._redis.setex(REDIS_KEY_PREFIX + key, int(self.ttl), response)
+            except redis.RedisError as e:
+                logger.debug(f"Redis response cache put failed: {e}")
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class SemanticCache:
+    """
+    Reuses responses for prompts whose embeddings are nearly identical.
+
+    Entries are unit-norm float32 rows of one matrix, so a lookup is a single
+    matrix-vector product. Each entry carries a scope (model, system prompt,
+    generation options) and only matches prompts in the same scope. Once
+    maxsize entries exist the oldest is overwritten (FIFO).
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 50_000):
+        """
+        Create the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a prompt to reuse a response
+            maxsize: Maximum number of cached responses
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._scopes = np.empty(0, dtype=np.int64)
+        self._responses: List[str] = []
+        self._count = 0
+        self._next = 0  # Slot overwritten next once the cache is full
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def scope(*parts: Any) -> int:
+        """Hash the request attributes that must match exactly for a hit."""
+        return hash(json.dumps(parts, sort_keys=True, default=str))
+
+    def get(self, embedding: np.ndarray, scope: int) -> Optional[str]:
+        """
+        Find the cached response for the most similar prompt in scope.
+
+        Args:
+            embedding: Unit-norm prompt embedding
+            scope: Value from SemanticCache.scope()
+
+        Returns:
+            The cached response if its similarity exceeds the threshold, else None
+        """
+        with self._lock:
+            if self._count:
+                # A float64 query would upcast the whole matrix before the
+                # product; kept float32 it is a single BLAS sgemv
+                query = np.asarray(embedding, dtype=np.float32)
+                scores = self._matrix[:self._count] @ query
+                scores[self._scopes[:self._count] != scope] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] > self.threshold:
+                    self.hits += 1
+                    return self._responses[best]
+            self.misses += 1
+            return None
+
+    def put(self, embedding: np.ndarray, scope: int, response: str):
+        """Store a response under its prompt embedding."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if self._matrix is None:
+                capacity = min(64, self.maxsize)
+                self._matrix = np.empty((capacity, embedding.shape[0]), dtype=np.float32)
+                self._scopes = np.empty(capacity, dtype=np.int64)
+            elif self._count == self._matrix.shape[0] and self._count < self.maxsize:
+                capacity = min(self._count * 2, self.maxsize)
+                grown = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+                grown[:self._count] = self._matrix
+                self._matrix = grown
+                self._scopes = np.resize(self._scopes, capacity)
+
+            if self._count < self.maxsize:
+                slot = self._count
+                self._count += 1
+                self._responses.append(response)
+            else:
+                slot = self._next
+                self._next = (self._next + 1) % self.maxsize
+                self._responses[slot] = response
+            self._matrix[slot] = embedding
+            self._scopes[slot] = scope
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": self._count}
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces embedding requests from concurrent callers into batch calls.
+
+    The first caller to arrive waits briefly for others, then embeds
+    pending texts (up to max_batch per call) until its own row is ready.
+    Whatever is still pending is then left to the next waiting caller, so
+    no request thread keeps working for others under steady load.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], np.ndarray],
+        max_batch: int = 100,
+        delay: float = 0.005
+    ):
+        """
+        Create the batcher.
+
+        Args:
+            embed_batch: Embeds a list of texts, returning one row per text
+            max_batch: Most texts sent in one call
+            delay: Seconds the first caller waits for others to join
+        """
+        self.embed_batch = embed_batch
+        self.max_batch = max_batch
+        self.delay = delay
+        self._pending: List[Tuple[str, Future]] = []
+        self._flushing = False
+        self._cond = threading.Condition()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text, sharing the API call with any concurrent callers."""
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((text, future))
+            # Another caller's flush may embed this text too
+            while self._flushing and not future.done():
+                self._cond.wait()
+            leader = not future.done()
+            if leader:
+                self._flushing = True
+
+        if leader:
+            try:
+                time.sleep(self.delay)
+                while not future.done():
+                    self._flush_batch()
+            finally:
+                with self._cond:
+                    self._flushing = False
+                    self._cond.notify_all()
+        return future.result()
+
+    def _flush_batch(self):
+        with self._cond:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        try:
+            embeddings = self.embed_batch([text for text, _ in batch])
+            # Rows can't be matched to texts, so nobody gets one
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Embedding batch returned {len(embeddings)} rows for {len(batch)} texts")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+        else:
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+        with self._cond:
+            self._cond.notify_all()
@@ -1,32 +1,195 @@
 """Gemini API service wrapper."""
 
+import asyncio
+import atexit
+import importlib.util
+import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+import numpy as np
 import google.generativeai as genai
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential
+from google.api_core import exceptions as google_exceptions
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter, wait_random
 
 # Try to import newer Client API if available
 try:
     from google import genai as genai_client_module
+    import httpx  # Installed with google-genai
     HAS_CLIENT_API = True
 except ImportError:
     HAS_CLIENT_API = False
     logger.debug("Newer genai.Client API not available, using GenerativeModel API")
 
-# Try to import Vertex AI SDK for server-to-server auth
+# Vertex AI SDK for server-to-server auth. Importing it pulls in all of
+# google.cloud.aiplatform (seconds of cold start), so it is only imported
+# when Vertex AI is actually enabled
+HAS_VERTEX_AI = importlib.util.find_spec("vertexai") is not None
+if not HAS_VERTEX_AI:
+    logger.debug("Vertex AI SDK not installed; skipping vertexai.init()")
+
+# HTTP/2 lets concurrent requests share one connection
 try:
-    import vertexai
-    HAS_VERTEX_AI = True
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
 except ImportError:
-    HAS_VERTEX_AI = False
-    logger.debug("Vertex AI SDK not installed; skipping vertexai.init()")
+    HAS_HTTP2 = False
 
 from config.settings import settings
+from services.embedding_service import get_embedding_service
+from services.gemini_cache import EmbeddingBatcher, LLMCache, SemanticCache, cache_key
+from services.rate_limiter import TokenBucket
+
+# Model families served through the newer genai.Client API
+CLIENT_API_MODEL_PREFIXES = ("gemini-2.0", "gemini-2.5", "gemini-3")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an API error from either SDK, if it has one."""
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """True for 429s, 5xx responses and network failures; other 4xx errors won't succeed on retry."""
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return True
+    if isinstance(error, (google_exceptions.ServerError, google_exceptions.RetryError)):
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if HAS_CLIENT_API and isinstance(error, httpx.TransportError):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _retry_delay(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from RetryInfo details or a Retry-After header."""
+    for detail in getattr(error, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# The extra random term keeps workers that failed together from retrying together
+_jittered_backoff = wait_exponential_jitter(initial=1, max=30, jitter=2) + wait_random(0, 2)
+
+
+def _retry_wait(retry_state) -> float:
+    """Honour the server's retry delay when given, else back off with jitter."""
+    delay = _retry_delay(retry_state.outcome.exception())
+    if delay is not None:
+        return delay + random.uniform(0, 2)
+    return _jittered_backoff(retry_state)
+
+
+def _estimate_tokens(text_length: int, max_tokens: Optional[int]) -> int:
+    """Rough token cost of a request: ~4 characters per prompt token plus the output budget."""
+    return text_length // 4 + (max_tokens or 1024)
+
+
+def _format_messages(messages: List[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], str, str]:
+    """
+    Convert chat messages to both request shapes in a single pass.
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        
+    Returns:
+        (GenerativeModel history, trailing user message to send, "User:/Assistant:" transcript for the Client API)
+    """
+    history = []
+    user_message = ""
+    conversation_parts = []
+    
+    for msg in messages:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        conversation_parts.append(("User: " if msg.get("role") == "user" else "Assistant: ") + content)
+        
+        if role == "user":
+            if user_message:
+                history.append({"role": "user", "parts": [user_message]})
+            user_message = content
+        elif role == "assistant":
+            if user_message:
+                history.append({"role": "user", "parts": [user_message]})
+                user_message = ""
+            history.append({"role": "model", "parts": [content]})
+    
+    return history, user_message, "\n".join(conversation_parts)
+
+
+@lru_cache(maxsize=2048)
+def _msg_to_content(role: str, content: str):
+    """Client API Content for one message; repeated messages (few-shot examples, reminders) share one object."""
+    return genai_client_module.types.Content(
+        role=role,
+        parts=[genai_client_module.types.Part(text=content)]
+    )
+
+
+def _call_with_timeout(fn, timeout: float, *args, **kwargs):
+    """Run fn on a worker thread, raising TimeoutError if it takes longer than timeout seconds."""
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        return pool.submit(fn, *args, **kwargs).result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"{getattr(fn, '__qualname__', fn)} did not finish within {timeout}s")
+    finally:
+        # A hung call can't be cancelled; leave its thread behind rather than wait on it
+        pool.shutdown(wait=False)
+
+
+def _fast_text(response: Any) -> str:
+    """
+    Text of a response's first candidate, read straight from its parts.
+    
+    Works for both SDKs' responses and skips the generic .text accessor.
+    
+    Args:
+        response: generate_content / send_message response
+        
+    Returns:
+        Concatenated text of the candidate's non-thought parts
+        
+    Raises:
+        ValueError: If the response has no text parts (e.g. it was blocked)
+    """
+    candidates = response.candidates
+    parts = candidates[0].content.parts if candidates and candidates[0].content else None
+    if not parts:
+        finish_reason = candidates[0].finish_reason if candidates else None
+        raise ValueError(f"Gemini response contained no text (finish_reason={finish_reason})")
+    if len(parts) == 1:
+        return parts[0].text or ""
+    return "".join(part.text for part in parts if part.text and not getattr(part, "thought", False))
+
+
+def _parse_structured(json_text: str, response_schema: Any) -> Any:
+    """Parse a JSON response, instantiating response_schema when it is a Pydantic model."""
+    # Pydantic parses straight into the model, skipping the intermediate dict
+    if hasattr(response_schema, 'model_validate_json'):
+        return response_schema.model_validate_json(json_text)
+    return json.loads(json_text)
 
 
 class GeminiService:
     """Service for interacting with Google Gemini models."""
     
+    # Distinct GenerationConfigs kept for reuse
+    GENERATION_CONFIG_CACHE_SIZE = 64
+    
     def __init__(self):
         # Ensure API key is stripped of whitespace (Cloud Run secrets may have trailing newlines)
         api_key = settings.gemini_api_key.strip() if settings.gemini_api_key else None
@@ -55,7 +218,12 @@ class GeminiService:
         
         if self.use_vertex_ai:
             try:
-                vertexai.init(
+                import vertexai
+                
+                # Credential discovery can hang on a bad metadata server; don't block readiness on it
+                _call_with_timeout(
+                    vertexai.init,
+                    settings.gemini_init_timeout,
                     project=settings.google_cloud_project_id,
                     location=settings.google_cloud_region
                 )
@@ -65,6 +233,9 @@ class GeminiService:
                 self.use_vertex_ai = False
         
         genai.configure(api_key=self.api_key)
+        # Models are rebuilt per (name, system prompt) otherwise; agents reuse a handful of prompts
+        self._get_model = lru_cache(maxsize=256)(self._create_model)
+        self._generation_configs: Dict[Tuple[Any, ...], Any] = {}
         
         # Disable Client API on Cloud Run - it tries to use OAuth2 instead of API keys
         # The GenerativeModel API properly supports API keys
@@ -74,7 +245,7 @@ class GeminiService:
         self.use_client_api = False
         if HAS_CLIENT_API and not is_production:
             try:
-                self.client = genai_client_module.Client(api_key=self.api_key)
+                self.client = _call_with_timeout(self._create_client, settings.gemini_init_timeout)
                 # Skip test call during initialization to avoid blocking startup
                 # Will test on first actual use
                 self.use_client_api = True
@@ -95,28 +266,7 @@ class GeminiService:
             "gemini-2.0-flash-exp",
         ]
         
-        self.flash_model = None
-        self.flash_model_name = None
-        for model_name in flash_model_names:
-            try:
-                # Try newer Client API first if available (for gemini-2.0+ models)
-                if self.use_client_api and (model_name.startswith("gemini-2.0") or model_name.startswith("gemini-2.5") or model_name.startswith("gemini-3")):
-                    # Skip test call during initialization to avoid blocking startup
-                    self.flash_model_name = model_name
-                    logger.info(f"Initialized Flash model via Client API: {model_name} (will test on first use)")
-                    break
-                
-                # Fall back to GenerativeModel API
-                test_model = genai.GenerativeModel(model_name)
-                # Skip API test call during initialization to avoid blocking startup
-                # Model will be tested on first actual use
-                self.flash_model = test_model
-                self.flash_model_name = model_name
-                logger.info(f"Initialized Flash model: {model_name} (will test on first use)")
-                break
-            except Exception as e:
-                logger.debug(f"Failed to initialize {model_name}: {e}")
-                continue
+        self.flash_model, self.flash_model_name = self._init_model_family(flash_model_names, "Flash")
         
         if self.flash_model is None and self.flash_model_name is None:
             raise ValueError(f"Could not initialize Flash model with any of: {flash_model_names}. Please check your API key and model availability.")
@@ -128,28 +278,7 @@ class GeminiService:
             "gemini-3-pro-preview",  # Preview version (newest)
         ]
         
-        self.pro_model = None
-        self.pro_model_name = None
-        for model_name in pro_model_names:
-            try:
-                # Try newer Client API first if available (for gemini-2.0+ models)
-                if self.use_client_api and (model_name.startswith("gemini-2.0") or model_name.startswith("gemini-2.5") or model_name.startswith("gemini-3")):
-                    # Skip test call during initialization to avoid blocking startup
-                    self.pro_model_name = model_name
-                    logger.info(f"Initialized Pro model via Client API: {model_name} (will test on first use)")
-                    break
-                
-                # Fall back to GenerativeModel API
-                test_model = genai.GenerativeModel(model_name)
-                # Skip API test call during initialization to avoid blocking startup
-                # Model will be tested on first actual use
-                self.pro_model = test_model
-                self.pro_model_name = model_name
-                logger.info(f"Initialized Pro model: {model_name} (will test on first use)")
-                break
-            except Exception as e:
-                logger.debug(f"Failed to initialize {model_name}: {e}")
-                continue
+        self.pro_model, self.pro_model_name = self._init_model_family(pro_model_names, "Pro")
         
         if self.pro_model is None and self.pro_model_name is None:
             # Fallback: use flash model for pro if pro fails
@@ -157,9 +286,200 @@ class GeminiService:
             self.pro_model = self.flash_model
             self.pro_model_name = self.flash_model_name
         
+        # Deterministic (temperature 0) responses are reused for identical requests
+        self._response_cache = LLMCache(
+            maxsize=settings.llm_cache_size,
+            ttl=settings.llm_cache_ttl,
+            redis_url=settings.redis_url
+        )
+        # Shared across workers' threads so requests are throttled before they hit the quota
+        self._bucket = TokenBucket(rpm=settings.gemini_rpm, tpm=settings.gemini_tpm)
+        # Opt-in: also reuses temperature-0 responses for paraphrased prompts
+        self._semantic_cache = None
+        if settings.semantic_cache_enabled:
+            self._semantic_cache = SemanticCache(
+                threshold=settings.semantic_cache_threshold,
+                maxsize=settings.semantic_cache_size
+            )
+            # Concurrent requests share one batch embedding call for their prompts
+            self._prompt_embedder = EmbeddingBatcher(
+                lambda texts: get_embedding_service().generate_embeddings_batch(texts),
+                max_batch=settings.embed_batch_size
+            )
+        
         logger.info("Gemini service initialized")
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _init_model_family(self, candidates: List[str], label: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Pick the first usable model name from a list of candidates.
+        
+        No API calls are made here; models are tested on first actual use.
+        
+        Args:
+            candidates: Model names in order of preference
+            label: Family name for log messages ('Flash' or 'Pro')
+            
+        Returns:
+            (GenerativeModel or None when served via the Client API, model name), or (None, None)
+        """
+        for model_name in candidates:
+            try:
+                # Try newer Client API first if available (for gemini-2.0+ models)
+                if self.use_client_api and model_name.startswith(CLIENT_API_MODEL_PREFIXES):
+                    logger.info(f"Initialized {label} model via Client API: {model_name} (will test on first use)")
+                    return None, model_name
+                
+                # Fall back to GenerativeModel API
+                model = self._get_model(model_name)
+                logger.info(f"Initialized {label} model: {model_name} (will test on first use)")
+                return model, model_name
+            except Exception as e:
+                logger.debug(f"Failed to initialize {model_name}: {e}")
+        return None, None
+    
+    def _create_client(self):
+        """
+        Create the genai.Client on shared, pooled HTTP clients.
+        
+        Reusing one pool amortizes TCP/TLS handshakes across requests. The async
+        pool belongs to the event loop that first uses it (the server's loop).
+        """
+        limits = httpx.Limits(
+            max_connections=settings.gemini_max_connections,
+            max_keepalive_connections=settings.gemini_max_connections,
+            keepalive_expiry=60
+        )
+        timeout = httpx.Timeout(connect=5.0, read=settings.gemini_read_timeout, write=10.0, pool=5.0)
+        try:
+            http_options = genai_client_module.types.HttpOptions(
+                httpx_client=httpx.Client(limits=limits, timeout=timeout, http2=HAS_HTTP2),
+                httpx_async_client=httpx.AsyncClient(limits=limits, timeout=timeout, http2=HAS_HTTP2)
+            )
+        except Exception as e:
+            # Older google-genai releases can't take pre-built clients
+            logger.debug(f"Shared HTTP clients not supported by google-genai: {e}")
+            return genai_client_module.Client(api_key=self.api_key)
+        
+        atexit.register(self._close_http_clients, http_options)
+        return genai_client_module.Client(api_key=self.api_key, http_options=http_options)
+    
+    @staticmethod
+    def _close_http_clients(http_options):
+        http_options.httpx_client.close()
+        try:
+            asyncio.run(http_options.httpx_async_client.aclose())
+        except RuntimeError as e:
+            logger.debug(f"Could not close async HTTP client: {e}")
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Response cache hit/miss counters."""
+        stats = dict(self._response_cache.stats)
+        if self._semantic_cache is not None:
+            stats["semantic"] = self._semantic_cache.stats
+        return stats
+    
+    def _semantic_lookup_key(
+        self,
+        text: str,
+        model_type: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        options: Dict[str, Any],
+        context: Any = None
+    ) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Embed a prompt for the semantic cache.
+        
+        Like the exact cache, only temperature-0 requests take part: a sampled
+        response is one draw, and reusing it for another prompt would hand one
+        user's reply to someone else.
+        
+        Args:
+            text: Prompt text to embed
+            model_type: 'flash' or 'pro'
+            system_instruction: System prompt
+            temperature: Sampling temperature
+            options: Other generation parameters
+            context: Request parts that must match exactly, such as earlier chat turns
+            
+        Returns:
+            (unit-norm embedding, scope), or None if the cache is off, the request
+            is sampled, or embedding fails
+        """
+        if self._semantic_cache is None or temperature > 0:
+            return None
+        try:
+            embedding = get_embedding_service().normalize(self._prompt_embedder.embed(text))
+        except Exception as e:
+            logger.debug(f"Skipping semantic cache, prompt embedding failed: {e}")
+            return None
+        scope = SemanticCache.scope(
+            self._model_name_for(model_type), system_instruction, temperature, options, context
+        )
+        return embedding, scope
+    
+    def _semantic_get(self, lookup_key: Optional[Tuple[np.ndarray, int]]) -> Optional[str]:
+        if lookup_key is None:
+            return None
+        cached = self._semantic_cache.get(*lookup_key)
+        if cached is not None:
+            logger.debug(f"Semantic cache hit ({self._semantic_cache.stats})")
+        return cached
+    
+    @staticmethod
+    def _create_model(model_name: str, system_instruction: Optional[str] = None):
+        return genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+    
+    def _generation_config(self, temperature: float, **kwargs):
+        """
+        GenerationConfig for these settings, built once per distinct combination.
+        
+        Args:
+            temperature: Sampling temperature
+            **kwargs: Other GenerationConfig fields
+            
+        Returns:
+            Shared genai GenerationConfig (treat as read-only)
+        """
+        # The GenerativeModel SDK has no thinking controls
+        kwargs.pop("thinking_budget", None)
+        # Schemas are module-level objects, so identity is a cheap key that skips schema serialization
+        schema = kwargs.pop("response_schema", None)
+        key = (temperature, id(schema), json.dumps(kwargs, sort_keys=True, default=repr))
+        config = self._generation_configs.get(key)
+        if config is None:
+            if schema is not None:
+                kwargs["response_schema"] = schema
+            config = genai.types.GenerationConfig(temperature=temperature, **kwargs)
+            if len(self._generation_configs) < self.GENERATION_CONFIG_CACHE_SIZE:
+                self._generation_configs[key] = config
+        return config
+    
+    def _client_config(self, temperature: float, system_instruction: Optional[str], **kwargs):
+        """
+        GenerateContentConfig for a Client API request.
+        
+        Args:
+            temperature: Sampling temperature
+            system_instruction: System prompt
+            **kwargs: Other config fields; thinking_budget becomes a ThinkingConfig
+            
+        Returns:
+            google.genai GenerateContentConfig
+        """
+        thinking_budget = kwargs.pop("thinking_budget", None)
+        if thinking_budget is not None:
+            kwargs["thinking_config"] = genai_client_module.types.ThinkingConfig(thinking_budget=thinking_budget)
+        return genai_client_module.types.GenerateContentConfig(
+            temperature=temperature,
+            system_instruction=system_instruction,
+            **kwargs
+        )
+    
+    def _model_name_for(self, model_type: str) -> Optional[str]:
+        return self.flash_model_name if model_type == "flash" else self.pro_model_name
+    
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -183,44 +503,61 @@ class GeminiService:
         Returns:
             Generated response text
         """
+        key = cache_key(
+            self._model_name_for(model_type), messages, system_instruction,
+            temperature, max_tokens=max_tokens, options=kwargs
+        )
+        if key is not None:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        # Only the latest message is compared by meaning; the conversation
+        # before it has to match exactly, both sides of it
+        semantic_key = None
+        if messages:
+            semantic_key = self._semantic_lookup_key(
+                messages[-1].get("content", ""), model_type, system_instruction, temperature,
+                dict(kwargs, max_tokens=max_tokens),
+                context=[(msg.get("role", "user"), msg.get("content", "")) for msg in messages[:-1]]
+            )
+        cached = self._semantic_get(semantic_key)
+        if cached is not None:
+            return cached
+        
+        prompt_length = sum(len(msg.get("content", "")) for msg in messages)
+        with self._bucket.reserve(_estimate_tokens(prompt_length, max_tokens)):
+            text = self._chat_completion(messages, model_type, system_instruction, temperature, max_tokens, **kwargs)
+        if key is not None:
+            self._response_cache.put(key, text)
+        if semantic_key is not None:
+            self._semantic_cache.put(*semantic_key, text)
+        return text
+    
+    def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model_type: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        **kwargs
+    ) -> str:
+        """Call the API for chat_completion, trying alternative models if this one is gone."""
         model = self.flash_model if model_type == "flash" else self.pro_model
         model_name = self.flash_model_name if model_type == "flash" else self.pro_model_name
         
-        # Convert messages format for Gemini
-        # Gemini uses parts format
-        history = []
-        user_message = ""
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "user":
-                if user_message:
-                    history.append({"role": "user", "parts": [user_message]})
-                user_message = content
-            elif role == "assistant":
-                if user_message:
-                    history.append({"role": "user", "parts": [user_message]})
-                    user_message = ""
-                history.append({"role": "model", "parts": [content]})
+        # Gemini history in parts format, plus a plain transcript for the Client API
+        history, user_message, conversation_text = _format_messages(messages)
         
         # Try Client API first if available (simpler for chat, for gemini-2.0+ models)
-        if self.use_client_api and model_name and (model_name.startswith("gemini-2.0") or model_name.startswith("gemini-2.5") or model_name.startswith("gemini-3")):
+        if self.use_client_api and model_name and model_name.startswith(CLIENT_API_MODEL_PREFIXES):
             try:
-                # Convert messages to simple string format for Client API
-                conversation_text = "\n".join([
-                    f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')}"
-                    for msg in messages
-                ])
-                if user_message:
-                    conversation_text += f"\nUser: {user_message}"
-                
                 response = self.client.models.generate_content(
                     model=model_name,
                     contents=conversation_text
                 )
-                return response.text
+                return _fast_text(response)
             except Exception as client_e:
                 logger.debug(f"Client API chat failed, falling back to GenerativeModel: {client_e}")
         
@@ -229,51 +566,17 @@ class GeminiService:
             raise ValueError(f"Model {model_name} not properly initialized for chat")
         
         # Prepare generation config
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-        )
         if max_tokens:
-            generation_config.max_output_tokens = max_tokens
+            generation_config = self._generation_config(temperature, max_output_tokens=max_tokens)
+        else:
+            generation_config = self._generation_config(temperature)
         
         # Try primary model first
         try:
-            # Create model with system instruction if provided
-            # System instruction must be set when creating the model, not in start_chat()
-            if system_instruction:
-                # Get the actual working model name
-                try:
-                    model_with_system = genai.GenerativeModel(
-                        model_name=model_name,
-                        system_instruction=system_instruction
-                    )
-                    chat = model_with_system.start_chat(history=history)
-                except Exception as e:
-                    logger.warning(f"Failed to create model with system instruction, using fallback: {e}")
-                    # Fallback: include system instruction in the user message
-                    if user_message:
-                        user_message = f"{system_instruction}\n\n{user_message}"
-                    elif history and history[0]["role"] == "user":
-                        history[0]["parts"][0] = f"{system_instruction}\n\n{history[0]['parts'][0]}"
-                    chat = model.start_chat(history=history)
-            else:
-                chat = model.start_chat(history=history)
-            
-            # Generate response
-            if user_message:
-                response = chat.send_message(
-                    user_message,
-                    generation_config=generation_config
-                )
-            else:
-                # If no user message, use the last message
-                last_content = messages[-1]["content"] if messages else ""
-                response = chat.send_message(
-                    last_content,
-                    generation_config=generation_config
-                )
-            
-            return response.text
-            
+            return self._send_chat(
+                model, model_name, messages, history, user_message,
+                system_instruction, generation_config
+            )
         except Exception as e:
             error_str = str(e).lower()
             # If 404 error, try alternative model names
@@ -286,12 +589,9 @@ class GeminiService:
                     if alt_name == model_name:
                         continue
                     try:
-                        alt_model = genai.GenerativeModel(alt_name)
+                        alt_model = self._get_model(alt_name)
                         if system_instruction:
-                            alt_model_with_system = genai.GenerativeModel(
-                                model_name=alt_name,
-                                system_instruction=system_instruction
-                            )
+                            alt_model_with_system = self._get_model(alt_name, system_instruction)
                             chat = alt_model_with_system.start_chat(history=history)
                         else:
                             chat = alt_model.start_chat(history=history)
@@ -310,7 +610,7 @@ class GeminiService:
                         else:
                             self.pro_model = alt_model
                             self.pro_model_name = alt_name
-                        return response.text
+                        return _fast_text(response)
                     except Exception as alt_e:
                         logger.debug(f"Alternative model {alt_name} also failed: {alt_e}")
                         continue
@@ -323,6 +623,58 @@ class GeminiService:
                 logger.error(f"Error in chat_completion: {str(e)}")
                 raise
     
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        stop=stop_after_attempt(5),
+        wait=_retry_wait,
+        reraise=True
+    )
+    def _send_chat(
+        self,
+        model: Any,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        history: List[Dict[str, Any]],
+        user_message: str,
+        system_instruction: Optional[str],
+        generation_config: Any
+    ) -> str:
+        """Send one chat turn through the GenerativeModel API, retrying transient failures."""
+        # Create model with system instruction if provided
+        # System instruction must be set when creating the model, not in start_chat()
+        if system_instruction:
+            try:
+                model_with_system = self._get_model(model_name, system_instruction)
+                chat = model_with_system.start_chat(history=history)
+            except Exception as e:
+                logger.warning(f"Failed to create model with system instruction, using fallback: {e}")
+                # Fallback: include system instruction in the user message
+                # (without mutating history, which is reused if this call is retried)
+                if user_message:
+                    user_message = f"{system_instruction}\n\n{user_message}"
+                elif history and history[0]["role"] == "user":
+                    first_turn = {"role": "user", "parts": [f"{system_instruction}\n\n{history[0]['parts'][0]}"]}
+                    history = [first_turn] + history[1:]
+                chat = model.start_chat(history=history)
+        else:
+            chat = model.start_chat(history=history)
+        
+        # Generate response
+        if user_message:
+            response = chat.send_message(
+                user_message,
+                generation_config=generation_config
+            )
+        else:
+            # If no user message, use the last message
+            last_content = messages[-1]["content"] if messages else ""
+            response = chat.send_message(
+                last_content,
+                generation_config=generation_config
+            )
+        
+        return _fast_text(response)
+    
     def generate_text(
         self,
         prompt: str,
@@ -339,30 +691,61 @@ class GeminiService:
             model_type: 'flash' or 'pro'
             system_instruction: System prompt
             temperature: Sampling temperature
-            **kwargs: Additional parameters
+            **kwargs: Additional generation parameters. thinking_budget (0 turns
+                thinking off) only applies on the Client API; the GenerativeModel
+                SDK ignores it, so there max_output_tokens also caps thinking.
             
         Returns:
             Generated text
         """
+        key = cache_key(
+            self._model_name_for(model_type), prompt, system_instruction,
+            temperature, options=kwargs
+        )
+        if key is not None:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        semantic_key = self._semantic_lookup_key(prompt, model_type, system_instruction, temperature, kwargs)
+        cached = self._semantic_get(semantic_key)
+        if cached is not None:
+            return cached
+        
+        with self._bucket.reserve(_estimate_tokens(len(prompt), kwargs.get("max_output_tokens"))):
+            text = self._generate_text(prompt, model_type, system_instruction, temperature, **kwargs)
+        if key is not None:
+            self._response_cache.put(key, text)
+        if semantic_key is not None:
+            self._semantic_cache.put(*semantic_key, text)
+        return text
+    
+    def _generate_text(
+        self,
+        prompt: str,
+        model_type: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        **kwargs
+    ) -> str:
+        """Call the API for generate_text."""
         # Try with current model, fallback to alternatives if 404 error
         model = self.flash_model if model_type == "flash" else self.pro_model
         model_name = self.flash_model_name if model_type == "flash" else self.pro_model_name
         
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-            **kwargs
-        )
+        generation_config = self._generation_config(temperature, **kwargs)
         
         # Try primary model first
         try:
             # Use Client API if available and model supports it (for gemini-2.0+ models)
-            if self.use_client_api and model_name and (model_name.startswith("gemini-2.0") or model_name.startswith("gemini-2.5") or model_name.startswith("gemini-3")):
+            if self.use_client_api and model_name and model_name.startswith(CLIENT_API_MODEL_PREFIXES):
                 try:
                     response = self.client.models.generate_content(
                         model=model_name,
-                        contents=prompt
+                        contents=prompt,
+                        config=self._client_config(temperature, system_instruction, **kwargs)
                     )
-                    return response.text
+                    return _fast_text(response)
                 except Exception as client_e:
                     logger.debug(f"Client API failed, falling back to GenerativeModel: {client_e}")
             
@@ -374,10 +757,7 @@ class GeminiService:
             # System instruction must be set when creating the model, not in generate_content()
             if system_instruction:
                 try:
-                    model_with_system = genai.GenerativeModel(
-                        model_name=model_name,
-                        system_instruction=system_instruction
-                    )
+                    model_with_system = self._get_model(model_name, system_instruction)
                     response = model_with_system.generate_content(
                         prompt,
                         generation_config=generation_config
@@ -395,7 +775,7 @@ class GeminiService:
                     prompt,
                     generation_config=generation_config
                 )
-            return response.text
+            return _fast_text(response)
         except Exception as e:
             error_str = str(e).lower()
             # If 404 error, try alternative model names
@@ -408,13 +788,10 @@ class GeminiService:
                     if alt_name == model_name:
                         continue
                     try:
-                        alt_model = genai.GenerativeModel(alt_name)
+                        alt_model = self._get_model(alt_name)
                         if system_instruction:
                             try:
-                                alt_model_with_system = genai.GenerativeModel(
-                                    model_name=alt_name,
-                                    system_instruction=system_instruction
-                                )
+                                alt_model_with_system = self._get_model(alt_name, system_instruction)
                                 response = alt_model_with_system.generate_content(
                                     prompt,
                                     generation_config=generation_config
@@ -439,7 +816,7 @@ class GeminiService:
                         else:
                             self.pro_model = alt_model
                             self.pro_model_name = alt_name
-                        return response.text
+                        return _fast_text(response)
                     except Exception as alt_e:
                         logger.debug(f"Alternative model {alt_name} also failed: {alt_e}")
                         continue
@@ -452,6 +829,67 @@ class GeminiService:
                 logger.error(f"Error in generate_text: {str(e)}")
                 raise
     
+    def generate_text_stream(
+        self,
+        prompt: str,
+        model_type: str = "flash",
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Generate text from a prompt, yielding chunks as they arrive.
+        
+        Not retried or cached: a partially delivered stream can't be replayed.
+        
+        Args:
+            prompt: Input prompt
+            model_type: 'flash' or 'pro'
+            system_instruction: System prompt
+            temperature: Sampling temperature
+            **kwargs: Additional generation parameters
+            
+        Yields:
+            Successive pieces of the generated text
+        """
+        model = self.flash_model if model_type == "flash" else self.pro_model
+        model_name = self._model_name_for(model_type)
+        self._bucket.acquire(_estimate_tokens(len(prompt), kwargs.get("max_output_tokens")))
+        
+        if self.use_client_api and model_name and model_name.startswith(CLIENT_API_MODEL_PREFIXES):
+            started = False
+            try:
+                for chunk in self.client.models.generate_content_stream(
+                    model=model_name,
+                    contents=prompt,
+                    config=self._client_config(temperature, system_instruction, **kwargs)
+                ):
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+                return
+            except Exception as client_e:
+                # Once text has been yielded, switching models would repeat it
+                if started:
+                    logger.error(f"Error in generate_text_stream: {str(client_e)}")
+                    raise
+                logger.debug(f"Client API stream failed, falling back to GenerativeModel: {client_e}")
+        
+        if model is None:
+            raise ValueError(f"Model {model_name} not properly initialized")
+        if system_instruction:
+            model = self._get_model(model_name, system_instruction)
+        
+        generation_config = self._generation_config(temperature, **kwargs)
+        try:
+            for chunk in model.generate_content(prompt, stream=True, generation_config=generation_config):
+                # The closing chunk may carry only a finish reason
+                if chunk.parts:
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"Error in generate_text_stream: {str(e)}")
+            raise
+    
     def generate_with_function_calling(
         self,
         prompt: str,
@@ -509,74 +947,68 @@ class GeminiService:
         Returns:
             Parsed object matching the schema
         """
-        model_name = self.flash_model_name if model_type == "flash" else self.pro_model_name
-        
-        # Configure generation to use JSON mode
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-            response_mime_type="application/json",
-            response_schema=response_schema,
-            **kwargs
+        key = cache_key(
+            self._model_name_for(model_type), messages, system_instruction,
+            temperature, response_schema=response_schema, options=kwargs
         )
+        if key is not None:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                return _parse_structured(cached, response_schema)
         
-        # Convert messages to Gemini format
-        history = []
-        user_message = ""
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "user":
-                if user_message:
-                    history.append({"role": "user", "parts": [user_message]})
-                user_message = content
-            elif role == "assistant":
-                if user_message:
-                    history.append({"role": "user", "parts": [user_message]})
-                    user_message = ""
-                history.append({"role": "model", "parts": [content]})
+        prompt_length = sum(len(msg.get("content", "")) for msg in messages)
+        with self._bucket.reserve(_estimate_tokens(prompt_length, kwargs.get("max_output_tokens"))):
+            parsed, json_text = self._generate_structured(
+                messages, response_schema, model_type, system_instruction, temperature, **kwargs
+            )
+        if key is not None:
+            self._response_cache.put(key, json_text)
+        return parsed
+    
+    def _generate_structured(
+        self,
+        messages: List[Dict[str, str]],
+        response_schema: Any,
+        model_type: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        **kwargs
+    ) -> Tuple[Any, str]:
+        """Call the API for generate_structured, returning the parsed object and its JSON text."""
+        model_name = self.flash_model_name if model_type == "flash" else self.pro_model_name
         
         try:
             # Use Client API if available (preferred for structured output)
-            if self.use_client_api and model_name and (model_name.startswith("gemini-2.0") or model_name.startswith("gemini-2.5") or model_name.startswith("gemini-3")):
+            if self.use_client_api and model_name and model_name.startswith(CLIENT_API_MODEL_PREFIXES):
                 try:
-                    # Convert messages to content list
-                    contents = []
-                    for msg in messages:
-                        role = "user" if msg.get("role") == "user" else "model"
-                        contents.append(genai_client_module.types.Content(
-                            role=role,
-                            parts=[genai_client_module.types.Part(text=msg.get("content", ""))]
-                        ))
-                    
-                    # Use generate_content with response_schema
-                    response = self.client.models.generate_content(
-                        model=model_name,
-                        contents=contents,
-                        config=genai_client_module.types.GenerateContentConfig(
-                            response_mime_type="application/json",
-                            response_schema=response_schema,
-                            temperature=temperature,
-                            system_instruction=system_instruction
-                        )
+                    contents = [
+                        _msg_to_content("user" if msg.get("role") == "user" else "model", msg.get("content", ""))
+                        for msg in messages
+                    ]
+                    return self._generate_structured_client(
+                        model_name, contents, response_schema, system_instruction, temperature
                     )
-                    
-                    # With Client API and Pydantic schema, response.parsed is already the object
-                    return response.parsed
                 except Exception as client_e:
                     logger.debug(f"Client API structured gen failed: {client_e}, falling back")
             
             # Fallback to GenerativeModel
             model = self.flash_model if model_type == "flash" else self.pro_model
             
+            # Configure generation to use JSON mode
+            generation_config = self._generation_config(
+                temperature,
+                response_mime_type="application/json",
+                response_schema=response_schema,
+                **kwargs
+            )
+            
+            # Convert messages to Gemini format
+            history, user_message, _ = _format_messages(messages)
+            
             # Handle system instruction
             if system_instruction:
                 try:
-                    model = genai.GenerativeModel(
-                        model_name=model_name,
-                        system_instruction=system_instruction
-                    )
+                    model = self._get_model(model_name, system_instruction)
                 except:
                     # Prepend to prompt if model init fails
                     if user_message:
@@ -591,68 +1023,83 @@ class GeminiService:
             
             # For GenerativeModel, we get a JSON string text.
             # If response_schema was a Pydantic class, we need to parse it manually
-            import json
-            json_text = response.text
-            parsed_dict = json.loads(json_text)
-            
-            # If a Pydantic model class was passed, instantiate it
-            if hasattr(response_schema, 'model_validate'):
-                return response_schema.model_validate(parsed_dict)
-            return parsed_dict
+            json_text = _fast_text(response)
+            return _parse_structured(json_text, response_schema), json_text
             
         except Exception as e:
             logger.error(f"Error in generate_structured: {str(e)}")
             raise
+    
+    def _generate_structured_client(
+        self,
+        model_name: str,
+        contents: List[Any],
+        response_schema: Any,
+        system_instruction: Optional[str],
+        temperature: float
+    ) -> Tuple[Any, str]:
+        """Structured generation through the Client API, returning the parsed object and its JSON text."""
+        response = self.client.models.generate_content(
+            model=model_name,
+            contents=contents,
+            config=genai_client_module.types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=response_schema,
+                temperature=temperature,
+                system_instruction=system_instruction
+            )
+        )
+        # With Client API and Pydantic schema, response.parsed is already the object
+        return response.parsed, _fast_text(response)
 
 
 # Global instance - initialize lazily to avoid blocking server startup
 _gemini_service_instance: Optional[GeminiService] = None
+_gemini_service_lock = threading.Lock()
 
 
 def get_gemini_service() -> GeminiService:
     """Get or create the global Gemini service instance (lazy initialization)."""
     global _gemini_service_instance
-    if _gemini_service_instance is None:
-        logger.info("Initializing Gemini service (lazy initialization)...")
+    if _gemini_service_instance is not None:
+        return _gemini_service_instance
+    
+    # Concurrent first requests must not each build a service
+    with _gemini_service_lock:
+        if _gemini_service_instance is None:
+            logger.info("Initializing Gemini service (lazy initialization)...")
+            try:
+                _gemini_service_instance = GeminiService()
+                logger.info("✅ Gemini service initialized successfully")
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize Gemini service: {e}")
+                import traceback
+                logger.error(f"Error traceback:\n{traceback.format_exc()}")
+                # Check if API key is accessible
+                if not settings.gemini_api_key:
+                    logger.error("⚠️ GEMINI_API_KEY is not set in environment variables!")
+                else:
+                    logger.info(f"GEMINI_API_KEY is set (length: {len(settings.gemini_api_key)})")
+                raise
+    return _gemini_service_instance
+
+
+class LazyGeminiService:
+    """Proxy that creates the Gemini service on first attribute access."""
+    
+    def __getattr__(self, name):
         try:
-            _gemini_service_instance = GeminiService()
-            logger.info("✅ Gemini service initialized successfully")
+            return getattr(get_gemini_service(), name)
         except Exception as e:
-            logger.error(f"❌ Failed to initialize Gemini service: {e}")
+            logger.error(f"Failed to initialize Gemini service on first use: {e}")
             import traceback
             logger.error(f"Error traceback:\n{traceback.format_exc()}")
-            # Check if API key is accessible
-            if not settings.gemini_api_key:
-                logger.error("⚠️ GEMINI_API_KEY is not set in environment variables!")
-            else:
-                logger.info(f"GEMINI_API_KEY is set (length: {len(settings.gemini_api_key)})")
+            # Check if it's an API key issue
+            if "api key" in str(e).lower() or "GEMINI_API_KEY" in str(e):
+                logger.error("⚠️ CRITICAL: GEMINI_API_KEY is missing or invalid!")
+                raise ValueError(f"Gemini API key configuration error: {e}. Please check Cloud Run secrets.")
             raise
-    return _gemini_service_instance
-
 
-# Try to initialize at import time, but don't fail if it doesn't work
-# This allows the server to start even if Gemini init fails
-try:
-    gemini_service = GeminiService()
-    logger.info("Gemini service initialized at import time")
-except Exception as e:
-    logger.warning(f"Gemini service initialization failed at import time: {e}")
-    logger.info("Will use lazy initialization - server can still start")
-    import traceback
-    logger.debug(f"Initialization error traceback:\n{traceback.format_exc()}")
-    # Create a proxy that initializes on first use
-    class LazyGeminiService:
-        def __getattr__(self, name):
-            try:
-                return getattr(get_gemini_service(), name)
-            except Exception as e:
-                logger.error(f"Failed to initialize Gemini service on first use: {e}")
-                import traceback
-                logger.error(f"Error traceback:\n{traceback.format_exc()}")
-                # Check if it's an API key issue
-                if "api key" in str(e).lower() or "GEMINI_API_KEY" in str(e):
-                    logger.error("⚠️ CRITICAL: GEMINI_API_KEY is missing or invalid!")
-                    raise ValueError(f"Gemini API key configuration error: {e}. Please check Cloud Run secrets.")
-                raise
-    gemini_service = LazyGeminiService()
 
+# Nothing touches the network or SDK configuration until a request needs Gemini
+gemini_service = LazyGeminiService()
@@ -1,14 +1,16 @@
 """Google Search Grounding service."""
 
+import importlib.util
 from typing import Dict, List, Optional
 from loguru import logger
 
+# aiplatform takes over a second to import, so it is only imported when a
+# project is configured and the service actually initializes Vertex AI
 try:
-    from google.cloud import aiplatform
-    from google.cloud.aiplatform.gapic.schema import predict
-    GROUNDING_AVAILABLE = True
-except ImportError:
+    GROUNDING_AVAILABLE = importlib.util.find_spec("google.cloud.aiplatform") is not None
+except ModuleNotFoundError:
     GROUNDING_AVAILABLE = False
+if not GROUNDING_AVAILABLE:
     logger.warning("Google Search Grounding not available")
 
 from config.settings import settings
@@ -23,6 +25,7 @@ class GroundingService:
         
         if self.available:
             try:
+                from google.cloud import aiplatform
                 aiplatform.init(
                     project=settings.google_cloud_project_id,
                     location=settings.google_cloud_region
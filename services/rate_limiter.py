@@ -0,0 +1,68 @@
+"""Client-side rate limiting for Gemini requests."""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """
+    Blocks callers until a request fits under requests-per-minute and tokens-per-minute limits.
+
+    Both budgets refill continuously, so throttling happens before a request
+    is sent instead of after the API rejects it with a 429.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        """
+        Create the bucket, starting full.
+
+        Args:
+            rpm: Requests allowed per minute (0 for no limit)
+            tpm: Tokens allowed per minute (0 for no limit)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int):
+        """
+        Wait until one request of the given size can be sent, then deduct it.
+
+        Args:
+            tokens: Estimated tokens for the request (prompt plus output)
+        """
+        # A request bigger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.tpm)
+        with self._condition:
+            while True:
+                self._refill()
+                requests_short = 1 - self._requests if self.rpm else 0.0
+                tokens_short = tokens - self._tokens if self.tpm else 0.0
+                if requests_short <= 0 and tokens_short <= 0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    return
+                wait = max(
+                    requests_short * 60 / self.rpm if requests_short > 0 else 0.0,
+                    tokens_short * 60 / self.tpm if tokens_short > 0 else 0.0
+                )
+                self._condition.wait(wait)
+
+    @contextmanager
+    def reserve(self, estimated_tokens: int):
+        """Context manager form of acquire()."""
+        self.acquire(estimated_tokens)
+        yield
@@ -1,14 +1,60 @@
 """Persistence interface for vector store."""
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
+import hashlib
 import json
+import os
+import threading
+import numpy as np
 from loguru import logger
 
+# orjson serializes and parses the profile file several times faster than json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    logger.debug("orjson not installed; using json for vector store persistence")
+
+from config.settings import settings
 from data.schemas import PeerProfile
 
 
+# Writes are buffered in 1 MiB chunks, so many small serialized records become few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def write_atomic(file_path: Path, write: Callable[[BinaryIO], Any]) -> bool:
+    """
+    Write a file via a synced temp file and rename, so a crash never leaves it truncated.
+    
+    Args:
+        file_path: Destination file
+        write: Writes the full contents to the open binary temp file; returning
+            False discards the temp file and leaves the destination untouched
+            
+    Returns:
+        True if the destination was replaced, False if the write was discarded
+    """
+    # Unique per writing thread, so concurrent saves never share a temp file
+    tmp_path = file_path.with_name(f"{file_path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            if write(f) is False:
+                f.close()
+                tmp_path.unlink()
+                return False
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        return True
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 class VectorPersistence(ABC):
     """Abstract base class for vector store persistence."""
     
@@ -38,11 +84,27 @@ class VectorPersistence(ABC):
             List of profile dictionaries (without embeddings, embeddings generated on load)
         """
         pass
+    
+    def load_embeddings(self, path: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Load the embeddings saved with the profiles, if the backend stores them.
+        
+        Args:
+            path: Storage path/location
+            
+        Returns:
+            (profile IDs, float32 matrix with one row per ID), or None if unavailable
+        """
+        return None
 
 
 class JSONFilePersistence(VectorPersistence):
     """JSON file-based persistence implementation."""
     
+    def __init__(self):
+        # Digest of the last bytes written per path, to skip rewriting unchanged stores
+        self._saved_digests: Dict[str, bytes] = {}
+    
     def save(self, profiles: List[PeerProfile], path: str) -> bool:
         """
         Save profiles to JSON file.
@@ -58,20 +120,23 @@ class JSONFilePersistence(VectorPersistence):
             file_path = Path(path)
             file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Convert profiles to JSON-serializable format
-            data = []
-            for profile in profiles:
-                profile_dict = {
-                    "profile_id": profile.profile_id,
-                    "struggle_text": profile.struggle_text,
-                    "academic_stage": profile.academic_stage,
-                    "research_area": profile.research_area,
-                    "anonymized_metadata": profile.anonymized_metadata,
-                }
-                data.append(profile_dict)
+            embeddings_path, ids_path = self._embedding_paths(file_path)
+            previous_digest = self._saved_digests.get(str(file_path))
+            have_files = file_path.exists() and (ids_path.exists() or not profiles)
             
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            def write(f: BinaryIO) -> bool:
+                digest = self._stream_profiles(profiles, f)
+                if digest == previous_digest and have_files:
+                    return False
+                # Embeddings go first, so a store never lists profiles its sidecar lacks
+                if profiles:
+                    self._save_embeddings(profiles, embeddings_path, ids_path)
+                self._saved_digests[str(file_path)] = digest
+                return True
+            
+            if not write_atomic(file_path, write):
+                logger.debug(f"Profiles unchanged since last save, skipping write to {path}")
+                return True
             
             logger.info(f"Saved {len(profiles)} profiles to {path}")
             return True
@@ -79,6 +144,59 @@ class JSONFilePersistence(VectorPersistence):
             logger.error(f"Error saving profiles to {path}: {str(e)}")
             return False
     
+    @staticmethod
+    def _stream_profiles(profiles: List[PeerProfile], f: BinaryIO) -> bytes:
+        """
+        Write profiles as a compact JSON array one record at a time.
+        
+        Only one serialized profile is held in memory at once, rather than the
+        whole list and its full JSON text.
+        
+        Args:
+            profiles: Profiles to write
+            f: Binary file to write to
+            
+        Returns:
+            blake2b digest of the bytes written
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        
+        def emit(chunk: bytes):
+            f.write(chunk)
+            hasher.update(chunk)
+        
+        emit(b'[')
+        for i, profile in enumerate(profiles):
+            profile_dict = {
+                "profile_id": profile.profile_id,
+                "struggle_text": profile.struggle_text,
+                "academic_stage": profile.academic_stage,
+                "research_area": profile.research_area,
+                "anonymized_metadata": profile.anonymized_metadata,
+            }
+            # Compact output: pretty-printing dominates serialization time for large stores
+            if HAS_ORJSON:
+                record = orjson.dumps(profile_dict)
+            else:
+                record = json.dumps(profile_dict, separators=(',', ':')).encode('utf-8')
+            emit(b',' + record if i else record)
+        emit(b']\n')
+        return hasher.digest()
+    
+    @staticmethod
+    def _embedding_paths(file_path: Path) -> Tuple[Path, Path]:
+        """Sidecar files holding the embedding matrix and the profile ID of each row."""
+        return file_path.with_suffix(".embeddings.npy"), file_path.with_suffix(".embedding_ids.json")
+    
+    def _save_embeddings(self, profiles: List[PeerProfile], embeddings_path: Path, ids_path: Path):
+        matrix = np.stack([profile.embedding for profile in profiles])
+        ids = {
+            "embedding_model": settings.embedding_model,
+            "profile_ids": [profile.profile_id for profile in profiles],
+        }
+        write_atomic(embeddings_path, lambda f: np.save(f, matrix))
+        write_atomic(ids_path, lambda f: f.write(json.dumps(ids).encode('utf-8')))
+    
     def load(self, path: str) -> List[dict]:
         """
         Load profiles from JSON file.
@@ -95,12 +213,46 @@ class JSONFilePersistence(VectorPersistence):
                 logger.warning(f"Persistence file not found: {path}")
                 return []
             
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            if HAS_ORJSON:
+                data = orjson.loads(file_path.read_bytes())
+            else:
+                with open(file_path, 'r') as f:
+                    data = json.load(f)
             
             logger.info(f"Loaded {len(data)} profiles from {path}")
             return data
         except Exception as e:
             logger.error(f"Error loading profiles from {path}: {str(e)}")
             return []
-
+    
+    def load_embeddings(self, path: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Load the embedding sidecar written by save().
+        
+        Args:
+            path: Path to JSON file
+            
+        Returns:
+            (profile IDs, float32 matrix with one row per ID), or None if the sidecar
+            is missing, inconsistent, or from another embedding model
+        """
+        embeddings_path, ids_path = self._embedding_paths(Path(path))
+        if not embeddings_path.exists() or not ids_path.exists():
+            return None
+        
+        try:
+            ids = json.loads(ids_path.read_bytes())
+            if ids.get("embedding_model") != settings.embedding_model:
+                logger.info(f"Ignoring embeddings in {embeddings_path}: saved for another embedding model")
+                return None
+            profile_ids = ids["profile_ids"]
+            # Memory-mapped: rows are paged in as they are copied into the store
+            matrix = np.load(embeddings_path, mmap_mode='r')
+            if matrix.ndim != 2 or matrix.shape[0] != len(profile_ids):
+                logger.warning(f"Ignoring embeddings in {embeddings_path}: row count doesn't match profile IDs")
+                return None
+            logger.info(f"Loaded {len(profile_ids)} embeddings from {embeddings_path}")
+            return profile_ids, matrix.astype(np.float32, copy=False)
+        except Exception as e:
+            logger.warning(f"Error loading embeddings from {embeddings_path}: {str(e)}")
+            return None
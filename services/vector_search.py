@@ -1,18 +1,26 @@
 """Vertex AI Vector Search integration (for web app)."""
 
-from typing import List, Dict, Optional
+import asyncio
+import functools
+import importlib.util
+from typing import List, Dict, Optional, Set, Tuple
 from loguru import logger
 
+# aiplatform takes over a second to import, so it is only imported when the
+# Vertex AI index is actually used
 try:
-    from google.cloud import aiplatform
-    VERTEX_AI_AVAILABLE = True
-except ImportError:
+    VERTEX_AI_AVAILABLE = importlib.util.find_spec("google.cloud.aiplatform") is not None
+except ModuleNotFoundError:
     VERTEX_AI_AVAILABLE = False
+if not VERTEX_AI_AVAILABLE:
     logger.warning("Vertex AI not available, will use local vector store")
 
 from config.settings import settings
 from data.schemas import PeerProfile, MatchResult
-from services.embedding_service import embedding_service
+from services.embedding_service import get_embedding_service
+
+# Seconds search_similar_async waits for other queries to share a find_neighbors call
+NEIGHBOR_BATCH_DELAY = 0.005
 
 
 class VectorSearchService:
@@ -23,6 +31,8 @@ class VectorSearchService:
         self.index_endpoint = None
         self.deployed_index_id = settings.vertex_ai_matching_engine_deployed_index
         self.initialized = False
+        self._pending_queries: List[Tuple[Dict, asyncio.Future]] = []
+        self._neighbor_sends: Set[asyncio.Task] = set()
         
         if settings.use_local_vector_store or not VERTEX_AI_AVAILABLE:
             logger.info("Using local vector store instead of Vertex AI")
@@ -44,6 +54,7 @@ class VectorSearchService:
                 self.use_local = True
                 return
             
+            from google.cloud import aiplatform
             aiplatform.init(
                 project=settings.google_cloud_project_id,
                 location=settings.google_cloud_region
@@ -93,51 +104,135 @@ class VectorSearchService:
             return []
         
         try:
-            embedding = embedding_service.generate_embedding(query_text)
-            query = {
-                "datapoint": {
-                    "datapoint_id": "query",
-                    "feature_vector": embedding,
-                },
-                "neighbor_count": top_k,
-            }
-            
+            embedding = get_embedding_service().embed_query_normalized(query_text)
             response = self.index_endpoint.find_neighbors(
                 deployed_index_id=self.deployed_index_id,
-                queries=[query]
+                queries=[self._build_query(embedding, top_k)]
             )
             
             if not response:
                 return []
             
-            neighbors = response[0].neighbors
-            matches: List[MatchResult] = []
-            
-            for neighbor in neighbors:
-                datapoint = getattr(neighbor, "datapoint", None)
-                distance = getattr(neighbor, "distance", 0.0) or 0.0
-                similarity = max(0.0, 1.0 - distance)
-                
-                if similarity < threshold:
-                    continue
-                
-                profile_id = getattr(datapoint, "datapoint_id", "unknown") if datapoint else "unknown"
-                
-                restricts = getattr(datapoint, "restricts", None) or []
-                if restricts and getattr(restricts[0], "allow_tokens", None):
-                    match_reason = restricts[0].allow_tokens[0]
-                else:
-                    match_reason = "Similar struggle detected via Vertex AI"
-                
-                matches.append(MatchResult(
-                    profile_id=profile_id,
-                    similarity_score=similarity,
-                    match_reason=match_reason,
-                    suggested_connection=True
-                ))
+            return self._to_matches(response[0].neighbors, threshold)
+        except Exception as e:
+            logger.error(f"Vertex AI vector search failed: {str(e)}")
+            return []
+    
+    async def search_similar_async(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        threshold: float = 0.7
+    ) -> List[MatchResult]:
+        """
+        Search for similar peer profiles without blocking the event loop.
+        
+        The embedding and find_neighbors calls run on worker threads, and queries
+        arriving within NEIGHBOR_BATCH_DELAY of each other share one find_neighbors RPC.
+        
+        Args:
+            query_text: Query text to find similar struggles
+            top_k: Number of results to return
+            threshold: Minimum similarity threshold
             
-            return matches
+        Returns:
+            List of match results
+        """
+        if self.use_local:
+            logger.warning("Use vector_search_local.py for local search")
+            return []
+        
+        if not self.initialized or not self.index_endpoint:
+            logger.error("Vertex AI index endpoint not initialized")
+            return []
+        
+        try:
+            loop = asyncio.get_running_loop()
+            embedding = await loop.run_in_executor(
+                None, get_embedding_service().embed_query_normalized, query_text
+            )
+            neighbors = await self._find_neighbors_batched(self._build_query(embedding, top_k))
+            return self._to_matches(neighbors, threshold)
         except Exception as e:
             logger.error(f"Vertex AI vector search failed: {str(e)}")
             return []
-
+    
+    async def _find_neighbors_batched(self, query: Dict) -> List:
+        """Queue a query for the next shared find_neighbors call and wait for its neighbors."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_queries.append((query, future))
+        if len(self._pending_queries) == 1:
+            # First query of a batch waits briefly for others, then sends them
+            # all. The send is its own task and starts even if this query is
+            # cancelled, so the others never wait on a leader that is gone.
+            try:
+                await asyncio.sleep(NEIGHBOR_BATCH_DELAY)
+            finally:
+                batch, self._pending_queries = self._pending_queries, []
+                send = asyncio.ensure_future(self._send_neighbor_batch(batch))
+                self._neighbor_sends.add(send)
+                send.add_done_callback(self._neighbor_sends.discard)
+        return await future
+    
+    async def _send_neighbor_batch(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    self.index_endpoint.find_neighbors,
+                    deployed_index_id=self.deployed_index_id,
+                    queries=[query for query, _ in batch]
+                )
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        response = response or []
+        for i, (_, future) in enumerate(batch):
+            # A cancelled query's future is already done
+            if not future.done():
+                future.set_result(response[i].neighbors if i < len(response) else [])
+    
+    @staticmethod
+    def _build_query(embedding, top_k: int) -> Dict:
+        """Build a find_neighbors query for a query embedding."""
+        return {
+            "datapoint": {
+                "datapoint_id": "query",
+                "feature_vector": embedding.tolist(),
+            },
+            "neighbor_count": top_k,
+        }
+    
+    @staticmethod
+    def _to_matches(neighbors, threshold: float) -> List[MatchResult]:
+        """Convert find_neighbors results to match results above the threshold."""
+        matches: List[MatchResult] = []
+        
+        for neighbor in neighbors:
+            datapoint = getattr(neighbor, "datapoint", None)
+            distance = getattr(neighbor, "distance", 0.0) or 0.0
+            similarity = max(0.0, 1.0 - distance)
+            
+            if similarity < threshold:
+                continue
+            
+            profile_id = getattr(datapoint, "datapoint_id", "unknown") if datapoint else "unknown"
+            
+            restricts = getattr(datapoint, "restricts", None) or []
+            if restricts and getattr(restricts[0], "allow_tokens", None):
+                match_reason = restricts[0].allow_tokens[0]
+            else:
+                match_reason = "Similar struggle detected via Vertex AI"
+            
+            matches.append(MatchResult(
+                profile_id=profile_id,
+                similarity_score=similarity,
+                match_reason=match_reason,
+                suggested_connection=True
+            ))
+        
+        return matches
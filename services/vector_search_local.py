@@ -1,24 +1,59 @@
 """Local vector search using FAISS (for Kaggle notebook)."""
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import hashlib
+import importlib.util
 import json
+import threading
+import weakref
 import numpy as np
 from pathlib import Path
 from loguru import logger
 import uuid
 from datetime import datetime
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    FAISS_AVAILABLE = False
+# FAISS is only imported once an index is built or loaded, so processes that
+# never search don't pay its import time and memory
+FAISS_AVAILABLE = importlib.util.find_spec("faiss") is not None
+if not FAISS_AVAILABLE:
     logger.warning("FAISS not available, falling back to simple cosine similarity")
 
+_faiss = None
+
+
+def _get_faiss():
+    """Import FAISS on first use."""
+    global _faiss
+    if _faiss is None:
+        import faiss
+        _faiss = faiss
+    return _faiss
+
 from config.settings import settings
 from data.schemas import PeerProfile, MatchResult
-from services.embedding_service import embedding_service
-from services.vector_persistence import JSONFilePersistence
+from services.embedding_service import get_embedding_service
+from services.vector_persistence import JSONFilePersistence, write_atomic
+
+
+# Candidate rows compared against the stored matrix per product in batch deduplication
+DEDUP_BLOCK_ROWS = 1024
+
+# Stores not yet closed, flushed once at interpreter exit; held weakly so a
+# store that is dropped without close() can still be garbage collected
+_live_stores: "weakref.WeakSet[LocalVectorSearch]" = weakref.WeakSet()
+
+
+def _close_live_stores():
+    for store in list(_live_stores):
+        try:
+            store.close()
+        except Exception as e:
+            logger.warning(f"Final vector store save failed: {e}")
+
+
+atexit.register(_close_live_stores)
 
 
 class LocalVectorSearch:
@@ -26,18 +61,43 @@ class LocalVectorSearch:
     
     def __init__(self, persistence_path: Optional[str] = None, load_persisted_on_init: bool = False):
         self.profiles: Dict[str, PeerProfile] = {}
-        self.embeddings: List[List[float]] = []
-        self.profile_ids: List[str] = []
+        # Unit-norm float32 copies of the profile embeddings, so similarity is a dot
+        # product; int8-quantized instead when settings.embedding_quantize is "int8".
+        # Rows are packed into one contiguous matrix that grows geometrically.
+        self._embedding_matrix: Optional[np.ndarray] = None
+        self._embedding_count = 0
+        # Profile ID per embedding row (None once removed); rows double as FAISS IDs
+        self.profile_ids: List[Optional[str]] = []
+        self._profile_rows: Dict[str, int] = {}
+        self._removed_rows: List[int] = []
+        # Stored profiles per normalized-text digest, so exact reposts are rejected
+        # with a dict lookup before any similarity scan
+        self._text_counts: Dict[bytes, int] = {}
         self.index = None
-        self.use_faiss = FAISS_AVAILABLE
+        # Guards the matrix, the profile maps and the FAISS index: profiles are
+        # added from the capture thread while request threads search
+        self._lock = threading.RLock()
+        self.quantize_i8 = settings.embedding_quantize == "int8"
+        # FAISS needs float vectors, so int8 storage always uses brute-force search
+        self.use_faiss = FAISS_AVAILABLE and not self.quantize_i8
         
         self.persistence_path = persistence_path or settings.vector_store_persistence_path
         self.persistence = JSONFilePersistence()
         self.additions_since_save = 0
         self._persisted_data_loaded = False
+        # Autosaves run on one background thread so adds never wait on disk I/O
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-store-save")
+        self._save_lock = threading.Lock()
+        self._save_in_flight = False
+        # Held while writing, so a save that starts later always writes the newer state
+        self._write_lock = threading.Lock()
+        self._saved_index_fingerprint: Optional[str] = None
+        _live_stores.add(self)
         
         if self.use_faiss:
             logger.info("Using FAISS for vector search")
+        elif self.quantize_i8:
+            logger.info("Using int8 cosine similarity for vector search")
         else:
             logger.info("Using simple cosine similarity for vector search")
         
@@ -52,30 +112,161 @@ class LocalVectorSearch:
             logger.debug(f"Rejected profile {profile.profile_id}: validation failed (text too short or missing embedding)")
             return False
         
-        if not skip_deduplication:
-            if self._is_duplicate(profile):
-                logger.debug(f"Rejected profile {profile.profile_id}: duplicate (similarity above threshold)")
-                return False
+        # Normalized once and shared by the duplicate check and the stored row
+        normalized = get_embedding_service().normalize(profile.embedding)
         
+        with self._lock:
+            if not skip_deduplication:
+                if self._text_key(profile.struggle_text) in self._text_counts:
+                    logger.debug(f"Rejected profile {profile.profile_id}: duplicate (identical text)")
+                    return False
+                if self._is_duplicate(normalized):
+                    logger.debug(f"Rejected profile {profile.profile_id}: duplicate (similarity above threshold)")
+                    return False
+            
+            self._add_normalized(profile, normalized)
+        return True
+    
+    def _add_normalized(self, profile: PeerProfile, normalized: np.ndarray):
+        """Store an accepted profile given its unit-norm embedding, indexing and autosaving as needed."""
+        with self._lock:
+            self._append_embedding(self._to_stored_vector(normalized))
+            self._register_profile(profile)
+            
+            if self.use_faiss:
+                self._index_new_embedding()
+            
+            self.additions_since_save += 1
+            if self.additions_since_save >= settings.auto_save_interval:
+                self._schedule_save()
+    
+    def _register_profile(self, profile: PeerProfile):
+        """Record a profile for the newest unassigned embedding row, replacing any profile with the same ID."""
+        if profile.profile_id in self._profile_rows:
+            self.remove_peer_profile(profile.profile_id)
+        self._profile_rows[profile.profile_id] = len(self.profile_ids)
         self.profiles[profile.profile_id] = profile
-        self.embeddings.append(profile.embedding)
         self.profile_ids.append(profile.profile_id)
+        text_key = self._text_key(profile.struggle_text)
+        self._text_counts[text_key] = self._text_counts.get(text_key, 0) + 1
+    
+    @staticmethod
+    def _text_key(text: str) -> bytes:
+        """Digest of a struggle text, ignoring case and whitespace differences."""
+        return hashlib.blake2b(" ".join(text.lower().split()).encode('utf-8'), digest_size=16).digest()
+    
+    def remove_peer_profile(self, profile_id: str) -> bool:
+        """
+        Remove a profile from the store and the FAISS index.
         
-        if self.use_faiss and self.embeddings:
-            self._build_faiss_index()
-        
-        self.additions_since_save += 1
-        if self.additions_since_save >= settings.auto_save_interval:
-            self.save_to_json()
-            self.additions_since_save = 0
-        
-        return True
+        Args:
+            profile_id: ID of the profile to remove
+            
+        Returns:
+            True if the profile was stored, False otherwise
+        """
+        with self._lock:
+            row = self._profile_rows.pop(profile_id, None)
+            if row is None:
+                return False
+            
+            profile = self.profiles.pop(profile_id)
+            text_key = self._text_key(profile.struggle_text)
+            if self._text_counts[text_key] > 1:
+                self._text_counts[text_key] -= 1
+            else:
+                del self._text_counts[text_key]
+            self.profile_ids[row] = None
+            self._removed_rows.append(row)
+            # A zero row never reaches the deduplication or search thresholds
+            self._embedding_matrix[row] = 0
+            if self.index is not None:
+                try:
+                    self.index.remove_ids(np.array([row], dtype=np.int64))
+                except RuntimeError:
+                    # HNSW graphs can't delete; searches skip the removed row instead
+                    pass
+            
+            self.additions_since_save += 1
+            return True
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Stored embeddings, one row per profile (a view of the packed matrix)."""
+        if self._embedding_matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._embedding_matrix[:self._embedding_count]
+    
+    def _append_embedding(self, vector: np.ndarray):
+        """Add a row to the embedding matrix."""
+        self._append_embeddings(vector[np.newaxis])
+    
+    def _append_embeddings(self, rows: np.ndarray):
+        """Add rows to the embedding matrix, doubling its capacity as often as needed to fit them."""
+        needed = self._embedding_count + rows.shape[0]
+        if self._embedding_matrix is None:
+            capacity = 64
+            while capacity < needed:
+                capacity *= 2
+            self._embedding_matrix = np.empty((capacity, rows.shape[1]), dtype=rows.dtype)
+        elif needed > self._embedding_matrix.shape[0]:
+            capacity = self._embedding_matrix.shape[0]
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty((capacity, self._embedding_matrix.shape[1]), dtype=self._embedding_matrix.dtype)
+            grown[:self._embedding_count] = self._embedding_matrix[:self._embedding_count]
+            self._embedding_matrix = grown
+        self._embedding_matrix[self._embedding_count:needed] = rows
+        self._embedding_count = needed
+    
+    def _to_stored_vector(self, normalized: np.ndarray) -> np.ndarray:
+        """Convert a unit-norm embedding to the form kept in self.embeddings."""
+        if self.quantize_i8:
+            return get_embedding_service().quantize_i8(normalized)[0]
+        return normalized
+    
+    def _to_stored_rows(self, normalized: np.ndarray) -> np.ndarray:
+        """Convert a matrix of unit-norm embeddings to the form kept in self.embeddings."""
+        if self.quantize_i8:
+            return np.stack([get_embedding_service().quantize_i8(row)[0] for row in normalized])
+        return normalized
+    
+    def _similarities(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Similarity of a unit-norm float32 query to every stored embedding."""
+        if self.quantize_i8:
+            return get_embedding_service().batch_cosine_i8(
+                get_embedding_service().quantize_i8(query_embedding)[0],
+                self.embeddings
+            )
+        return get_embedding_service().batch_similarity(query_embedding, self.embeddings)
     
     def add_profiles_batch(self, profiles: List[PeerProfile], skip_deduplication: bool = False):
+        """
+        Add many profiles at once, deduplicating with matrix products and indexing them together.
+        
+        Args:
+            profiles: Profiles to add
+            skip_deduplication: If True, skip duplicate checks (for initial loading)
+        """
+        valid = [profile for profile in profiles if self._validate_profile(profile)]
         added_count = 0
-        for profile in profiles:
-            if self.add_peer_profile(profile, skip_deduplication=skip_deduplication):
-                added_count += 1
+        if valid:
+            normalized = get_embedding_service().normalize_rows(
+                np.stack([profile.embedding for profile in valid])
+            )
+            with self._lock:
+                keep = np.ones(len(valid), dtype=bool)
+                if not skip_deduplication:
+                    keep = self._batch_not_duplicate(normalized)
+                
+                accepted = [profile for profile, kept in zip(valid, keep) if kept]
+                if accepted:
+                    self._append_embeddings(self._to_stored_rows(normalized[keep]))
+                    for profile in accepted:
+                        self._register_profile(profile)
+                    if self.use_faiss:
+                        self._index_new_embeddings(len(accepted))
+            added_count = len(accepted)
         
         logger.info(f"Added {added_count} profiles (skipped {len(profiles) - added_count} duplicates/invalid)")
         
@@ -84,22 +275,64 @@ class LocalVectorSearch:
             self.additions_since_save = 0
     
     def _build_faiss_index(self):
-        if not self.use_faiss or not self.embeddings:
+        if not self.use_faiss or not self._embedding_count:
             return
         
         try:
-            dimension = len(self.embeddings[0])
-            self.index = faiss.IndexFlatIP(dimension)
+            faiss = _get_faiss()
+            dimension = self.embeddings.shape[1]
+            embeddings_array = np.ascontiguousarray(self.embeddings)
+            # FAISS IDs are embedding rows, so removals don't shift other profiles
+            ids = np.arange(self._embedding_count, dtype=np.int64)
+            if self._removed_rows:
+                ids = np.delete(ids, self._removed_rows)
+                embeddings_array = embeddings_array[ids]
             
-            embeddings_array = np.array(self.embeddings, dtype=np.float32)
-            faiss.normalize_L2(embeddings_array)
+            # Stored embeddings are unit-norm, so inner product is cosine similarity.
+            # Exact search is cheapest for small stores; past hnsw_min_vectors an
+            # HNSW graph keeps top-k queries roughly logarithmic in the store size,
+            # while "sq8" keeps exact search but stores 8-bit codes (4x smaller).
+            index_type = settings.vector_index_type
+            if index_type == "flat" or self._embedding_count < settings.hnsw_min_vectors:
+                base_index = faiss.IndexFlatIP(dimension)
+            elif index_type == "sq8":
+                base_index = faiss.IndexScalarQuantizer(
+                    dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+                )
+                # Learns per-dimension value ranges from the vectors stored so far
+                base_index.train(embeddings_array)
+            else:
+                base_index = faiss.IndexHNSWFlat(dimension, settings.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+                base_index.hnsw.efConstruction = settings.hnsw_ef_construction
+                base_index.hnsw.efSearch = settings.hnsw_ef_search
             
-            self.index.add(embeddings_array)
+            self.index = faiss.IndexIDMap2(base_index)
+            self.index.add_with_ids(embeddings_array, ids)
             logger.info(f"FAISS index built with {len(self.embeddings)} vectors")
         except Exception as e:
             logger.error(f"Error building FAISS index: {str(e)}")
             self.use_faiss = False
     
+    def _index_new_embedding(self):
+        """Add the newest embedding to the FAISS index, rebuilding only when the index type changes."""
+        self._index_new_embeddings(1)
+    
+    def _index_new_embeddings(self, count: int):
+        """Add the newest count embeddings to the FAISS index, rebuilding only when the index type changes."""
+        previous_count = self._embedding_count - count
+        if self.index is None or previous_count < settings.hnsw_min_vectors <= self._embedding_count:
+            self._build_faiss_index()
+            return
+        
+        try:
+            self.index.add_with_ids(
+                self.embeddings[previous_count:],
+                np.arange(previous_count, self._embedding_count, dtype=np.int64)
+            )
+        except Exception as e:
+            logger.error(f"Error adding to FAISS index: {str(e)}")
+            self._build_faiss_index()
+    
     def search_similar(
         self,
         query_text: str,
@@ -111,77 +344,65 @@ class LocalVectorSearch:
         if not self._persisted_data_loaded:
             logger.debug("Persisted data not loaded yet, skipping lazy load to avoid blocking request")
             # Return empty results instead of blocking
-            if not self.embeddings:
+            if not self._embedding_count:
                 return []
         
-        if not self.embeddings:
+        if not self._embedding_count:
             return []
         
-        # Generate embedding for query
-        query_embedding = embedding_service.generate_embedding(query_text)
+        # Generate embedding for query (outside the lock: it may call the API)
+        query_embedding = get_embedding_service().embed_query_normalized(query_text)
         
-        if self.use_faiss and self.index:
-            return self._search_faiss(query_embedding, top_k, threshold)
-        else:
-            return self._search_cosine(query_embedding, top_k, threshold)
+        with self._lock:
+            if self.use_faiss and self.index:
+                return self._search_faiss(query_embedding, top_k, threshold)
+            else:
+                return self._search_cosine(query_embedding, top_k, threshold)
     
     def _search_faiss(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         top_k: int,
         threshold: float
     ) -> List[MatchResult]:
         """Search using FAISS."""
         try:
-            # Normalize query embedding
             query_array = np.array([query_embedding], dtype=np.float32)
-            faiss.normalize_L2(query_array)
             
-            # Search
-            k = min(top_k, len(self.profiles))
+            # Search; removed rows may still be in an HNSW graph, so ask for enough extra
+            k = min(top_k + len(self._removed_rows), self._embedding_count)
             similarities, indices = self.index.search(query_array, k)
+            similarities, indices = similarities[0], indices[0]
             
-            results = []
-            for i, (similarity, idx) in enumerate(zip(similarities[0], indices[0])):
-                if similarity >= threshold and idx < len(self.profile_ids):
-                    profile_id = self.profile_ids[idx]
-                    profile = self.profiles[profile_id]
-                    
-                    results.append(MatchResult(
-                        profile_id=profile_id,
-                        similarity_score=float(similarity),
-                        match_reason=f"Similar struggle: {profile.struggle_text[:100]}...",
-                        suggested_connection=True
-                    ))
-            
-            return results
+            # HNSW pads with -1 when it finds fewer than k neighbours
+            keep = (similarities >= threshold) & (indices >= 0)
+            if self._removed_rows:
+                keep &= ~np.isin(indices, self._removed_rows)
+            return self._match_results(indices[keep][:top_k].tolist(), similarities[keep][:top_k].tolist())
         except Exception as e:
             logger.error(f"Error in FAISS search: {str(e)}")
             return self._search_cosine(query_embedding, top_k, threshold)
     
     def _search_cosine(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         top_k: int,
         threshold: float
     ) -> List[MatchResult]:
         """Search using cosine similarity."""
-        similarities = []
+        similarities = self._similarities(query_embedding)
+        if self._removed_rows:
+            similarities[self._removed_rows] = -np.inf
         
-        for i, profile_embedding in enumerate(self.embeddings):
-            similarity = embedding_service.cosine_similarity(
-                query_embedding,
-                profile_embedding
-            )
-            if similarity >= threshold:
-                similarities.append((similarity, i))
-        
-        # Sort by similarity (descending)
-        similarities.sort(key=lambda x: x[0], reverse=True)
-        
-        # Get top_k results
+        top = get_embedding_service().top_k_indices(similarities, top_k)
+        top_scores = similarities[top]
+        keep = top_scores >= threshold
+        return self._match_results(top[keep].tolist(), top_scores[keep].tolist())
+    
+    def _match_results(self, indices: List[int], scores: List[float]) -> List[MatchResult]:
+        """Build match results for stored rows, given as parallel lists of row indices and scores."""
         results = []
-        for similarity, idx in similarities[:top_k]:
+        for idx, similarity in zip(indices, scores):
             profile_id = self.profile_ids[idx]
             profile = self.profiles[profile_id]
             
@@ -206,11 +427,13 @@ class LocalVectorSearch:
             with open(json_path, 'r') as f:
                 data = json.load(f)
             
+            # Embed all struggle texts with concurrent batch requests
+            embeddings = get_embedding_service().generate_embeddings_batch(
+                [item['struggle_text'] for item in data]
+            )
+            
             profiles = []
-            for item in data:
-                # Generate embedding for struggle text
-                embedding = embedding_service.generate_embedding(item['struggle_text'])
-                
+            for item, embedding in zip(data, embeddings):
                 profile = PeerProfile(
                     profile_id=item['profile_id'],
                     embedding=embedding,
@@ -229,19 +452,123 @@ class LocalVectorSearch:
             logger.error(f"Error loading profiles from JSON: {str(e)}")
             raise
     
-    def save_to_json(self, path: Optional[str] = None) -> bool:
+    def save_to_json(self, path: Optional[str] = None, save_index: bool = True) -> bool:
         """
         Save current profiles to JSON file.
         
         Args:
             path: Optional custom path, uses default if not provided
+            save_index: Also save the FAISS index beside the default store, so the
+                next load can memory-map it instead of rebuilding
             
         Returns:
             True if successful, False otherwise
         """
         save_path = path or self.persistence_path
-        profiles_list = list(self.profiles.values())
-        return self.persistence.save(profiles_list, save_path)
+        with self._write_lock:
+            # Snapshot under the lock so concurrent saves can't write an older state last
+            with self._lock:
+                profiles_list = list(self.profiles.values())
+            saved = self.persistence.save(profiles_list, save_path)
+        if saved and save_index and save_path == self.persistence_path:
+            self._save_faiss_index()
+        return saved
+    
+    def _faiss_index_paths(self) -> Tuple[Path, Path]:
+        """Saved FAISS index beside the store, and the file recording which profiles it holds."""
+        store_path = Path(self.persistence_path)
+        return store_path.with_suffix(".faiss"), store_path.with_suffix(".faiss.json")
+    
+    def _index_fingerprint(self) -> str:
+        """Identify the index contents: index type, embedding model and profile order."""
+        key = "\0".join([settings.vector_index_type, settings.embedding_model, *self.profile_ids])
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _save_faiss_index(self):
+        """Write the FAISS index if it changed and its rows line up with the saved profile order."""
+        with self._lock:
+            # Removed rows leave gaps the saved profile order doesn't have
+            if not self.use_faiss or self.index is None or self._removed_rows:
+                return
+            faiss = _get_faiss()
+            fingerprint = self._index_fingerprint()
+            if fingerprint == self._saved_index_fingerprint:
+                return
+            
+            index_path, fingerprint_path = self._faiss_index_paths()
+            try:
+                write_atomic(index_path, lambda f: faiss.write_index(self.index, faiss.PyCallbackIOWriter(f.write)))
+                write_atomic(fingerprint_path, lambda f: f.write(json.dumps({"fingerprint": fingerprint}).encode('utf-8')))
+                self._saved_index_fingerprint = fingerprint
+                logger.info(f"Saved FAISS index with {self.index.ntotal} vectors to {index_path}")
+            except Exception as e:
+                logger.warning(f"Could not save FAISS index: {str(e)}")
+    
+    def _load_faiss_index(self) -> bool:
+        """
+        Memory-map the saved FAISS index if it holds exactly the loaded profiles.
+        
+        Returns:
+            True if the saved index is now in use, False if it must be rebuilt
+        """
+        index_path, fingerprint_path = self._faiss_index_paths()
+        if self._removed_rows or not index_path.exists() or not fingerprint_path.exists():
+            return False
+        faiss = _get_faiss()
+        
+        try:
+            fingerprint = json.loads(fingerprint_path.read_bytes()).get("fingerprint")
+            if fingerprint != self._index_fingerprint():
+                return False
+            # Vectors are paged in on demand, so startup doesn't read the whole index
+            index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP)
+            if index.ntotal != self._embedding_count:
+                return False
+        except Exception as e:
+            logger.warning(f"Could not load FAISS index from {index_path}: {str(e)}")
+            return False
+        
+        self.index = index
+        self._saved_index_fingerprint = fingerprint
+        logger.info(f"Loaded FAISS index with {index.ntotal} vectors from {index_path}")
+        return True
+    
+    def _schedule_save(self):
+        """Save a snapshot of the profiles in the background, unless a save is already running."""
+        with self._save_lock:
+            if self._save_in_flight:
+                return
+            self._save_in_flight = True
+        
+        self.additions_since_save = 0
+        try:
+            self._save_executor.submit(self._background_save)
+        except RuntimeError:
+            # Executor already shut down by close(), which saves instead
+            with self._save_lock:
+                self._save_in_flight = False
+    
+    def _background_save(self):
+        try:
+            # The index isn't saved here: writing it while a request adds to it is unsafe
+            self.save_to_json(save_index=False)
+        finally:
+            with self._save_lock:
+                self._save_in_flight = False
+    
+    def _final_flush(self):
+        """Wait for a running autosave and save any additions made since."""
+        self._save_executor.shutdown(wait=True)
+        if self.additions_since_save > 0:
+            self.save_to_json()
+            self.additions_since_save = 0
+        else:
+            self._save_faiss_index()
+    
+    def close(self):
+        """Save any pending additions and stop the autosave thread; also runs at interpreter exit."""
+        self._final_flush()
+        _live_stores.discard(self)
     
     def _load_persisted_data(self):
         """Load persisted data if persistence file exists (lazy - only if not already loaded)."""
@@ -254,13 +581,19 @@ class LocalVectorSearch:
                 logger.info(f"Loading persisted data from {self.persistence_path}...")
                 data = self.persistence.load(self.persistence_path)
                 if data:
-                    # Convert to profiles and add (skip deduplication for initial load)
-                    # Generate embeddings in batches to avoid blocking too long
+                    # Convert to profiles and add (skip deduplication for initial load).
+                    # Embeddings come from the saved sidecar where available; the rest
+                    # are embedded with concurrent batch requests. The rows are then
+                    # added to the embedding matrix and indexed in one go.
+                    items = [item for item in data if item.get('struggle_text')]
+                    if len(items) < len(data):
+                        logger.warning(f"Skipping {len(data) - len(items)} persisted profiles without struggle text")
+                    embeddings = self._persisted_embeddings(items)
+                    
                     profiles = []
-                    batch_size = 3  # Smaller batches for faster response
-                    for i, item in enumerate(data):
+                    rows = []
+                    for item, embedding in zip(items, embeddings):
                         try:
-                            embedding = embedding_service.generate_embedding(item['struggle_text'])
                             profile = PeerProfile(
                                 profile_id=item['profile_id'],
                                 embedding=embedding,
@@ -269,23 +602,20 @@ class LocalVectorSearch:
                                 research_area=item.get('research_area'),
                                 anonymized_metadata=item.get('anonymized_metadata', {})
                             )
-                            profiles.append(profile)
-                            
-                            # Add profile immediately and rebuild index incrementally
-                            self.profiles[profile.profile_id] = profile
-                            self.embeddings.append(profile.embedding)
-                            self.profile_ids.append(profile.profile_id)
-                            
-                            # Rebuild index periodically to make it available sooner
-                            if (i + 1) % batch_size == 0 or (i + 1) == len(data):
-                                if self.use_faiss and self.embeddings:
-                                    self._build_faiss_index()
-                                
-                                if (i + 1) % 5 == 0:
-                                    logger.info(f"Generated embeddings for {i + 1}/{len(data)} profiles...")
                         except Exception as e:
                             logger.warning(f"Failed to load profile {item.get('profile_id', 'unknown')}: {e}")
                             continue
+                        profiles.append(profile)
+                        rows.append(embedding)
+                    
+                    if profiles:
+                        stored_rows = self._to_stored_rows(get_embedding_service().normalize_rows(np.stack(rows)))
+                        with self._lock:
+                            self._append_embeddings(stored_rows)
+                            for profile in profiles:
+                                self._register_profile(profile)
+                            if self.use_faiss and not self._load_faiss_index():
+                                self._build_faiss_index()
                     
                     logger.info(f"Loaded {len(profiles)} profiles from persistence file")
                     self._persisted_data_loaded = True
@@ -298,44 +628,85 @@ class LocalVectorSearch:
         except Exception as e:
             logger.warning(f"Could not load persisted data: {str(e)}")
             self._persisted_data_loaded = True  # Mark as loaded even on error to avoid retrying
-            logger.warning(f"Could not load persisted data: {str(e)}")
-            self._persisted_data_loaded = True  # Mark as loaded even on error to avoid retrying
+    
+    def _persisted_embeddings(self, items: List[Dict[str, Any]]) -> List[np.ndarray]:
+        """Embeddings for persisted profiles, reusing saved ones and embedding only the rest."""
+        saved = self.persistence.load_embeddings(self.persistence_path)
+        saved_rows = {}
+        if saved is not None:
+            saved_ids, saved_matrix = saved
+            saved_rows = {profile_id: saved_matrix[row] for row, profile_id in enumerate(saved_ids)}
+        
+        embeddings = [saved_rows.get(item['profile_id']) for item in items]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            logger.info(f"Generating embeddings for {len(missing)} persisted profiles without saved embeddings")
+            generated = get_embedding_service().generate_embeddings_batch(
+                [items[i]['struggle_text'] for i in missing]
+            )
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+        return embeddings
     
     def _validate_profile(self, profile: PeerProfile) -> bool:
         if len(profile.struggle_text.strip()) < settings.min_struggle_length:
             logger.debug(f"Profile {profile.profile_id} rejected: text too short")
             return False
         
-        if not profile.embedding or len(profile.embedding) == 0:
+        if profile.embedding.size == 0:
             logger.debug(f"Profile {profile.profile_id} rejected: no embedding")
             return False
         
         return True
     
-    def _is_duplicate(self, profile: PeerProfile) -> bool:
-        if not self.embeddings:
+    def _is_duplicate(self, normalized: np.ndarray) -> bool:
+        """Whether a unit-norm embedding is within the deduplication threshold of a stored one."""
+        if not self._embedding_count:
             return False
         
+        return float(self._similarities(normalized).max()) >= settings.deduplication_threshold
+    
+    def _batch_not_duplicate(self, normalized: np.ndarray) -> np.ndarray:
+        """
+        Flag which rows of a batch to keep: those not near a stored embedding or an earlier kept row.
+        
+        Args:
+            normalized: Unit-norm float32 embeddings, one row per candidate profile
+            
+        Returns:
+            Boolean array, True for rows that are not duplicates
+        """
         threshold = settings.deduplication_threshold
+        keep = np.ones(normalized.shape[0], dtype=bool)
         
-        for existing_embedding in self.embeddings:
-            similarity = embedding_service.cosine_similarity(
-                profile.embedding,
-                existing_embedding
-            )
-            if similarity >= threshold:
-                return True
+        if self._embedding_count:
+            if self.quantize_i8:
+                keep = np.array([not self._is_duplicate(row) for row in normalized], dtype=bool)
+            else:
+                # Blocks of rows bound the size of the (rows, stored) similarity matrix
+                for start in range(0, normalized.shape[0], DEDUP_BLOCK_ROWS):
+                    block = normalized[start:start + DEDUP_BLOCK_ROWS]
+                    keep[start:start + DEDUP_BLOCK_ROWS] = (block @ self.embeddings.T).max(axis=1) < threshold
         
-        return False
+        # Within the batch, a row is dropped if it matches any earlier row that was kept
+        within = normalized @ normalized.T
+        kept_rows = []
+        for row in np.flatnonzero(keep):
+            if kept_rows and within[row, kept_rows].max() >= threshold:
+                keep[row] = False
+            else:
+                kept_rows.append(row)
+        return keep
     
     def get_stats(self) -> Dict[str, Any]:
-        return {
-            "total_profiles": len(self.profiles),
-            "total_embeddings": len(self.embeddings),
-            "using_faiss": self.use_faiss,
-            "persistence_path": self.persistence_path,
-            "additions_since_save": self.additions_since_save
-        }
+        with self._lock:
+            return {
+                "total_profiles": len(self.profiles),
+                "total_embeddings": len(self.embeddings),
+                "using_faiss": self.use_faiss,
+                "persistence_path": self.persistence_path,
+                "additions_since_save": self.additions_since_save
+            }
     
     def add_peer_profile_from_session(
         self,
@@ -349,12 +720,22 @@ class LocalVectorSearch:
             logger.debug("Real user data collection disabled")
             return None
         
+        # Cheap rejections come before the embedding call; the embedding itself is
+        # served from the embedding service's cache for repeated texts
+        if len(struggle_text.strip()) < settings.min_struggle_length:
+            logger.debug("Rejected session struggle: text too short")
+            return None
+        if self._text_key(struggle_text) in self._text_counts:
+            logger.debug("Rejected session struggle: duplicate (identical text)")
+            return None
+        
         try:
-            embedding = embedding_service.generate_embedding(struggle_text)
+            embedding = get_embedding_service().generate_embedding(struggle_text)
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             return None
         
+        normalized = get_embedding_service().normalize(embedding)
         profile_id = f"user_{uuid.uuid4().hex[:8]}"
         
         profile = PeerProfile(
@@ -370,9 +751,64 @@ class LocalVectorSearch:
             }
         )
         
-        if self.add_peer_profile(profile, skip_deduplication=False):
-            logger.info(f"Added user profile from session: {profile_id}")
-            return profile_id
-        else:
-            return None
-
+        # Already validated; the duplicate check and the add happen under one
+        # lock so a concurrent capture of the same struggle can't slip between
+        with self._lock:
+            if self._text_key(struggle_text) in self._text_counts or self._is_duplicate(normalized):
+                logger.debug("Rejected session struggle: duplicate (similarity above threshold)")
+                return None
+            self._add_normalized(profile, normalized)
+        logger.info(f"Added user profile from session: {profile_id}")
+        return profile_id
+    
+    def add_peer_profiles_from_sessions(self, struggles: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add several session struggles, embedding them in one batch.
+        
+        Args:
+            struggles: Dicts with the keyword arguments of add_peer_profile_from_session
+            
+        Returns:
+            Profile IDs of the struggles that were added
+        """
+        if not settings.enable_real_user_data:
+            logger.debug("Real user data collection disabled")
+            return []
+        # Too-short texts would be rejected anyway, so don't spend embeddings on them
+        struggles = [
+            struggle for struggle in struggles
+            if len(struggle["struggle_text"].strip()) >= settings.min_struggle_length
+        ]
+        if not struggles:
+            return []
+        
+        try:
+            embeddings = get_embedding_service().generate_embeddings_batch(
+                [struggle["struggle_text"] for struggle in struggles]
+            )
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            return []
+        
+        added_ids = []
+        for struggle, embedding in zip(struggles, embeddings):
+            profile_id = f"user_{uuid.uuid4().hex[:8]}"
+            
+            profile = PeerProfile(
+                profile_id=profile_id,
+                embedding=embedding,
+                struggle_text=struggle["struggle_text"],
+                academic_stage=struggle.get("academic_stage"),
+                research_area=struggle.get("research_area"),
+                anonymized_metadata={
+                    'emotional_tags': struggle.get("emotional_tags") or [],
+                    'source': 'user_session',
+                    'created_at': datetime.now().isoformat()
+                }
+            )
+            
+            if self.add_peer_profile(profile, skip_deduplication=False):
+                logger.info(f"Added user profile from session: {profile_id}")
+                added_ids.append(profile_id)
+        
+        return added_ids
@@ -5,8 +5,22 @@ from setuptools import setup, find_packages
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
+# Accelerators the code only uses when they are installed. requirements.txt
+# lists them too, so the Docker image gets them, but a plain install doesn't
+# need them: pip install .[all] (or a single extra) adds them.
+OPTIONAL_REQUIREMENTS = {
+    "simd": ["simsimd>=5.0.0"],
+    "jit": ["numba>=0.58.0"],
+    "redis": ["redis>=5.0.0"],
+    "fast-json": ["orjson>=3.9.0"],
+    "fuzzy": ["rapidfuzz>=3.0.0"],
+}
+optional = {requirement for extra in OPTIONAL_REQUIREMENTS.values() for requirement in extra}
+
 with open("requirements.txt", "r", encoding="utf-8") as fh:
-    requirements = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+    # Drop comments, including any after a requirement on the same line
+    lines = [line.split("#", 1)[0].strip() for line in fh]
+    requirements = [line for line in lines if line and line not in optional]
 
 setup(
     name="research-in-public",
@@ -21,11 +35,11 @@ setup(
         "Intended Audience :: Science/Research",
         "Topic :: Scientific/Engineering",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.9",
     install_requires=requirements,
+    extras_require={**OPTIONAL_REQUIREMENTS, "all": sorted(optional)},
 )
 
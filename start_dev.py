@@ -1,82 +1,481 @@
 """Start both backend API and frontend dev server."""
 
+import asyncio
 import subprocess
 import sys
 import os
+import re
+import select
+import shutil
 import time
 import signal
+import threading
+import urllib.request
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
 from dotenv import load_dotenv
 
-# Try to import requests for health check, fallback to urllib if not available
-try:
-    import requests
-    HAS_REQUESTS = True
-except ImportError:
-    HAS_REQUESTS = False
+load_dotenv()
+
+DEV_PORTS = (8000, 3000)
+
+# "users:(("python",pid=1234,fd=3))" in `ss -p` output
+SS_PID_PATTERN = re.compile(r"pid=(\d+)")
+
+# State code of a listening socket in /proc/net/tcp
+TCP_LISTEN_STATE = "0A"
+
+# Resolved once; the port lookup falls back to /proc when ss is missing
+SS_PATH = shutil.which('ss')
+LSOF_PATH = shutil.which('lsof')
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PYTHON = sys.executable
+
+# Node installed through nvm-windows isn't always on PATH
+NVM_NODE_DIR = r"C:\nvm4w\nodejs"
+
+# npm is a batch script on Windows, which can be run directly instead of
+# through a PowerShell wrapper. Resolved once here rather than by a PATH
+# search on every spawn.
+_npm_name = "npm.cmd" if sys.platform == "win32" else "npm"
+NPM_COMMAND = shutil.which(_npm_name) or shutil.which(_npm_name, path=NVM_NODE_DIR) or _npm_name
+
+# Seconds between connection attempts while waiting for a server
+PROBE_INTERVAL = 0.25
+
+
+def _listeners_from_ss(ports: Iterable[int]) -> Dict[int, List[int]]:
+    """Map each port to its listening pids using one `ss` call."""
+    if SS_PATH is None:
+        raise OSError("ss not found")
+    wanted = set(ports)
+    result = subprocess.run([SS_PATH, '-H', '-ltnp'], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise OSError(result.stderr.strip() or "ss failed")
+
+    listeners: Dict[int, List[int]] = {}
+    for line in result.stdout.splitlines():
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        port = fields[3].rpartition(':')[2]
+        if not port.isdigit() or int(port) not in wanted:
+            continue
+        pids = listeners.setdefault(int(port), [])
+        for pid in SS_PID_PATTERN.findall(line):
+            if int(pid) not in pids:
+                pids.append(int(pid))
+    return listeners
+
+
+def _listeners_from_proc(ports: Iterable[int]) -> Dict[int, List[int]]:
+    """Map each port to its listening pids by reading /proc directly."""
+    wanted = set(ports)
+    port_by_inode: Dict[str, int] = {}
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f, None)  # Header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10 or fields[3] != TCP_LISTEN_STATE:
+                        continue
+                    port = int(fields[1].rpartition(':')[2], 16)
+                    if port in wanted:
+                        port_by_inode[fields[9]] = port
+        except FileNotFoundError:
+            continue
+
+    listeners: Dict[int, List[int]] = {}
+    if not port_by_inode:
+        return listeners
+
+    # One pass over every process's open descriptors
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        fd_dir = f'/proc/{pid}/fd'
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(f'{fd_dir}/{fd}')
+            except OSError:
+                continue
+            if target.startswith('socket:['):
+                port = port_by_inode.get(target[8:-1])
+                if port is not None and int(pid) not in listeners.setdefault(port, []):
+                    listeners[port].append(int(pid))
+    return listeners
+
+
+def _listeners_from_lsof(ports: Iterable[int]) -> Dict[int, List[int]]:
+    """Map each port to its listening pids with lsof (macOS has no ss or /proc)."""
+    if LSOF_PATH is None:
+        raise OSError("lsof not found")
+    listeners: Dict[int, List[int]] = {}
+    for port in ports:
+        result = subprocess.run([LSOF_PATH, f'-ti:{port}'], capture_output=True, text=True)
+        if result.returncode == 0 and result.stdout.strip():
+            listeners[port] = [int(pid) for pid in result.stdout.split()]
+    return listeners
+
+
+def _pids_listening_on(ports: Iterable[int]) -> Dict[int, List[int]]:
+    """
+    Find the processes listening on the given TCP ports.
+    
+    Tries `ss` first, then /proc/net/tcp, then lsof, which is by far the
+    slowest because it inspects every open file on the machine.
+    
+    Args:
+        ports: TCP ports to look up
+        
+    Returns:
+        Pids per port; ports nobody listens on are omitted
+    """
+    ports = tuple(ports)
+    for lookup in (_listeners_from_ss, _listeners_from_proc, _listeners_from_lsof):
+        try:
+            listeners = lookup(ports)
+        except (OSError, ValueError):
+            continue
+        return {port: pids for port, pids in listeners.items() if pids}
+    return {}
+
+
+def _pid_alive(pid: int) -> bool:
     try:
-        import urllib.request
-        HAS_URLLIB = True
-    except ImportError:
-        HAS_URLLIB = False
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
 
-load_dotenv()
 
-def cleanup_processes(backend_process=None, frontend_process=None):
-    print("\n\n🛑 Shutting down servers...")
+def _kill_listeners(
+    ports: Iterable[int],
+    sig: int = signal.SIGTERM,
+    force_after: float = 2.0
+) -> Dict[int, List[int]]:
+    """
+    Stop whatever is listening on the given ports.
     
-    if backend_process and backend_process.poll() is None:
+    Args:
+        ports: TCP ports to free
+        sig: Signal sent first
+        force_after: Seconds to wait before sending SIGKILL to survivors
+        
+    Returns:
+        Pids that were signalled, per port
+    """
+    listeners = _pids_listening_on(ports)
+    pids = {pid for port_pids in listeners.values() for pid in port_pids}
+    for pid in pids:
         try:
-            if hasattr(os, 'killpg'):
-                try:
-                    os.killpg(os.getpgid(backend_process.pid), signal.SIGTERM)
-                except (ProcessLookupError, OSError):
-                    backend_process.terminate()
-            else:
-                backend_process.terminate()
-            backend_process.wait(timeout=5)
-        except (subprocess.TimeoutExpired, ProcessLookupError):
-            try:
-                backend_process.kill()
-            except:
-                pass
+            os.kill(pid, sig)
+        except OSError:
+            pass
     
-    if frontend_process and frontend_process.poll() is None:
+    kill_signal = getattr(signal, 'SIGKILL', None)
+    if kill_signal is None or sig == kill_signal:
+        return listeners
+    deadline = time.monotonic() + force_after
+    while pids and time.monotonic() < deadline:
+        time.sleep(0.05)
+        pids = {pid for pid in pids if _pid_alive(pid)}
+    for pid in pids:
         try:
-            if hasattr(os, 'killpg'):
-                try:
-                    os.killpg(os.getpgid(frontend_process.pid), signal.SIGTERM)
-                except (ProcessLookupError, OSError):
-                    frontend_process.terminate()
+            os.kill(pid, kill_signal)
+        except OSError:
+            pass
+    return listeners
+
+
+def _wait_for_first_exit(*processes: subprocess.Popen) -> subprocess.Popen:
+    """
+    Block until any of the processes exits.
+    
+    Args:
+        processes: Processes to watch
+        
+    Returns:
+        The process that exited (already reaped, so returncode is set)
+    """
+    watchers = [_ExitWatcher(process) for process in processes]
+    try:
+        fds = [watcher.fileno() for watcher in watchers]
+        while True:
+            for watcher in watchers:
+                if watcher.process.poll() is not None:
+                    return watcher.process
+            if None not in fds:
+                # Sleeps until a child exits, using no CPU meanwhile
+                select.select(fds, [], [])
             else:
-                frontend_process.terminate()
-            frontend_process.wait(timeout=5)
-        except (subprocess.TimeoutExpired, ProcessLookupError):
-            try:
-                frontend_process.kill()
-            except:
-                pass
+                for watcher in watchers:
+                    if watcher.wait(PROBE_INTERVAL / len(watchers)):
+                        return watcher.process
+    finally:
+        for watcher in watchers:
+            watcher.close()
+
+
+class StartupError(Exception):
+    """A dev server could not be started."""
+
+
+class _ExitWatcher:
+    """
+    Waits on a child process exiting without polling it in a sleep loop.
+    
+    Uses a pidfd on Linux and kqueue on macOS/BSD, so wait() returns as soon
+    as the child dies. Elsewhere it falls back to sleeping the full timeout.
+    """
+    
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self._pidfd = None
+        self._poller = None
+        self._kqueue = None
+        try:
+            if hasattr(os, 'pidfd_open'):
+                self._pidfd = os.pidfd_open(process.pid)
+                self._poller = select.poll()
+                self._poller.register(self._pidfd, select.POLLIN)
+            elif hasattr(select, 'kqueue'):
+                self._kqueue = select.kqueue()
+                self._kqueue.control([select.kevent(
+                    process.pid,
+                    filter=select.KQ_FILTER_PROC,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                    fflags=select.KQ_NOTE_EXIT
+                )], 0)
+        except OSError:
+            # Old kernel, or the child already exited
+            self.close()
+    
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until the process exits or timeout seconds pass.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the process has exited
+        """
+        if self.process.poll() is not None:
+            return True
+        if self._poller is not None:
+            self._poller.poll(int(timeout * 1000))
+        elif self._kqueue is not None:
+            self._kqueue.control(None, 1, timeout)
+        else:
+            time.sleep(timeout)
+        return self.process.poll() is not None
+    
+    def fileno(self) -> Optional[int]:
+        """Descriptor that becomes readable when the process exits, if there is one."""
+        if self._pidfd is not None:
+            return self._pidfd
+        if self._kqueue is not None:
+            return self._kqueue.fileno()
+        return None
     
+    async def wait_async(self, timeout: float) -> bool:
+        """Like wait(), but yields to the event loop while waiting."""
+        if self.process.poll() is not None:
+            return True
+        fd = self.fileno()
+        if fd is None:
+            await asyncio.sleep(timeout)
+            return self.process.poll() is not None
+        
+        loop = asyncio.get_running_loop()
+        exited = asyncio.Event()
+        loop.add_reader(fd, exited.set)
+        try:
+            await asyncio.wait_for(exited.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(fd)
+        return self.process.poll() is not None
+    
+    def close(self):
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+        if self._kqueue is not None:
+            self._kqueue.close()
+        self._pidfd = self._poller = self._kqueue = None
+
+
+async def _port_accepting(port: int, timeout: float = PROBE_INTERVAL) -> bool:
+    """Check whether something accepts TCP connections on localhost:port."""
     try:
-        import subprocess as sp
-        result = sp.run(['lsof', '-ti:8000'], capture_output=True, text=True)
-        if result.returncode == 0 and result.stdout.strip():
-            for pid in result.stdout.strip().split('\n'):
-                if pid:
-                    try:
-                        os.kill(int(pid), signal.SIGTERM)
-                    except:
-                        pass
+        _, writer = await asyncio.wait_for(asyncio.open_connection('localhost', port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+def _backend_responds() -> bool:
+    """
+    Confirm the backend answers HTTP.
+    
+    Only called once the TCP probe succeeds, so a start-up costs one GET
+    instead of one per probe.
+    """
+    try:
+        with urllib.request.urlopen("http://127.0.0.1:8000/", timeout=2) as response:
+            return response.status == 200
+    except (OSError, ValueError):
+        return False
+
+
+async def _wait_for_server(
+    process: subprocess.Popen,
+    port: int,
+    name: str,
+    max_wait: float,
+    confirm: Optional[Callable[[], bool]] = None
+) -> Optional[float]:
+    """
+    Wait for a dev server to accept connections on its port.
+    
+    Args:
+        process: The server process
+        port: Port the server listens on
+        name: Server name for error messages
+        max_wait: Seconds to wait before giving up
+        confirm: Optional blocking check run once the port accepts connections
         
-        result = sp.run(['lsof', '-ti:3000'], capture_output=True, text=True)
-        if result.returncode == 0 and result.stdout.strip():
-            for pid in result.stdout.strip().split('\n'):
-                if pid:
-                    try:
-                        os.kill(int(pid), signal.SIGTERM)
-                    except:
-                        pass
-    except:
+    Returns:
+        Seconds the server took to become ready, or None if it was not ready in time
+        
+    Raises:
+        StartupError: If the server exits first
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    watcher = _ExitWatcher(process)
+    try:
+        while loop.time() - started < max_wait:
+            if await _port_accepting(port) and (
+                confirm is None or await loop.run_in_executor(None, confirm)
+            ):
+                return loop.time() - started
+            if await watcher.wait_async(PROBE_INTERVAL):
+                raise StartupError(f"{name} server failed to start!\n   Check the logs above for error details.")
+    finally:
+        watcher.close()
+    return None
+
+
+def _frontend_deps_stale(frontend_dir: Path) -> bool:
+    """
+    Check whether node_modules is missing or older than package-lock.json.
+    
+    npm records the tree it installed in node_modules/.package-lock.json, so
+    comparing modification times catches a changed lockfile, not just a
+    missing node_modules.
+    """
+    lock = frontend_dir / "package-lock.json"
+    stamp = frontend_dir / "node_modules" / ".package-lock.json"
+    if not lock.exists():
+        return not (frontend_dir / "node_modules").exists()
+    return not stamp.exists() or lock.stat().st_mtime > stamp.stat().st_mtime
+
+
+async def _install_frontend_deps(frontend_dir: Path, env: Dict[str, str]):
+    """Install the frontend's dependencies, raising StartupError if it fails."""
+    print("⚠️  Frontend dependencies missing or out of date. Installing...")
+    if (frontend_dir / "package-lock.json").exists():
+        # Installs exactly what the lockfile says without re-resolving,
+        # using the local npm cache when it can
+        command = [NPM_COMMAND, "ci", "--prefer-offline", "--no-audit", "--no-fund"]
+    else:
+        command = [NPM_COMMAND, "install", "--no-audit", "--no-fund"]
+    install_process = await asyncio.create_subprocess_exec(
+        *command,
+        cwd=frontend_dir,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await install_process.communicate()
+    except asyncio.CancelledError:
+        install_process.kill()
+        raise
+    if install_process.returncode != 0:
+        output = stderr.decode() if stderr else stdout.decode()
+        raise StartupError(f"Failed to install frontend dependencies!\n{output}")
+    print("✅ Dependencies installed")
+
+
+def _drain(stream, prefix: bytes):
+    """Copy a child's output to the console line by line until it closes."""
+    with stream:
+        for line in iter(stream.readline, b''):
+            sys.stdout.buffer.write(prefix + line)
+            sys.stdout.buffer.flush()
+
+
+async def _run_concurrently(*coroutines):
+    return await asyncio.gather(*coroutines)
+
+
+def _signal_server(process: subprocess.Popen, sig: int):
+    """Send sig to a server's whole process group (it was started with setsid)."""
+    if sys.platform != 'win32':
+        try:
+            # The group id is the server's pid, which keeps working after the
+            # leader exits while uvicorn workers or node children linger.
+            os.killpg(process.pid, sig)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        process.send_signal(sig)
+    except OSError:
+        pass
+
+
+def _stop_process(process: Optional[subprocess.Popen], timeout: float = 5):
+    """
+    Stop a server: SIGTERM its process group, then SIGKILL it if still running.
+    
+    Args:
+        process: Server process, or None if it was never started
+        timeout: Seconds to wait after SIGTERM before escalating
+    """
+    if process is None or process.poll() is not None:
+        return
+    _signal_server(process, signal.SIGTERM)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _signal_server(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def cleanup_processes(backend_process=None, frontend_process=None):
+    print("\n\n🛑 Shutting down servers...")
+    
+    _stop_process(backend_process)
+    _stop_process(frontend_process)
+    
+    try:
+        _kill_listeners(DEV_PORTS)
+    except Exception:
         pass
     
     print("✅ Servers stopped")
@@ -89,156 +488,116 @@ def main():
     backend_process = None
     frontend_process = None
     
+    # systemd, docker stop and CI timeouts send SIGTERM (or SIGHUP when the
+    # terminal goes away) rather than SIGINT, so clean up on those too.
+    def handle_termination(signum, frame):
+        signal.signal(signum, signal.SIG_IGN)
+        cleanup_processes(backend_process, frontend_process)
+        sys.exit(0)
+    
+    signal.signal(signal.SIGTERM, handle_termination)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, handle_termination)
+    
     try:
         print("\n🧹 Cleaning up ports 8000 and 3000...")
         try:
-            import subprocess as sp
-            result = sp.run(['lsof', '-ti:8000'], capture_output=True, text=True)
-            if result.returncode == 0 and result.stdout.strip():
-                for pid in result.stdout.strip().split('\n'):
-                    if pid:
-                        try:
-                            print(f"   Killing process {pid} on port 8000")
-                            os.kill(int(pid), signal.SIGKILL)
-                        except:
-                            pass
-            
-            result = sp.run(['lsof', '-ti:3000'], capture_output=True, text=True)
-            if result.returncode == 0 and result.stdout.strip():
-                for pid in result.stdout.strip().split('\n'):
-                    if pid:
-                        try:
-                            print(f"   Killing process {pid} on port 3000")
-                            os.kill(int(pid), signal.SIGKILL)
-                        except:
-                            pass
+            for port, pids in _kill_listeners(DEV_PORTS).items():
+                for pid in pids:
+                    print(f"   Stopped process {pid} on port {port}")
         except Exception as e:
             print(f"   Warning: Failed to cleanup ports: {e}")
 
         if not os.getenv("GEMINI_API_KEY"):
             print("⚠️  Warning: GEMINI_API_KEY not found in environment variables.")
             print("   Please set it in your .env file or environment variables.")
-            response = input("\nContinue anyway? (y/n): ")
-            if response.lower() != 'y':
+            if os.getenv("RIP_ALLOW_NO_KEY") == "1":
+                print("   Continuing without it (RIP_ALLOW_NO_KEY=1)")
+            elif sys.stdin.isatty():
+                response = input("\nContinue anyway? (y/n): ")
+                if response.lower() != 'y':
+                    sys.exit(1)
+            else:
+                # Nobody can answer a prompt in CI or Docker; input() would block forever
+                print("   stdin is not a terminal, so not prompting. Set RIP_ALLOW_NO_KEY=1 to continue without a key.")
                 sys.exit(1)
         
+        frontend_dir = SCRIPT_DIR / "frontend"
+        if not frontend_dir.exists():
+            print("❌ Frontend directory not found!")
+            print("   Please ensure the frontend directory exists.")
+            sys.exit(1)
+        
+        env = os.environ.copy()
+        if os.path.exists(NVM_NODE_DIR):
+            current_path = env.get("PATH", "")
+            if NVM_NODE_DIR not in current_path:
+                env["PATH"] = f"{NVM_NODE_DIR};{current_path}"
+        
         print("\n📡 Starting Backend API Server (FastAPI)...")
         print("   Backend logs will appear below in real time:")
         print("   " + "=" * 56)
         kwargs = {
-            'cwd': Path(__file__).parent,
+            'cwd': SCRIPT_DIR,
             'stdout': None,  # Print to console in real time
             'stderr': subprocess.STDOUT,  # Merge stderr into stdout
         }
         if sys.platform != 'win32':
             kwargs['preexec_fn'] = os.setsid  # Create new process group
         backend_process = subprocess.Popen(
-            [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"],
+            [PYTHON, "-m", "uvicorn", "api.main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"],
             **kwargs
         )
         
         print("   " + "=" * 56)
         print("   Waiting for backend to initialize...")
-        max_wait = 30
-        wait_interval = 1
-        waited = 0
-        backend_ready = False
         
-        while waited < max_wait:
-            time.sleep(wait_interval)
-            waited += wait_interval
+        # The frontend does not need the backend to start, so bring it up
+        # (installing dependencies if needed) while the backend initializes.
+        async def start_frontend():
+            nonlocal frontend_process
+            print("\n🎨 Starting Frontend Dev Server (Next.js)...")
+            if _frontend_deps_stale(frontend_dir):
+                await _install_frontend_deps(frontend_dir, env)
             
-            if backend_process.poll() is not None:
-                print("\n❌ Backend server failed to start!")
-                print("   Check the logs above for error details.")
-                cleanup_processes(backend_process, None)
-                sys.exit(1)
+            frontend_kwargs = {
+                'cwd': frontend_dir,
+                'env': env,
+                'stdout': subprocess.PIPE,
+                'stderr': subprocess.STDOUT
+            }
+            if sys.platform != 'win32':
+                frontend_kwargs['preexec_fn'] = os.setsid
             
-            try:
-                if HAS_REQUESTS:
-                    response = requests.get("http://localhost:8000/", timeout=2)
-                    if response.status_code == 200:
-                        backend_ready = True
-                        break
-                elif HAS_URLLIB:
-                    req = urllib.request.urlopen("http://localhost:8000/", timeout=2)
-                    if req.getcode() == 200:
-                        backend_ready = True
-                        break
-            except:
-                pass
+            frontend_process = subprocess.Popen([NPM_COMMAND, "run", "dev"], **frontend_kwargs)
+            
+            # Next.js logs a lot while compiling; an unread pipe fills up and
+            # blocks it, so stream the output to the console as it arrives.
+            threading.Thread(
+                target=_drain,
+                args=(frontend_process.stdout, b"[frontend] "),
+                daemon=True
+            ).start()
+            
+            return await _wait_for_server(frontend_process, 3000, "Frontend", 60)
+        
+        waited, frontend_waited = asyncio.run(_run_concurrently(
+            _wait_for_server(backend_process, 8000, "Backend", 30, confirm=_backend_responds),
+            start_frontend()
+        ))
         
-        if not backend_ready:
+        if waited is None:
             print("⚠️  Warning: Backend may not be fully ready, but continuing...")
             print("   If you see connection errors, wait a few more seconds and refresh.")
         else:
-            print(f"✅ Backend API ready after {waited} seconds")
+            print(f"✅ Backend API ready after {waited:.1f} seconds")
         
         print("✅ Backend API running at http://localhost:8000")
         print("   API docs at http://localhost:8000/docs")
-        
-        print("\n🎨 Starting Frontend Dev Server (Next.js)...")
-        frontend_dir = Path(__file__).parent / "frontend"
-        
-        if not frontend_dir.exists():
-            print("❌ Frontend directory not found!")
-            print("   Please ensure the frontend directory exists.")
-            backend_process.terminate()
-            sys.exit(1)
-        
-        env = os.environ.copy()
-        nvm_path = r"C:\nvm4w\nodejs"
-        if os.path.exists(nvm_path):
-            current_path = env.get("PATH", "")
-            if nvm_path not in current_path:
-                env["PATH"] = f"{nvm_path};{current_path}"
-        
-        if not (frontend_dir / "node_modules").exists():
-            print("⚠️  node_modules not found. Installing dependencies...")
-            if sys.platform == "win32":
-                install_process = subprocess.run(
-                    ["powershell", "-Command", "npm install"],
-                    cwd=frontend_dir,
-                    env=env,
-                    capture_output=True
-                )
-            else:
-                install_process = subprocess.run(
-                    ["npm", "install"],
-                    cwd=frontend_dir,
-                    env=env,
-                    capture_output=True
-                )
-            if install_process.returncode != 0:
-                print("❌ Failed to install frontend dependencies!")
-                print(install_process.stderr.decode() if install_process.stderr else install_process.stdout.decode())
-                backend_process.terminate()
-                sys.exit(1)
-            print("✅ Dependencies installed")
-        
-        frontend_kwargs = {
-            'cwd': frontend_dir,
-            'env': env,
-            'stdout': subprocess.PIPE,
-            'stderr': subprocess.PIPE
-        }
-        if sys.platform != 'win32':
-            frontend_kwargs['preexec_fn'] = os.setsid
-        
-        if sys.platform == "win32":
-            frontend_process = subprocess.Popen(
-                ["powershell", "-Command", "npm run dev"],
-                **frontend_kwargs
-            )
+        if frontend_waited is None:
+            print("⚠️  Warning: Frontend is still compiling; it will be served at http://localhost:3000 shortly")
         else:
-            frontend_process = subprocess.Popen(
-                ["npm", "run", "dev"],
-                **frontend_kwargs
-            )
-        
-        time.sleep(5)
-        
-        print("✅ Frontend running at http://localhost:3000")
+            print(f"✅ Frontend running at http://localhost:3000 (ready after {frontend_waited:.1f} seconds)")
         print("\n" + "=" * 60)
         print("🎉 Both servers are running!")
         print("\n📝 Next steps:")
@@ -248,8 +607,17 @@ def main():
         print("\n⚠️  Press Ctrl+C to stop both servers")
         print("=" * 60)
         
-        backend_process.wait()
-        frontend_process.wait()
+        # Whichever server dies first takes the other one down with it, rather
+        # than the script blocking on the backend while a dead frontend lingers
+        exited = _wait_for_first_exit(backend_process, frontend_process)
+        name = "Backend" if exited is backend_process else "Frontend"
+        print(f"\n❌ {name} server exited with code {exited.returncode}")
+        cleanup_processes(backend_process, frontend_process)
+        sys.exit(1 if exited.returncode else 0)
+    except StartupError as e:
+        print(f"\n❌ {e}")
+        cleanup_processes(backend_process, frontend_process)
+        sys.exit(1)
     except KeyboardInterrupt:
         cleanup_processes(backend_process, frontend_process)
     except Exception as e:
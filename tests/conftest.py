@@ -0,0 +1,123 @@
+"""Shared fixtures for the test suite."""
+
+import hashlib
+import os
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+# Set to run the live-marked tests against the real Gemini API (needs GEMINI_API_KEY)
+LIVE_GEMINI = bool(os.getenv("RUN_LIVE_GEMINI"))
+
+# Services refuse to start without a key, even when their API calls are mocked
+os.environ.setdefault("GEMINI_API_KEY", "test_key")
+
+EMBEDDING_DIM = 768
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "live: calls Gemini; mocked unless RUN_LIVE_GEMINI is set")
+
+
+def _fake_embedding(self, text: str, task_type: str = None) -> np.ndarray:
+    """Deterministic unit vector per text, standing in for the embedding API."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    vector.flags.writeable = False
+    return vector
+
+
+def _fake_embeddings_batch(self, texts, task_type: str = None) -> np.ndarray:
+    if not texts:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.stack([_fake_embedding(self, text, task_type) for text in texts])
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _mock_gemini():
+    """
+    Replace the Gemini and embedding APIs with canned responses for the session.
+    
+    Keeps the suite offline and fast; with RUN_LIVE_GEMINI set the real
+    services are used instead.
+    """
+    if LIVE_GEMINI:
+        yield
+        return
+    
+    from services.gemini_service import GeminiService
+    
+    fake_gemini = Mock(spec=GeminiService)
+    fake_gemini.generate_text.return_value = "Hello, World!"
+    fake_gemini.chat_completion.return_value = "ok"
+    fake_gemini.generate_structured.return_value = "I hear you, and what you feel makes sense."
+    
+    with patch("services.gemini_service._gemini_service_instance", fake_gemini), \
+            patch("services.embedding_service.EmbeddingService.generate_embedding", _fake_embedding), \
+            patch("services.embedding_service.EmbeddingService.generate_embeddings_batch", _fake_embeddings_batch):
+        yield
+
+
+# ============================================================================
+# Session-scoped services and agents
+#
+# Agents are stateless between calls (conversation state lives in the
+# ConversationSession each test creates), so one instance per test session
+# is shared instead of rebuilding prompts and clients in every test. Under
+# pytest-xdist each worker builds its own set.
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def gemini_service():
+    from services.gemini_service import gemini_service
+    return gemini_service
+
+
+@pytest.fixture(scope="session")
+def embedding_service():
+    from services.embedding_service import EmbeddingService
+    return EmbeddingService()
+
+
+@pytest.fixture(scope="session")
+def vector_store():
+    from services.vector_search_local import LocalVectorSearch
+    return LocalVectorSearch()
+
+
+@pytest.fixture(scope="session")
+def orchestrator(vector_store):
+    from orchestration.agent_orchestrator import AgentOrchestrator
+    return AgentOrchestrator(vector_store=vector_store)
+
+
+@pytest.fixture(scope="session")
+def vent_validator():
+    from agents.vent_validator import VentValidatorAgent
+    return VentValidatorAgent()
+
+
+@pytest.fixture(scope="session")
+def matchmaker(vector_store):
+    from agents.semantic_matchmaker import SemanticMatchmakerAgent
+    return SemanticMatchmakerAgent(vector_store)
+
+
+@pytest.fixture(scope="session")
+def scribe():
+    from agents.scribe import ScribeAgent
+    return ScribeAgent()
+
+
+@pytest.fixture(scope="session")
+def guardian():
+    from agents.guardian import GuardianAgent
+    return GuardianAgent()
+
+
+@pytest.fixture(scope="session")
+def pi_simulator():
+    from agents.pi_simulator import PISimulatorAgent
+    return PISimulatorAgent()
@@ -0,0 +1,55 @@
+"""Tests for the cached academic context lookup."""
+
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from services import gemini_cache
+from services.gemini_cache import LLMCache
+from tools import academic_context
+
+GROUNDED = {
+    "citations": [{"title": "Western Blot Troubleshooting", "url": "https://example.com/wb", "snippet": "..."}],
+    "context": "Transfer problems are a common cause of faint Western Blot bands.",
+    "hashtags": ["#LabLife"],
+}
+
+
+@pytest.fixture
+def grounding():
+    service = Mock()
+    service.retrieve_academic_context.return_value = GROUNDED
+    with patch.object(academic_context, "_context_cache", LLMCache(ttl=60)), \
+            patch.object(academic_context, "_get_grounding_service", return_value=service):
+        yield service
+
+
+def test_query_sent_as_written_and_cached_case_insensitively(grounding):
+    first = academic_context.retrieve_academic_context("Western Blot  troubleshooting")
+    second = academic_context.retrieve_academic_context("western blot troubleshooting")
+    
+    grounding.retrieve_academic_context.assert_called_once_with("Western Blot  troubleshooting")
+    assert first == second == dict(GROUNDED, verified=True)
+    # Callers get their own copies
+    second["citations"].clear()
+    assert academic_context.retrieve_academic_context("western blot troubleshooting")["citations"]
+
+
+def test_empty_result_is_not_cached(grounding):
+    grounding.retrieve_academic_context.return_value = {"citations": [], "context": "", "hashtags": []}
+    academic_context.retrieve_academic_context("qPCR primer dimers")
+    grounding.retrieve_academic_context.return_value = GROUNDED
+    
+    assert academic_context.retrieve_academic_context("qPCR primer dimers")["context"] == GROUNDED["context"]
+    assert grounding.retrieve_academic_context.call_count == 2
+
+
+def test_cached_result_expires(grounding, monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(gemini_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    academic_context.retrieve_academic_context("Western Blot troubleshooting")
+    clock.now += 61
+    academic_context.retrieve_academic_context("Western Blot troubleshooting")
+    
+    assert grounding.retrieve_academic_context.call_count == 2
@@ -2,6 +2,7 @@
 
 import pytest
 import os
+import numpy as np
 from unittest.mock import Mock, patch
 from dotenv import load_dotenv
 
@@ -12,68 +13,48 @@ load_dotenv()
 if not os.getenv("GEMINI_API_KEY"):
     os.environ["GEMINI_API_KEY"] = "test_key"
 
-# Check if we have a real API key for integration tests
-HAS_API_KEY = os.getenv("GEMINI_API_KEY") and os.getenv("GEMINI_API_KEY") != "test_key"
+# Tests marked live run against canned Gemini responses (see conftest.py)
+# unless RUN_LIVE_GEMINI is set; those asserting on what the model actually
+# says only make sense against the real API.
+LIVE_GEMINI = bool(os.getenv("RUN_LIVE_GEMINI"))
+needs_live_model = pytest.mark.skipif(not LIVE_GEMINI, reason="Needs real Gemini output (set RUN_LIVE_GEMINI)")
 
 
 # ============================================================================
 # Basic Initialization Tests
 # ============================================================================
 
-def test_vent_validator_initialization():
+def test_vent_validator_initialization(vent_validator):
     """Test Vent Validator agent initialization."""
-    from agents.vent_validator import VentValidatorAgent
-    
-    agent = VentValidatorAgent()
-    assert agent.name == "Vent Validator"
-    assert agent.system_prompt is not None
+    assert vent_validator.name == "Vent Validator"
+    assert vent_validator.system_prompt is not None
 
 
-def test_semantic_matchmaker_initialization():
+def test_semantic_matchmaker_initialization(matchmaker):
     """Test Semantic Matchmaker initialization."""
-    from agents.semantic_matchmaker import SemanticMatchmakerAgent
-    from services.vector_search_local import LocalVectorSearch
-    
-    vector_store = LocalVectorSearch()
-    agent = SemanticMatchmakerAgent(vector_store)
-    assert agent.name == "Semantic Matchmaker"
+    assert matchmaker.name == "Semantic Matchmaker"
 
 
-def test_scribe_initialization():
+def test_scribe_initialization(scribe):
     """Test Scribe agent initialization."""
-    from agents.scribe import ScribeAgent
-    
-    agent = ScribeAgent()
-    assert agent.name == "The Scribe"
-    assert agent.system_prompt is not None
+    assert scribe.name == "The Scribe"
+    assert scribe.system_prompt is not None
 
 
-def test_guardian_initialization():
+def test_guardian_initialization(guardian):
     """Test Guardian agent initialization."""
-    from agents.guardian import GuardianAgent
-    
-    agent = GuardianAgent()
-    assert agent.name == "The Guardian"
-    assert agent.system_prompt is not None
+    assert guardian.name == "The Guardian"
+    assert guardian.system_prompt is not None
 
 
-def test_pi_simulator_initialization():
+def test_pi_simulator_initialization(pi_simulator):
     """Test PI Simulator agent initialization."""
-    from agents.pi_simulator import PISimulatorAgent
-    
-    agent = PISimulatorAgent()
-    assert agent.name == "PI Simulator"
-    assert agent.system_prompt is not None
+    assert pi_simulator.name == "PI Simulator"
+    assert pi_simulator.system_prompt is not None
 
 
-def test_orchestrator_creation():
+def test_orchestrator_creation(orchestrator):
     """Test agent orchestrator creation."""
-    from orchestration.agent_orchestrator import AgentOrchestrator
-    from services.vector_search_local import LocalVectorSearch
-    
-    vector_store = LocalVectorSearch()
-    orchestrator = AgentOrchestrator(vector_store=vector_store)
-    
     assert orchestrator.vent_validator is not None
     assert orchestrator.matchmaker is not None
     assert orchestrator.scribe is not None
@@ -85,55 +66,166 @@ def test_orchestrator_creation():
 # Scribe Detection Tests
 # ============================================================================
 
-def test_scribe_detection():
+def test_scribe_detection(scribe):
     """Test Scribe shareable moment detection."""
-    from agents.scribe import ScribeAgent
-    
-    agent = ScribeAgent()
-    
     # Should detect shareable moment
     shareable = "I finally learned why my experiments kept failing."
-    assert agent.detect_shareable_moment(shareable) == True
+    assert scribe.detect_shareable_moment(shareable) == True
     
     # Should not detect
     not_shareable = "My experiment failed again."
-    assert agent.detect_shareable_moment(not_shareable) == False
+    assert scribe.detect_shareable_moment(not_shareable) == False
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("I finally learned why my experiments kept failing.", True),
+    ("I realized the solution was simple.", True),
+    ("I understood the problem after months of work.", True),
+    ("I had a breakthrough moment today.", True),
+    ("I figured out the issue.", True),
+    ("I resolved the problem.", True),
+    ("I overcame my fear of failure.", True),
+    ("My experiment failed again.", False),
+    ("I'm still struggling.", False),
+    ("Nothing is working.", False),
+])
+def test_scribe_detection_keywords(scribe, text, expected):
+    """Test Scribe detection with various keywords."""
+    assert scribe.detect_shareable_moment(text) is expected
 
 
-def test_scribe_detection_keywords():
-    """Test Scribe detection with various keywords."""
-    from agents.scribe import ScribeAgent
-    
-    agent = ScribeAgent()
-    
-    shareable_moments = [
-        "I finally learned why my experiments kept failing.",
-        "I realized the solution was simple.",
-        "I understood the problem after months of work.",
-        "I had a breakthrough moment today.",
-        "I figured out the issue.",
-        "I resolved the problem.",
-        "I overcame my fear of failure.",
-    ]
+@pytest.mark.live
+def test_draft_all_platforms():
+    """Test drafting the same raw text for several platforms at once."""
+    import asyncio
+    from tools.social_draft import draft_all_platforms
     
-    for moment in shareable_moments:
-        assert agent.detect_shareable_moment(moment) == True, f"Should detect: {moment}"
+    drafts = asyncio.run(draft_all_platforms(
+        "Finally got the pipeline working after weeks of debugging.",
+        platforms=("linkedin", "twitter")
+    ))
     
-    not_shareable = [
-        "My experiment failed again.",
-        "I'm still struggling.",
-        "Nothing is working.",
-    ]
+    assert set(drafts) == {"linkedin", "twitter"}
+    for platform, draft in drafts.items():
+        assert draft["platform"] == platform
+        assert draft["content"]
+
+
+def test_draft_social_content_single_model_call():
+    """Each draft path calls the model once when the first draft is accepted."""
+    from tools import social_draft
+    
+    fake = Mock()
+    fake.generate_text_stream.return_value = (
+        chunk for chunk in ["Persistence turned setbacks into method. ", "#PhDlife #Research"]
+    )
+    fake.generate_text.return_value = "Every setback sharpened my methods. #PhDlife #Research"
+    
+    with patch.object(social_draft, "gemini_service", fake):
+        draft = social_draft.draft_social_content(raw_text="single call check: the cluster queue ate my jobs again")
+        assert fake.generate_text_stream.call_count == 1
+        assert fake.generate_text.call_count == 0
+        assert draft["hashtags"] == ["#PhDlife", "#Research"]
+        
+        social_draft.draft_social_content(topic="single call check", mood="hopeful")
+        assert fake.generate_text.call_count == 1
+
+
+# ============================================================================
+# Orchestrator Response Parsing Tests
+# ============================================================================
+
+def test_parse_agent_response_metadata_blocks(orchestrator):
+    """Test metadata block extraction from fenced and bare JSON."""
+    response = (
+        "[[EMOTIONAL_ANALYSIS]]\n```json\n"
+        '{"emotional_spectrum": "Anxiety {high}", "emotional_intensity": 7}\n'
+        "```\n[[END_EMOTIONAL_ANALYSIS]]\n"
+        "That sounds hard.\n"
+        '[[CLARITY_SCORE]] {"clarity": 80, "logic": 70, "focus": "Methodology"} [[END_CLARITY_SCORE]]'
+    )
+    parsed = orchestrator._parse_agent_response(response)
     
-    for moment in not_shareable:
-        assert agent.detect_shareable_moment(moment) == False, f"Should not detect: {moment}"
+    assert parsed["clean_response"] == "That sounds hard."
+    assert parsed["metadata"]["emotional_spectrum"] == "Anxiety {high}"
+    assert parsed["metadata"]["emotional_intensity"] == 7
+    assert parsed["metadata"]["clarity_score"] == 80
+    assert parsed["metadata"]["logic_score"] == 70
+    assert parsed["metadata"]["critique_focus"] == "Methodology"
+
+
+def test_session_intent_cache(orchestrator):
+    """Repeats within a session reuse the intent; other sessions and failed classifications don't."""
+    from data.schemas import ConversationSession
+    
+    classifier = Mock()
+    classifier.classify.side_effect = lambda message, message_lower: {"intent": "emotional", "confidence": "high"}
+    session = ConversationSession(session_id="s1", user_id="u1")
+    other_session = ConversationSession(session_id="s2", user_id="u2")
+    
+    with patch.object(orchestrator, "intent_classifier", classifier):
+        orchestrator._classify_for_session("I feel stuck", session, "i feel stuck")
+        orchestrator._classify_for_session("I FEEL STUCK", session, "i feel stuck")
+        assert classifier.classify.call_count == 1
+        
+        orchestrator._classify_for_session("I feel stuck", other_session, "i feel stuck")
+        assert classifier.classify.call_count == 2
+        
+        classifier.classify.side_effect = lambda message, message_lower: {"intent": "technical", "confidence": "low"}
+        for _ in range(2):
+            orchestrator._classify_for_session("Any ideas?", session, "any ideas?")
+        assert classifier.classify.call_count == 4
+        
+        classifier.classify.side_effect = lambda message, message_lower: {"intent": "emotional", "confidence": "high"}
+        for i in range(orchestrator.SESSION_INTENT_CACHE_SIZE + 1):
+            orchestrator._classify_for_session(f"message {i}", session, f"message {i}")
+        assert "i feel stuck" not in session.context["_intent_cache"]
+        assert len(session.context["_intent_cache"]) == orchestrator.SESSION_INTENT_CACHE_SIZE
+
+
+def test_confident_non_emotional_intent_still_matches_peers(orchestrator):
+    """A stressed grant message is classified as grant but still gets peer matches."""
+    from data.schemas import ConversationSession
+    
+    classifier = Mock()
+    classifier.classify.return_value = {"intent": "grant", "confidence": "high", "is_emotional": False}
+    classifier.get_agent_mode.return_value = "pi"
+    session = ConversationSession(session_id="s1", user_id="u1")
+    
+    with patch.object(orchestrator, "intent_classifier", classifier), \
+         patch.dict(orchestrator._mode_handlers, {"pi": Mock()}), \
+         patch.object(orchestrator, "_run_scribe"), \
+         patch.object(orchestrator, "_find_peer_matches", return_value={"text": "peers"}) as find_peers:
+        responses = orchestrator.process_message(
+            "I'm so stressed about my grant proposal", session, agent_mode="auto"
+        )
+        assert find_peers.call_count == 1
+        assert responses["peer_matches"] == "peers"
+    
+        orchestrator.process_message("Can you review my grant proposal?", session, agent_mode="auto")
+        assert find_peers.call_count == 1
 
 
 # ============================================================================
 # Intent Classification Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
+def test_intent_classification_keyword_short_circuit():
+    """Test that unambiguous keyword matches skip the model call."""
+    from orchestration.intent_classifier import IntentClassifier
+    
+    classifier = IntentClassifier()
+    
+    with patch("orchestration.intent_classifier.gemini_service") as mock_gemini:
+        assert classifier.classify("Can you review my grant?")["intent"] == "grant"
+        assert classifier.classify("Help me draft a LinkedIn post")["intent"] == "shareable"
+        assert classifier.classify("How do you debug agentic systems?")["intent"] == "technical"
+        assert classifier.classify("I'm excited about my progress")["intent"] == "positive"
+        mock_gemini.generate_text.assert_not_called()
+
+
+@pytest.mark.live
+@needs_live_model
 def test_intent_classification():
     """Test intent classifier with various message types."""
     from orchestration.intent_classifier import IntentClassifier
@@ -153,7 +245,8 @@ def test_intent_classification():
         assert intent == expected, f"Expected {expected}, got {intent} for: {message}"
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
+@pytest.mark.live
+@needs_live_model
 def test_intent_classification_keywords():
     """Test intent classification with keyword fallback."""
     from orchestration.intent_classifier import IntentClassifier
@@ -187,28 +280,23 @@ def test_intent_classification_keywords():
 # Guardian IP Safety Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_guardian_safe_content():
+@pytest.mark.live
+def test_guardian_safe_content(guardian):
     """Test Guardian with safe content."""
-    from agents.guardian import GuardianAgent
-    
-    agent = GuardianAgent()
     safe_content = "I've been working on my research and learning about resilience."
     
-    report = agent.scan_content(safe_content)
+    report = guardian.scan_content(safe_content)
     assert report is not None
     assert report.risk_level.value in ["LOW", "MEDIUM", "HIGH"]
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_guardian_risky_content():
+@pytest.mark.live
+@needs_live_model
+def test_guardian_risky_content(guardian):
     """Test Guardian with risky content."""
-    from agents.guardian import GuardianAgent
-    
-    agent = GuardianAgent()
     risky_content = "I'm using reagent X-1234 from Company Y."
     
-    report = agent.scan_content(risky_content)
+    report = guardian.scan_content(risky_content)
     assert report is not None
     # Risky content should be flagged
     assert report.risk_level.value in ["MEDIUM", "HIGH"]
@@ -218,11 +306,9 @@ def test_guardian_risky_content():
 # Gemini Service Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_gemini_service_generate_text():
+@pytest.mark.live
+def test_gemini_service_generate_text(gemini_service):
     """Test Gemini service text generation."""
-    from services.gemini_service import gemini_service
-    
     response = gemini_service.generate_text(
         prompt="Say 'Hello, World!'",
         model_type="flash",
@@ -234,12 +320,9 @@ def test_gemini_service_generate_text():
     assert "Hello" in response or "hello" in response.lower()
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_gemini_service_chat_completion():
+@pytest.mark.live
+def test_gemini_service_chat_completion(gemini_service):
     """Test Gemini service chat completion."""
-    from services.gemini_service import gemini_service
-    from data.schemas import ConversationSession, ConversationMessage
-    
     messages = [
         {"role": "user", "content": "Hello, how are you?"}
     ]
@@ -254,11 +337,9 @@ def test_gemini_service_chat_completion():
     assert len(response) > 0
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_gemini_service_with_system_instruction():
+@pytest.mark.live
+def test_gemini_service_with_system_instruction(gemini_service):
     """Test Gemini service with system instruction."""
-    from services.gemini_service import gemini_service
-    
     response = gemini_service.generate_text(
         prompt="What is your role?",
         model_type="flash",
@@ -274,33 +355,29 @@ def test_gemini_service_with_system_instruction():
 # Vector Search and Embeddings Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_embedding_service():
+@pytest.mark.live
+def test_embedding_service(embedding_service):
     """Test embedding service."""
-    from services.embedding_service import EmbeddingService
-    
-    embedding_service = EmbeddingService()
     embedding = embedding_service.generate_embedding("Test text for embedding")
     
     assert embedding is not None
     assert len(embedding) > 0
-    assert isinstance(embedding, list)
+    assert isinstance(embedding, np.ndarray)
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_vector_search_similarity():
+@pytest.mark.live
+@needs_live_model
+def test_vector_search_similarity(embedding_service):
     """Test vector search similarity calculation."""
-    from services.embedding_service import EmbeddingService
-    
-    embedding_service = EmbeddingService()
-    
     text1 = "I'm struggling with my research"
     text2 = "I'm having difficulties with my work"
     text3 = "The weather is nice today"
     
-    emb1 = embedding_service.generate_embedding(text1)
-    emb2 = embedding_service.generate_embedding(text2)
-    emb3 = embedding_service.generate_embedding(text3)
+    # One batched request for all three texts
+    embeddings = embedding_service.generate_embeddings_batch([text1, text2, text3])
+    assert embeddings.shape[0] == 3
+    assert embeddings.dtype == np.float32
+    emb1, emb2, emb3 = embeddings
     
     # Calculate similarities
     sim_12 = embedding_service.cosine_similarity(emb1, emb2)
@@ -314,16 +391,13 @@ def test_vector_search_similarity():
 # End-to-End Integration Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_orchestrator_emotional_message():
+@pytest.mark.live
+@needs_live_model
+def test_orchestrator_emotional_message(orchestrator):
     """Test orchestrator with emotional message."""
-    from orchestration.agent_orchestrator import AgentOrchestrator
-    from services.vector_search_local import LocalVectorSearch
     from data.schemas import ConversationSession
     
-    vector_store = LocalVectorSearch()
-    orchestrator = AgentOrchestrator(vector_store=vector_store)
-    session = ConversationSession(user_id="test_emotional")
+    session = ConversationSession(session_id="test_emotional", user_id="test_emotional")
     
     response = orchestrator.process_message(
         message="I'm frustrated with my research progress.",
@@ -337,16 +411,12 @@ def test_orchestrator_emotional_message():
     assert "vent" in response.lower() or "understand" in response.lower() or "feel" in response.lower()
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_orchestrator_technical_message():
+@pytest.mark.live
+def test_orchestrator_technical_message(orchestrator):
     """Test orchestrator with technical message."""
-    from orchestration.agent_orchestrator import AgentOrchestrator
-    from services.vector_search_local import LocalVectorSearch
     from data.schemas import ConversationSession
     
-    vector_store = LocalVectorSearch()
-    orchestrator = AgentOrchestrator(vector_store=vector_store)
-    session = ConversationSession(user_id="test_technical")
+    session = ConversationSession(session_id="test_technical", user_id="test_technical")
     
     response = orchestrator.process_message(
         message="How does semantic search work for debugging?",
@@ -359,16 +429,12 @@ def test_orchestrator_technical_message():
     # Should route to Academic Peer, not Vent Validator
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_orchestrator_grant_message():
+@pytest.mark.live
+def test_orchestrator_grant_message(orchestrator):
     """Test orchestrator with grant review request."""
-    from orchestration.agent_orchestrator import AgentOrchestrator
-    from services.vector_search_local import LocalVectorSearch
     from data.schemas import ConversationSession
     
-    vector_store = LocalVectorSearch()
-    orchestrator = AgentOrchestrator(vector_store=vector_store)
-    session = ConversationSession(user_id="test_grant")
+    session = ConversationSession(session_id="test_grant", user_id="test_grant")
     
     response = orchestrator.process_message(
         message="Can you review my grant proposal?",
@@ -381,16 +447,13 @@ def test_orchestrator_grant_message():
     # Should route to PI Simulator
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_conversation_history():
+@pytest.mark.live
+@needs_live_model
+def test_conversation_history(orchestrator):
     """Test that conversation history is maintained."""
-    from orchestration.agent_orchestrator import AgentOrchestrator
-    from services.vector_search_local import LocalVectorSearch
     from data.schemas import ConversationSession
     
-    vector_store = LocalVectorSearch()
-    orchestrator = AgentOrchestrator(vector_store=vector_store)
-    session = ConversationSession(user_id="test_history")
+    session = ConversationSession(session_id="test_history", user_id="test_history")
     
     # First message
     response1 = orchestrator.process_message(
@@ -415,7 +478,7 @@ def test_conversation_history():
 # Evaluation Features Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
+@pytest.mark.live
 def test_empathy_scorer():
     """Test empathy scoring."""
     from evaluation.empathy_scorer import EmpathyScorer
@@ -433,7 +496,8 @@ def test_empathy_scorer():
     assert 1.0 <= result['score'] <= 5.0
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
+@pytest.mark.live
+@needs_live_model
 def test_safety_checker():
     """Test safety checker."""
     from evaluation.safety_checker import SafetyChecker
@@ -452,7 +516,7 @@ def test_safety_checker():
     assert risky_result['risk_level'] in ['MEDIUM', 'HIGH']
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
+@pytest.mark.live
 def test_safety_checker_test_suite():
     """Test safety checker test suite."""
     from evaluation.safety_checker import SafetyChecker
@@ -472,16 +536,15 @@ def test_safety_checker_test_suite():
 # Agent-Specific Processing Tests
 # ============================================================================
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_vent_validator_processing():
+@pytest.mark.live
+@needs_live_model
+def test_vent_validator_processing(vent_validator):
     """Test Vent Validator message processing."""
-    from agents.vent_validator import VentValidatorAgent
     from data.schemas import ConversationSession
     
-    agent = VentValidatorAgent()
-    session = ConversationSession(user_id="test_vent")
+    session = ConversationSession(session_id="test_vent", user_id="test_vent")
     
-    response = agent.process(
+    response = vent_validator.process(
         message="I'm struggling with my research and feel like giving up.",
         session=session
     )
@@ -491,34 +554,27 @@ def test_vent_validator_processing():
     assert len(session.messages) >= 2  # User message + response
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_pi_simulator_grant_critique():
+@pytest.mark.live
+def test_pi_simulator_grant_critique(pi_simulator):
     """Test PI Simulator grant critique."""
-    from agents.pi_simulator import PISimulatorAgent
-    
-    agent = PISimulatorAgent()
-    
     grant_text = """
     Title: Novel Approaches to Protein Folding
     Abstract: We propose to investigate protein folding mechanisms using novel computational methods.
     """
     
-    critique = agent.critique_grant(grant_text)
+    critique = pi_simulator.critique_grant(grant_text)
     
     assert critique is not None
     assert len(critique) > 0
 
 
-@pytest.mark.skipif(not HAS_API_KEY, reason="Requires valid API key")
-def test_semantic_matchmaker_peer_matching():
+@pytest.mark.live
+@needs_live_model
+def test_semantic_matchmaker_peer_matching(matchmaker):
     """Test Semantic Matchmaker peer finding."""
-    from agents.semantic_matchmaker import SemanticMatchmakerAgent
-    from services.vector_search_local import LocalVectorSearch
     from data.schemas import ConversationSession
     
-    vector_store = LocalVectorSearch()
-    agent = SemanticMatchmakerAgent(vector_store)
-    session = ConversationSession(user_id="test_match")
+    session = ConversationSession(session_id="test_match", user_id="test_match")
     
     # Add some context
     from data.schemas import ConversationMessage
@@ -529,7 +585,7 @@ def test_semantic_matchmaker_peer_matching():
         )
     )
     
-    matches = agent.find_similar_peers(
+    matches = matchmaker.find_similar_peers(
         message="I'm frustrated with my research progress.",
         session=session
     )
@@ -0,0 +1,51 @@
+"""Tests for the SQLite draft cache."""
+
+from types import SimpleNamespace
+
+from services import draft_cache
+from services.draft_cache import DraftDiskCache
+
+
+def test_round_trip_across_instances(tmp_path):
+    """A draft written by one process's cache is read by another opened on the same file."""
+    path = str(tmp_path / "cache" / "drafts.db")
+    DraftDiskCache(path).put("k", "Setbacks taught me patience. #PhDlife", ["#PhDlife"])
+    
+    assert DraftDiskCache(path).get("k") == {
+        "content": "Setbacks taught me patience. #PhDlife",
+        "hashtags": ["#PhDlife"],
+    }
+    assert DraftDiskCache(path).get("missing") is None
+
+
+def test_put_replaces_earlier_draft(tmp_path):
+    cache = DraftDiskCache(str(tmp_path / "drafts.db"))
+    cache.put("k", "first", [])
+    cache.put("k", "second", ["#two"])
+    assert cache.get("k") == {"content": "second", "hashtags": ["#two"]}
+
+
+def test_expired_draft_is_a_miss(tmp_path, monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(draft_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    cache = DraftDiskCache(str(tmp_path / "drafts.db"), ttl=60)
+    cache.put("k", "draft", [])
+    
+    clock.now += 59
+    assert cache.get("k") is not None
+    clock.now += 2
+    assert cache.get("k") is None
+
+
+def test_uses_wal_journal(tmp_path):
+    cache = DraftDiskCache(str(tmp_path / "drafts.db"))
+    assert cache._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_database_errors_are_misses(tmp_path):
+    cache = DraftDiskCache(str(tmp_path / "drafts.db"))
+    cache.put("k", "draft", [])
+    cache._conn.close()
+    
+    cache.put("other", "draft", [])
+    assert cache.get("k") is None
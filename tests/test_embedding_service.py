@@ -0,0 +1,106 @@
+"""Tests for the embedding service's caches and normalization."""
+
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from services import embedding_service
+from services.embedding_service import QUERY_TASK, EmbeddingService
+from tests.conftest import EMBEDDING_DIM, _fake_embedding
+
+
+def test_query_cache_embeds_original_text():
+    """Case and spacing variants share a cache entry, but the query is embedded as written."""
+    service = EmbeddingService()
+    calls = []
+    
+    def generate_embedding(text, task_type=None):
+        calls.append((text, task_type))
+        return _fake_embedding(service, text, task_type)
+    
+    with patch.object(service, "generate_embedding", side_effect=generate_embedding):
+        first = service.embed_query_normalized("BRCA1  expression in TNBC")
+        second = service.embed_query_normalized("brca1 expression in tnbc")
+    
+    assert calls == [("BRCA1  expression in TNBC", QUERY_TASK)]
+    assert second is first
+    assert not first.flags.writeable
+
+
+def test_query_cache_evicts_least_recent():
+    service = EmbeddingService()
+    with patch("services.embedding_service.settings.query_embedding_cache_size", 2):
+        service.embed_query_normalized("alpha")
+        service.embed_query_normalized("beta")
+        service.embed_query_normalized("alpha")
+        service.embed_query_normalized("gamma")
+    
+    assert list(service._query_cache) == ["alpha", "gamma"]
+
+
+def _numpy_kernel(v):
+    v /= np.linalg.norm(v)
+    return v
+
+
+def test_numba_kernel_compiled_on_first_use(monkeypatch):
+    """Nothing is compiled at import; a failed cached compile retries without the cache."""
+    compiles = []
+    
+    def compile_kernel(cache):
+        compiles.append(cache)
+        if cache:
+            raise RuntimeError("cannot cache function: no locator available")
+        return _numpy_kernel
+    
+    monkeypatch.setattr(embedding_service, "HAS_NUMBA", True)
+    monkeypatch.setattr(embedding_service, "_l2_normalize_768", None)
+    monkeypatch.setattr(embedding_service, "_compile_l2_normalize", compile_kernel)
+    service = EmbeddingService()
+    assert compiles == []
+    
+    for _ in range(2):
+        vector = service.normalize([3.0] * EMBEDDING_DIM)
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert compiles == [True, False]
+
+
+def test_numba_compile_failure_falls_back_to_numpy(monkeypatch):
+    def compile_kernel(cache):
+        raise RuntimeError("LLVM unavailable")
+    
+    monkeypatch.setattr(embedding_service, "HAS_NUMBA", True)
+    monkeypatch.setattr(embedding_service, "_l2_normalize_768", None)
+    monkeypatch.setattr(embedding_service, "_compile_l2_normalize", compile_kernel)
+    
+    vector = EmbeddingService().normalize([3.0] * EMBEDDING_DIM)
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert not embedding_service.HAS_NUMBA
+
+
+def test_concurrent_first_access_builds_one_service(monkeypatch):
+    """Threads racing on first use share a single service."""
+    built = []
+    
+    def slow_service():
+        time.sleep(0.01)
+        built.append(object())
+        return built[-1]
+    
+    monkeypatch.setattr(embedding_service, "_embedding_service_instance", None)
+    monkeypatch.setattr(embedding_service, "EmbeddingService", slow_service)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(embedding_service.get_embedding_service()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(built) == 1
+    assert all(result is built[0] for result in results)
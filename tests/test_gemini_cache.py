@@ -0,0 +1,175 @@
+"""Tests for the Gemini response caches and embedding batcher."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services import gemini_cache
+from services.gemini_cache import EmbeddingBatcher, LLMCache, cache_key
+
+
+def test_cache_key_only_for_deterministic_requests():
+    key = cache_key("gemini-2.5-flash", "hello", None, 0)
+    assert key == cache_key("gemini-2.5-flash", "hello", None, 0)
+    assert key != cache_key("gemini-2.5-pro", "hello", None, 0)
+    assert key != cache_key("gemini-2.5-flash", "hello", None, 0, options={"max_output_tokens": 5})
+    assert cache_key("gemini-2.5-flash", "hello", None, 0.7) is None
+
+
+def test_llm_cache_evicts_least_recently_used():
+    cache = LLMCache(maxsize=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats == {"hits": 3, "misses": 1, "size": 2}
+
+
+def test_llm_cache_entries_expire(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(gemini_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    cache = LLMCache(ttl=10)
+    cache.put("a", "A")
+    
+    clock.now += 9
+    assert cache.get("a") == "A"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats["size"] == 0
+
+
+def test_llm_cache_size_zero_stores_nothing():
+    cache = LLMCache(maxsize=0)
+    cache.put("a", "A")
+    assert cache.get("a") is None
+
+
+class FakeRedisError(Exception):
+    pass
+
+
+class FakeRedis:
+    """Dict-backed stand-in for redis.Redis; fails every call when down."""
+    
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.down = False
+    
+    def get(self, key):
+        if self.down:
+            raise FakeRedisError("connection refused")
+        return self.data.get(key)
+    
+    def setex(self, key, ttl, value):
+        if self.down:
+            raise FakeRedisError("connection refused")
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    monkeypatch.setattr(gemini_cache, "redis", SimpleNamespace(RedisError=FakeRedisError), raising=False)
+    return FakeRedis()
+
+
+def _redis_cache(server: FakeRedis) -> LLMCache:
+    cache = LLMCache(ttl=60)
+    cache._redis = server
+    return cache
+
+
+def test_llm_cache_shared_through_redis(fake_redis):
+    """A response cached by one worker is served to another through Redis."""
+    _redis_cache(fake_redis).put("a", "A")
+    assert fake_redis.data == {gemini_cache.REDIS_KEY_PREFIX + "a": "A"}
+    assert fake_redis.ttls[gemini_cache.REDIS_KEY_PREFIX + "a"] == 60
+    
+    other_worker = _redis_cache(fake_redis)
+    assert other_worker.get("a") == "A"
+    # Kept locally after the first Redis hit
+    fake_redis.data.clear()
+    assert other_worker.get("a") == "A"
+
+
+def test_llm_cache_redis_errors_are_misses(fake_redis):
+    cache = _redis_cache(fake_redis)
+    fake_redis.down = True
+    cache.put("a", "A")
+    assert cache.get("a") == "A"
+    assert _redis_cache(fake_redis).get("a") is None
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_batcher_short_batch_fails_every_caller():
+    """A batch call returning too few rows fails its callers instead of leaving them waiting."""
+    batcher = EmbeddingBatcher(lambda texts: np.zeros((len(texts) - 1, 4)), delay=0.01)
+    errors = []
+
+    def call(text):
+        try:
+            batcher.embed(text)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(f"text {i}",), daemon=True) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == 3
+
+
+def test_batcher_leader_hands_off_after_its_own_row():
+    """The first caller embeds only up to its own batch; a waiting caller flushes the rest."""
+    release = threading.Event()
+    embedded_by = {}
+
+    def embed_batch(texts):
+        if texts == ["a"]:
+            release.wait(timeout=2)
+        for text in texts:
+            embedded_by[text] = threading.get_ident()
+        return np.ones((len(texts), 4))
+
+    batcher = EmbeddingBatcher(embed_batch, max_batch=1, delay=0)
+    leader = threading.Thread(target=batcher.embed, args=("a",), daemon=True)
+    leader.start()
+    _wait_for(lambda: batcher._flushing and not batcher._pending)
+    followers = [threading.Thread(target=batcher.embed, args=(text,), daemon=True) for text in ("b", "c")]
+    for thread in followers:
+        thread.start()
+    _wait_for(lambda: len(batcher._pending) == 2)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(timeout=2)
+
+    assert embedded_by["a"] == leader.ident
+    assert embedded_by["b"] != leader.ident
+    assert embedded_by["c"] != leader.ident
+
+
+def test_batcher_error_reaches_caller():
+    def embed_batch(texts):
+        raise RuntimeError("quota exceeded")
+
+    batcher = EmbeddingBatcher(embed_batch, delay=0)
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        batcher.embed("text")
+    assert not batcher._flushing
@@ -0,0 +1,67 @@
+"""Tests for GeminiService response caching."""
+
+from unittest.mock import Mock
+
+import numpy as np
+
+from services.gemini_cache import LLMCache, SemanticCache
+from services.gemini_service import GeminiService
+from services.rate_limiter import TokenBucket
+from tests.conftest import EMBEDDING_DIM
+
+
+def _cached_service() -> GeminiService:
+    """A service with both caches on; every prompt embeds to the same vector."""
+    service = GeminiService.__new__(GeminiService)
+    service.flash_model_name = "gemini-2.5-flash"
+    service.pro_model_name = "gemini-2.5-pro"
+    service._response_cache = LLMCache()
+    service._semantic_cache = SemanticCache()
+    service._bucket = TokenBucket(rpm=0, tpm=0)
+    service._prompt_embedder = Mock()
+    service._prompt_embedder.embed.return_value = np.ones(EMBEDDING_DIM, dtype=np.float32)
+    service._generate_text = Mock(side_effect=lambda *args, **kwargs: f"reply {service._generate_text.call_count}")
+    service._chat_completion = Mock(side_effect=lambda *args, **kwargs: f"reply {service._chat_completion.call_count}")
+    return service
+
+
+def test_paraphrase_reuses_temperature_zero_response():
+    service = _cached_service()
+
+    first = service.generate_text("Tell me about grant deadlines", temperature=0)
+    second = service.generate_text("Talk about grant deadlines", temperature=0)
+
+    assert first == second == "reply 1"
+    assert service._generate_text.call_count == 1
+
+
+def test_sampled_responses_are_not_reused():
+    service = _cached_service()
+
+    first = service.generate_text("Tell me about grant deadlines", temperature=0.7)
+    second = service.generate_text("Talk about grant deadlines", temperature=0.7)
+
+    assert first != second
+    assert service._prompt_embedder.embed.call_count == 0
+
+
+def test_chat_history_must_match_exactly():
+    service = _cached_service()
+    history = [
+        {"role": "user", "content": "I'm stuck on my methods chapter"},
+        {"role": "model", "content": "What part is giving you trouble?"},
+    ]
+    other_history = [
+        {"role": "user", "content": "My advisor hasn't replied in weeks"},
+        {"role": "model", "content": "What part is giving you trouble?"},
+    ]
+
+    first = service.chat_completion(history + [{"role": "user", "content": "How do I start?"}], temperature=0)
+    other = service.chat_completion(other_history + [{"role": "user", "content": "How do I start?"}], temperature=0)
+    paraphrase = service.chat_completion(history + [{"role": "user", "content": "Where do I begin?"}], temperature=0)
+
+    assert other != first
+    assert paraphrase == first
+    assert service._chat_completion.call_count == 2
+    # Only the latest message is embedded, not the whole conversation
+    assert service._prompt_embedder.embed.call_args.args == ("Where do I begin?",)
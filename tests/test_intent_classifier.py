@@ -0,0 +1,85 @@
+"""Tests for the intent classifier's constrained model call."""
+
+import threading
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from orchestration import intent_classifier
+from orchestration.intent_classifier import IntentClassifier
+from services.gemini_service import GeminiService
+
+
+def test_constrained_label_call():
+    """The model is asked for one enum label, with thinking off and no output cap."""
+    classifier = IntentClassifier()
+    fake = Mock()
+    fake.generate_text.return_value = "grant"
+    
+    with patch.object(intent_classifier, "gemini_service", fake), \
+            patch.object(intent_classifier.settings, "intent_cache_size", 0):
+        result = classifier.classify("Could you look over what I wrote yesterday?")
+    
+    kwargs = fake.generate_text.call_args.kwargs
+    assert kwargs["response_mime_type"] == "text/x.enum"
+    assert kwargs["response_schema"] == IntentClassifier.LABEL_SCHEMA
+    assert kwargs["thinking_budget"] == 0
+    assert "max_output_tokens" not in kwargs
+    assert result["intent"] == "grant"
+    assert result["confidence"] == "high"
+
+
+def _client_service(client: Mock) -> GeminiService:
+    service = GeminiService.__new__(GeminiService)
+    service.use_client_api = True
+    service.client = client
+    service.flash_model = None
+    service.flash_model_name = "gemini-2.5-flash"
+    service._generation_configs = {}
+    return service
+
+
+def test_client_api_forwards_generation_config():
+    """The Client API path sends the temperature, system prompt, schema and thinking budget."""
+    response = Mock()
+    response.candidates = [Mock()]
+    response.candidates[0].content.parts = [Mock(text="grant")]
+    client = Mock()
+    client.models.generate_content.return_value = response
+    service = _client_service(client)
+    
+    text = service._generate_text(
+        "Classify", "flash", "Be brief", 0.3,
+        thinking_budget=0,
+        response_mime_type="text/x.enum",
+        response_schema=IntentClassifier.LABEL_SCHEMA
+    )
+    
+    config = client.models.generate_content.call_args.kwargs["config"]
+    assert text == "grant"
+    assert config.temperature == 0.3
+    assert config.system_instruction == "Be brief"
+    assert config.response_mime_type == "text/x.enum"
+    assert config.thinking_config.thinking_budget == 0
+
+
+def test_concurrent_label_cache_stays_aligned():
+    """Labels cached from many threads each stay on their own embedding row."""
+    classifier = IntentClassifier()
+    
+    def cache(worker):
+        for i in range(50):
+            entry = worker * 50 + i
+            # The row records which entry it belongs to, so misalignment shows
+            classifier._cache_label(np.full(16, entry, dtype=np.float32), str(entry))
+    
+    with patch.object(intent_classifier.settings, "intent_cache_size", 1000):
+        threads = [threading.Thread(target=cache, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    assert sorted(classifier._cache_labels, key=int) == [str(entry) for entry in range(400)]
+    for row, label in zip(classifier._cache_matrix, classifier._cache_labels):
+        assert row[0] == int(label)
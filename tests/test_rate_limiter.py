@@ -0,0 +1,96 @@
+"""Tests for the Gemini token bucket."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from services import rate_limiter
+from services.gemini_service import _estimate_tokens
+from services.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """Stands in for time.monotonic and the bucket's condition; waiting advances the clock."""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.waits = []
+    
+    def monotonic(self) -> float:
+        return self.now
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def wait(self, seconds: float):
+        self.waits.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def _bucket(clock: FakeClock, rpm: int, tpm: int) -> TokenBucket:
+    bucket = TokenBucket(rpm=rpm, tpm=tpm)
+    bucket._condition = clock
+    return bucket
+
+
+def test_reserve_within_budget_does_not_wait(clock):
+    bucket = _bucket(clock, rpm=2, tpm=1000)
+    for _ in range(2):
+        with bucket.reserve(400):
+            pass
+    assert clock.waits == []
+
+
+def test_waits_for_request_refill(clock):
+    bucket = _bucket(clock, rpm=2, tpm=0)
+    bucket.acquire(100)
+    bucket.acquire(100)
+    bucket.acquire(100)
+    # One request comes back every 30 seconds
+    assert clock.waits == [pytest.approx(30)]
+
+
+def test_waits_for_token_refill(clock):
+    bucket = _bucket(clock, rpm=0, tpm=600)
+    bucket.acquire(600)
+    bucket.acquire(300)
+    # 10 tokens come back per second
+    assert clock.waits == [pytest.approx(30)]
+
+
+def test_refill_is_capped_at_the_budget(clock):
+    bucket = _bucket(clock, rpm=2, tpm=0)
+    clock.now += 3600
+    for _ in range(3):
+        bucket.acquire(1)
+    assert clock.waits == [pytest.approx(30)]
+
+
+def test_oversized_request_waits_for_full_budget_only(clock):
+    bucket = _bucket(clock, rpm=0, tpm=100)
+    bucket.acquire(1000)
+    bucket.acquire(1000)
+    assert clock.waits == [pytest.approx(60)]
+
+
+def test_unlimited_never_waits(clock):
+    bucket = _bucket(clock, rpm=0, tpm=0)
+    for _ in range(100):
+        bucket.acquire(1_000_000)
+    assert clock.waits == []
+
+
+def test_estimate_tokens():
+    # ~4 characters per prompt token, plus the output cap or a 1024-token default
+    assert _estimate_tokens(400, 50) == 150
+    assert _estimate_tokens(400, None) == 1124
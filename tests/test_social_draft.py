@@ -0,0 +1,143 @@
+"""Tests for the social draft tool."""
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from data.schemas import GuardianReport, RiskLevel
+from services.gemini_cache import LLMCache, SemanticCache
+from tests.conftest import EMBEDDING_DIM
+from tools import social_draft
+
+RAW_TEXT = "Professor Thompson keeps rejecting my chapter and the Acme Labs dataset still will not load properly"
+
+
+def _stream(*chunks):
+    return (chunk for chunk in chunks)
+
+
+@pytest.fixture
+def fake_gemini():
+    fake = Mock()
+    with patch.object(social_draft, "gemini_service", fake):
+        yield fake
+
+
+def test_retry_keeps_guardian_concerns_on_pro(fake_gemini):
+    """A too-similar draft is retried with the Guardian concerns, on pro when there are any."""
+    fake_gemini.generate_text_stream.return_value = _stream(RAW_TEXT + " #PhDlife")
+    fake_gemini.generate_text.return_value = "Setbacks taught me patience. #PhDlife"
+    report = GuardianReport(risk_level=RiskLevel.HIGH, concerns=["Professor Thompson", "Acme Labs"])
+    
+    draft = social_draft.draft_social_content(raw_text=RAW_TEXT + " retry-pro", guardian_findings=report)
+    
+    retry = fake_gemini.generate_text.call_args.kwargs
+    assert retry["model_type"] == "pro"
+    assert "- Professor Thompson\n- Acme Labs" in retry["prompt"]
+    assert draft["content"] == "Setbacks taught me patience. #PhDlife"
+
+
+def test_retry_without_concerns_uses_flash(fake_gemini):
+    fake_gemini.generate_text_stream.return_value = _stream(RAW_TEXT)
+    fake_gemini.generate_text.return_value = "Setbacks taught me patience. #PhDlife"
+    
+    social_draft.draft_social_content(raw_text=RAW_TEXT + " retry-flash")
+    
+    retry = fake_gemini.generate_text.call_args.kwargs
+    assert retry["model_type"] == "flash"
+    assert "Guardian" not in retry["prompt"]
+
+
+def test_retry_avoid_words_most_repeated_first():
+    overlap = {"dataset", "chapter", "rejecting"}
+    words = social_draft._retry_avoid_words(overlap, "chapter dataset dataset rejecting dataset chapter")
+    assert words == ["dataset", "chapter", "rejecting"]
+
+
+def test_similar_drafts_stay_within_session(fake_gemini):
+    """A reworded raw text reuses a draft from its own session, never another one's."""
+    fake_gemini.generate_text_stream.side_effect = lambda *args, **kwargs: _stream("Setbacks taught me patience. #PhDlife")
+    same_vector = np.ones(EMBEDDING_DIM, dtype=np.float32) / np.sqrt(EMBEDDING_DIM)
+    
+    with patch.object(social_draft, "_similar_drafts", SemanticCache()), \
+            patch.object(social_draft, "_embed_raw_text", return_value=same_vector):
+        social_draft.draft_social_content(raw_text=RAW_TEXT + " session-a", session_id="a")
+        social_draft.draft_social_content(raw_text=RAW_TEXT + " session-b", session_id="b")
+        social_draft.draft_social_content(raw_text=RAW_TEXT + " no-session")
+        assert fake_gemini.generate_text_stream.call_count == 3
+        
+        social_draft.draft_social_content(raw_text=RAW_TEXT + " reworded for a", session_id="a")
+        assert fake_gemini.generate_text_stream.call_count == 3
+
+
+def test_exact_drafts_cached_per_session(fake_gemini):
+    """Repeats reuse the session's own draft; other sessions and regenerate requests sample anew."""
+    replies = iter(["First take. #PhDlife", "Second take. #PhDlife", "Third take. #PhDlife", "Fourth take. #PhDlife"])
+    fake_gemini.generate_text_stream.side_effect = lambda *args, **kwargs: _stream(next(replies))
+    
+    with patch.object(social_draft, "_draft_cache", LLMCache()), \
+            patch.object(social_draft, "_draft_disk_cache", None):
+        first = social_draft.draft_social_content(raw_text=RAW_TEXT, session_id="a")
+        assert social_draft.draft_social_content(raw_text=RAW_TEXT, session_id="a") == first
+        
+        other = social_draft.draft_social_content(raw_text=RAW_TEXT, session_id="b")
+        assert other["content"] == "Second take. #PhDlife"
+        
+        regenerated = social_draft.draft_social_content(raw_text=RAW_TEXT, session_id="a", regenerate=True)
+        assert regenerated["content"] == "Third take. #PhDlife"
+        assert social_draft.draft_social_content(raw_text=RAW_TEXT, session_id="a") == regenerated
+        
+        social_draft.draft_social_content(raw_text=RAW_TEXT)
+        assert fake_gemini.generate_text_stream.call_count == 4
+
+
+RAW_WORDS = social_draft._content_words("the dataset and my annotations were lost before the thesis deadline")
+
+
+def test_too_similar_without_rapidfuzz():
+    """Without rapidfuzz, the share of raw content words kept decides."""
+    with patch.object(social_draft, "HAS_RAPIDFUZZ", False):
+        assert not social_draft._too_similar(RAW_WORDS, "The dataset taught me patience on the way to a milestone")
+        assert social_draft._too_similar(RAW_WORDS, "The dataset annotations were lost, yet the thesis moves on")
+
+
+@pytest.mark.parametrize("score, expected", [(60, False), (61, True)])
+def test_too_similar_with_rapidfuzz(score, expected):
+    """rapidfuzz scores the same content words as the overlap check, stopwords left out."""
+    fake_fuzz = Mock()
+    fake_fuzz.token_set_ratio.return_value = score
+    fake_utils = Mock()
+    with patch.object(social_draft, "HAS_RAPIDFUZZ", True), \
+            patch.object(social_draft, "fuzz", fake_fuzz, create=True), \
+            patch.object(social_draft, "fuzz_utils", fake_utils, create=True):
+        result = social_draft._too_similar(RAW_WORDS, "And the dataset was the best of my lessons")
+    
+    raw, draft = fake_fuzz.token_set_ratio.call_args.args
+    assert set(raw.split()) == RAW_WORDS
+    assert set(draft.split()) == {"dataset", "best", "lessons"}
+    assert fake_fuzz.token_set_ratio.call_args.kwargs["processor"] is fake_utils.default_process
+    assert result is expected
+
+
+@pytest.mark.skipif(not social_draft.HAS_RAPIDFUZZ, reason="rapidfuzz not installed")
+def test_rapidfuzz_agrees_with_overlap_check():
+    assert not social_draft._too_similar(RAW_WORDS, "The dataset taught me patience on the way to a milestone")
+    assert social_draft._too_similar(RAW_WORDS, "The dataset annotations were lost, yet the thesis moves on")
+
+
+def test_warm_up_covers_both_models(fake_gemini):
+    """Each drafting model is warmed with thinking kept minimal; an empty reply is fine."""
+    def stream(**kwargs):
+        if kwargs["model_type"] == "flash":
+            raise RuntimeError("quota exceeded")
+        return _stream()
+    
+    fake_gemini.generate_text_stream.side_effect = stream
+    social_draft.warm_up_drafts()
+    
+    calls = [call.kwargs for call in fake_gemini.generate_text_stream.call_args_list]
+    assert [(c["model_type"], c["thinking_budget"]) for c in calls] == [("flash", 0), ("pro", 128)]
+    assert all(c["prompt"] == social_draft.REWRITE_PROMPT_PREFIX for c in calls)
+    assert all(c["max_output_tokens"] == social_draft.WARMUP_OUTPUT_TOKENS for c in calls)
+    fake_gemini.generate_text.assert_not_called()
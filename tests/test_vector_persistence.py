@@ -0,0 +1,122 @@
+"""Tests for the JSON vector store file and its embedding sidecar."""
+
+import os
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from config.settings import settings
+from data.schemas import PeerProfile
+from services.vector_persistence import JSONFilePersistence, write_atomic
+from tests.conftest import EMBEDDING_DIM
+
+
+def _profiles(count: int):
+    rng = np.random.default_rng(0)
+    return [
+        PeerProfile(
+            profile_id=f"p{i}",
+            embedding=rng.standard_normal(EMBEDDING_DIM).astype(np.float32),
+            struggle_text=f"struggle number {i} with my experiments and my thesis"
+        )
+        for i in range(count)
+    ]
+
+
+def test_embeddings_saved_beside_profiles(tmp_path):
+    path = str(tmp_path / "store.json")
+    profiles = _profiles(3)
+    persistence = JSONFilePersistence()
+    assert persistence.save(profiles, path)
+    
+    assert [item["profile_id"] for item in persistence.load(path)] == ["p0", "p1", "p2"]
+    profile_ids, matrix = JSONFilePersistence().load_embeddings(path)
+    assert profile_ids == ["p0", "p1", "p2"]
+    assert matrix.dtype == np.float32
+    np.testing.assert_array_equal(matrix, np.stack([p.embedding for p in profiles]))
+
+
+def test_embeddings_are_memory_mapped(tmp_path):
+    path = str(tmp_path / "store.json")
+    JSONFilePersistence().save(_profiles(2), path)
+    _, matrix = JSONFilePersistence().load_embeddings(path)
+    assert isinstance(matrix, np.memmap)
+
+
+def test_embeddings_from_another_model_are_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "store.json")
+    JSONFilePersistence().save(_profiles(2), path)
+    monkeypatch.setattr(settings, "embedding_model", "models/some-other-embedding")
+    assert JSONFilePersistence().load_embeddings(path) is None
+
+
+def test_inconsistent_sidecar_is_ignored(tmp_path):
+    path = tmp_path / "store.json"
+    JSONFilePersistence().save(_profiles(3), str(path))
+    np.save(path.with_suffix(".embeddings.npy"), np.zeros((2, EMBEDDING_DIM), dtype=np.float32))
+    assert JSONFilePersistence().load_embeddings(str(path)) is None
+
+
+def test_missing_sidecar(tmp_path):
+    assert JSONFilePersistence().load_embeddings(str(tmp_path / "store.json")) is None
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = tmp_path / "store.json"
+    path.write_bytes(b"previous")
+    
+    def write(f):
+        f.write(b"partial")
+        raise OSError("disk full")
+    
+    with pytest.raises(OSError):
+        write_atomic(path, write)
+    
+    assert path.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_discarded_write_keeps_previous_file(tmp_path):
+    path = tmp_path / "store.json"
+    path.write_bytes(b"previous")
+    
+    assert not write_atomic(path, lambda f: False)
+    assert path.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_concurrent_writers_use_separate_temp_files(tmp_path):
+    path = tmp_path / "store.json"
+    errors = []
+    
+    def writer(payload: bytes):
+        try:
+            for _ in range(50):
+                write_atomic(path, lambda f: f.write(payload))
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=writer, args=(bytes([65 + i]) * 4096,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len(set(path.read_bytes())) == 1
+
+
+def test_unchanged_profiles_are_not_rewritten(tmp_path):
+    path = str(tmp_path / "store.json")
+    persistence = JSONFilePersistence()
+    profiles = _profiles(2)
+    
+    with patch("services.vector_persistence.os.replace", wraps=os.replace) as replace:
+        assert persistence.save(profiles, path)
+        writes = replace.call_count
+        assert persistence.save(profiles, path)
+        assert replace.call_count == writes
+        assert persistence.save(profiles[:1], path)
+        assert replace.call_count > writes
@@ -0,0 +1,69 @@
+"""Tests for batched Vertex AI neighbor queries."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from services.vector_search import VectorSearchService
+
+
+def _service(find_neighbors) -> VectorSearchService:
+    service = VectorSearchService.__new__(VectorSearchService)
+    service.index_endpoint = Mock()
+    service.index_endpoint.find_neighbors.side_effect = find_neighbors
+    service.deployed_index_id = "peers"
+    service._pending_queries = []
+    service._neighbor_sends = set()
+    return service
+
+
+def _echo_neighbors(deployed_index_id, queries):
+    return [SimpleNamespace(neighbors=[query["neighbor_count"]]) for query in queries]
+
+
+def test_queries_share_one_call():
+    service = _service(_echo_neighbors)
+    
+    async def run():
+        return await asyncio.gather(*(service._find_neighbors_batched({"neighbor_count": k}) for k in (1, 2, 3)))
+    
+    assert asyncio.run(run()) == [[1], [2], [3]]
+    assert service.index_endpoint.find_neighbors.call_count == 1
+
+
+def test_cancelled_leader_before_send_still_serves_others():
+    service = _service(_echo_neighbors)
+    
+    async def run():
+        leader = asyncio.ensure_future(service._find_neighbors_batched({"neighbor_count": 1}))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(service._find_neighbors_batched({"neighbor_count": 2}))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.wait_for(follower, timeout=2)
+    
+    assert asyncio.run(run()) == [2]
+
+
+def test_cancelled_leader_during_send_still_serves_others():
+    started = threading.Event()
+    release = threading.Event()
+    
+    def slow_neighbors(deployed_index_id, queries):
+        started.set()
+        release.wait(timeout=2)
+        return _echo_neighbors(deployed_index_id, queries)
+    
+    service = _service(slow_neighbors)
+    
+    async def run():
+        leader = asyncio.ensure_future(service._find_neighbors_batched({"neighbor_count": 1}))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(service._find_neighbors_batched({"neighbor_count": 2}))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 2)
+        leader.cancel()
+        release.set()
+        return await asyncio.wait_for(follower, timeout=2)
+    
+    assert asyncio.run(run()) == [2]
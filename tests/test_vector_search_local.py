@@ -0,0 +1,285 @@
+"""Tests for the local vector store."""
+
+import gc
+import sys
+import threading
+import weakref
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from tests.conftest import EMBEDDING_DIM, _fake_embedding
+from config.settings import settings
+from data.schemas import PeerProfile
+from services.vector_persistence import JSONFilePersistence
+from services import vector_search_local
+from services.vector_search_local import FAISS_AVAILABLE, LocalVectorSearch
+
+QUERY = "thesis trouble"
+
+
+def _profile(i: int, profile_id: str = None) -> PeerProfile:
+    vector = np.random.default_rng(i).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    return PeerProfile(
+        profile_id=profile_id or f"p{i}",
+        embedding=vector,
+        struggle_text=f"struggle number {i} with my experiments and my thesis"
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorSearch(persistence_path=str(tmp_path / "store.json"))
+    yield store
+    # Save now rather than at interpreter exit, after tmp_path is gone
+    store.close()
+
+
+@pytest.fixture
+def reopen(tmp_path):
+    """Open the fixture's store file again, as a restarted process would."""
+    stores = []
+    
+    def reopen() -> LocalVectorSearch:
+        stores.append(LocalVectorSearch(persistence_path=str(tmp_path / "store.json"), load_persisted_on_init=True))
+        return stores[-1]
+    
+    yield reopen
+    for store in stores:
+        store.close()
+
+
+def test_concurrent_add_and_search(store):
+    """Searches running while profiles are added never see a half-added row."""
+    store.add_peer_profile(_profile(0), skip_deduplication=True)
+    errors = []
+    done = threading.Event()
+    
+    def add():
+        try:
+            for i in range(1, 300):
+                store.add_peer_profile(_profile(i), skip_deduplication=True)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+    
+    def search():
+        try:
+            while not done.is_set():
+                for match in store.search_similar("thesis trouble", top_k=5, threshold=-1.0):
+                    assert match.profile_id in store.profiles
+        except Exception as e:
+            errors.append(e)
+    
+    # Switch threads as often as possible so unguarded interleavings show up
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=add)] + [threading.Thread(target=search) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    
+    assert errors == []
+    assert len(store.profiles) == 300
+    assert store.profile_ids == [f"p{i}" for i in range(300)]
+    if store.use_faiss:
+        assert store.index.ntotal == 300
+
+
+def test_add_waits_for_running_search(store):
+    """A profile added mid-search is held back until the search has mapped its results."""
+    store.add_peer_profile(_profile(0), skip_deduplication=True)
+    in_search = threading.Event()
+    release = threading.Event()
+    match_results = store._match_results
+    
+    def slow_match_results(indices, scores):
+        in_search.set()
+        release.wait(timeout=5)
+        return match_results(indices, scores)
+    
+    store._match_results = slow_match_results
+    searcher = threading.Thread(target=store.search_similar, args=("thesis trouble",), kwargs={"threshold": -1.0})
+    adder = threading.Thread(target=store.add_peer_profile, args=(_profile(1),), kwargs={"skip_deduplication": True})
+    searcher.start()
+    assert in_search.wait(timeout=5)
+    adder.start()
+    adder.join(timeout=0.2)
+    blocked = adder.is_alive()
+    release.set()
+    searcher.join()
+    adder.join()
+    
+    assert blocked
+    assert "p1" in store.profiles
+
+
+def _query_match(profile_id: str, text: str) -> PeerProfile:
+    """A profile whose embedding is exactly QUERY's, so it is always the top match."""
+    return PeerProfile(profile_id=profile_id, embedding=_fake_embedding(None, QUERY), struggle_text=text)
+
+
+@pytest.mark.skipif(not FAISS_AVAILABLE, reason="FAISS not installed")
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_removed_profile_is_not_returned(store, monkeypatch, index_type):
+    """Removal drops the profile from FAISS results, whether or not the index can delete."""
+    monkeypatch.setattr(settings, "vector_index_type", index_type)
+    monkeypatch.setattr(settings, "hnsw_min_vectors", 1)
+    for i in range(5):
+        store.add_peer_profile(_profile(i), skip_deduplication=True)
+    store.add_peer_profile(_query_match("target", "my thesis committee keeps moving the goalposts"))
+    assert store.search_similar(QUERY, top_k=1, threshold=-1.0)[0].profile_id == "target"
+    
+    assert store.remove_peer_profile("target")
+    assert not store.remove_peer_profile("target")
+    
+    matches = store.search_similar(QUERY, top_k=6, threshold=-1.0)
+    assert "target" not in {m.profile_id for m in matches}
+    assert len(matches) == 5
+    # HNSW graphs can't delete, so only the flat index shrinks
+    assert store.index.ntotal == (5 if index_type == "flat" else 6)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_readding_profile_id_replaces_it(store, monkeypatch, index_type):
+    monkeypatch.setattr(settings, "vector_index_type", index_type)
+    monkeypatch.setattr(settings, "hnsw_min_vectors", 1)
+    for i in range(3):
+        store.add_peer_profile(_profile(i), skip_deduplication=True)
+    store.add_peer_profile(_profile(7, profile_id="p1"), skip_deduplication=True)
+    store.add_peer_profile(_query_match("p1", "my thesis committee keeps moving the goalposts"))
+    
+    matches = store.search_similar(QUERY, top_k=5, threshold=-1.0)
+    assert [m.profile_id for m in matches].count("p1") == 1
+    assert matches[0].profile_id == "p1"
+    assert "goalposts" in matches[0].match_reason
+    assert len(store.profiles) == 3
+    assert store.profile_ids.count("p1") == 1
+
+
+def test_restart_reuses_saved_embeddings(store, reopen):
+    """Profiles are loaded with their saved embeddings; only profiles without one are embedded."""
+    for i in range(3):
+        store.add_peer_profile(_profile(i), skip_deduplication=True)
+    store.save_to_json()
+    with patch("services.embedding_service.EmbeddingService.generate_embeddings_batch") as embed_batch:
+        restarted = reopen()
+    
+    embed_batch.assert_not_called()
+    assert restarted.profile_ids == ["p0", "p1", "p2"]
+    np.testing.assert_allclose(restarted.embeddings, store.embeddings, rtol=1e-6)
+
+
+@pytest.mark.skipif(not FAISS_AVAILABLE, reason="FAISS not installed")
+def test_restart_maps_saved_faiss_index(store, reopen):
+    for i in range(3):
+        store.add_peer_profile(_profile(i), skip_deduplication=True)
+    store.add_peer_profile(_query_match("target", "my thesis committee keeps moving the goalposts"))
+    store.save_to_json()
+    assert Path(store.persistence_path).with_suffix(".faiss").exists()
+    
+    with patch.object(LocalVectorSearch, "_build_faiss_index", autospec=True) as build:
+        restarted = reopen()
+    
+    build.assert_not_called()
+    assert restarted.index.ntotal == 4
+    assert restarted.search_similar(QUERY, top_k=1, threshold=-1.0)[0].profile_id == "target"
+
+
+@pytest.mark.skipif(not FAISS_AVAILABLE, reason="FAISS not installed")
+def test_restart_rebuilds_stale_faiss_index(store, reopen):
+    """An index saved before a removal no longer matches the profiles, so it is rebuilt."""
+    for i in range(3):
+        store.add_peer_profile(_profile(i), skip_deduplication=True)
+    store.save_to_json()
+    store.remove_peer_profile("p1")
+    store.save_to_json()
+    
+    with patch.object(
+        LocalVectorSearch, "_build_faiss_index", autospec=True, side_effect=LocalVectorSearch._build_faiss_index
+    ) as build:
+        restarted = reopen()
+    
+    build.assert_called_once()
+    assert restarted.profile_ids == ["p0", "p2"]
+    assert restarted.index.ntotal == 2
+
+
+@pytest.fixture
+def blocked_saves(store, monkeypatch):
+    """Autosave every two additions, holding the first save open until released."""
+    monkeypatch.setattr(settings, "auto_save_interval", 2)
+    started = threading.Event()
+    release = threading.Event()
+    save = store.persistence.save
+    
+    def slow_save(profiles, path):
+        started.set()
+        release.wait(timeout=5)
+        return save(profiles, path)
+    
+    with patch.object(store.persistence, "save", side_effect=slow_save):
+        yield started, release
+
+
+def _saved_ids(store) -> list:
+    return [item["profile_id"] for item in JSONFilePersistence().load(store.persistence_path)]
+
+
+def test_autosave_does_not_block_adds(store, blocked_saves):
+    started, release = blocked_saves
+    store.add_peer_profile(_profile(0), skip_deduplication=True)
+    store.add_peer_profile(_profile(1), skip_deduplication=True)
+    assert started.wait(timeout=5)
+    
+    # Returns while the autosave is still writing; its trigger is skipped
+    for i in range(2, 5):
+        store.add_peer_profile(_profile(i), skip_deduplication=True)
+    assert not release.is_set()
+    
+    release.set()
+    store.close()
+    assert _saved_ids(store) == [f"p{i}" for i in range(5)]
+
+
+def test_explicit_save_during_autosave_writes_latest(store, blocked_saves):
+    """A save that starts while an autosave is writing runs after it, so the newer profiles win."""
+    started, release = blocked_saves
+    store.add_peer_profile(_profile(0), skip_deduplication=True)
+    store.add_peer_profile(_profile(1), skip_deduplication=True)
+    assert started.wait(timeout=5)
+    store.add_peer_profile(_profile(2), skip_deduplication=True)
+    
+    saver = threading.Thread(target=store.save_to_json)
+    saver.start()
+    saver.join(timeout=0.2)
+    release.set()
+    saver.join()
+    store._save_executor.shutdown(wait=True)
+    
+    assert _saved_ids(store) == ["p0", "p1", "p2"]
+
+
+def test_exit_hook_saves_open_stores(store, monkeypatch):
+    """Stores still open at exit are saved once and then forgotten."""
+    monkeypatch.setattr(vector_search_local, "_live_stores", weakref.WeakSet([store]))
+    store.add_peer_profile(_profile(0), skip_deduplication=True)
+    
+    vector_search_local._close_live_stores()
+    
+    assert _saved_ids(store) == ["p0"]
+    assert store not in vector_search_local._live_stores
+
+
+def test_unclosed_store_can_be_collected(tmp_path):
+    """Registering for the exit save doesn't keep a dropped store alive."""
+    ref = weakref.ref(LocalVectorSearch(persistence_path=str(tmp_path / "store.json")))
+    gc.collect()
+    assert ref() is None
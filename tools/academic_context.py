@@ -1,15 +1,43 @@
 """Academic context retrieval tool."""
 
-from typing import Dict, Any
+import json
+import threading
+from typing import Dict, Any, Optional
 from loguru import logger
 
+from config.settings import settings
+from services.gemini_cache import LLMCache
 from services.grounding_service import GroundingService
 
+# Built on first use and shared by every call
+_grounding_service: Optional[GroundingService] = None
+_grounding_service_lock = threading.Lock()
+
+
+def _get_grounding_service() -> GroundingService:
+    global _grounding_service
+    if _grounding_service is None:
+        with _grounding_service_lock:
+            if _grounding_service is None:
+                _grounding_service = GroundingService()
+    return _grounding_service
+
+
+# Grounding results per query, stored as JSON so every caller gets its own copy
+_context_cache = LLMCache(
+    maxsize=settings.academic_context_cache_size,
+    ttl=settings.academic_context_cache_ttl
+)
+
 
 def retrieve_academic_context(query: str) -> Dict[str, Any]:
     """
     Retrieve academic context using Google Search Grounding.
     
+    The same topic comes up across many sessions, so results are cached
+    per query, compared case-insensitively with whitespace collapsed. The
+    query is sent as written.
+    
     Args:
         query: Search query (e.g., "Western Blot troubleshooting methods")
         
@@ -17,15 +45,23 @@ def retrieve_academic_context(query: str) -> Dict[str, Any]:
         Dictionary with citations, context, and relevant information
     """
     try:
-        grounding_service = GroundingService()
-        result = grounding_service.retrieve_academic_context(query)
+        key = " ".join(query.split()).lower()
+        cached = _context_cache.get(key)
+        if cached is not None:
+            result = json.loads(cached)
+        else:
+            grounded = _get_grounding_service().retrieve_academic_context(query)
+            result = {
+                "citations": grounded.get("citations", []),
+                "context": grounded.get("context", ""),
+                "hashtags": grounded.get("hashtags", [])
+            }
+            # The grounding service reports failures as an empty result; retry those next time
+            if result["citations"] or result["context"]:
+                _context_cache.put(key, json.dumps(result))
         
-        return {
-            "citations": result.get("citations", []),
-            "context": result.get("context", ""),
-            "hashtags": result.get("hashtags", []),
-            "verified": True
-        }
+        result["verified"] = True
+        return result
         
     except Exception as e:
         logger.error(f"Error retrieving academic context: {str(e)}")
@@ -35,4 +71,3 @@ def retrieve_academic_context(query: str) -> Dict[str, Any]:
             "hashtags": [],
             "verified": False
         }
-